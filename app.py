@@ -1,42 +1,81 @@
-import time
-import sqlite3
+import os
+import asyncio
+import uvicorn
+from fastapi import FastAPI, Response
 from dotenv import load_dotenv
 from src.channels.telegram import TelegramChannel
+from src.channels.slack import SlackChannel
+from src.channels.whatsapp import WhatsAppChannel
 from src.agents.personal_assistant import PersonalAssistant
+from src.checkpoint import CheckpointRetention, PooledSqliteSaver, ZstdSerializer
+from src.runtime import ChannelRuntime, JobQueue
+from src.telemetry import enable_telemetry
+from src.tools.email.mailbox_mirror import enable_mailbox_mirror
+from src.tools.calendar.calendar_mirror import enable_calendar_mirror
 
 # Load .env variables
 load_dotenv()
 
-# Initialize sqlite3 DB for saving agent memory
-conn = sqlite3.connect("db/checkpoints.sqlite", check_same_thread=False)
+# Record the latency, tokens and cost of every agent, LLM and tool call (inspect with `python -m src.telemetry`)
+telemetry = enable_telemetry(os.getenv("TELEMETRY_PATH", "db/telemetry.jsonl")) if os.getenv("TELEMETRY", "true").lower() == "true" else None
 
-# Use telegram for communicating with the agent
-telegram = TelegramChannel()
-# Use Slack for communicating with the agent
-# slack = SlackChannel()
+# Initialize sqlite3 DB for saving agent memory, with pooled connections so concurrent turns don't wait on each other
+checkpointer = PooledSqliteSaver(os.getenv("CHECKPOINT_PATH", "db/checkpoints.sqlite"), serde=ZstdSerializer.from_env())
 
-# Initiate personal assistant
-personal_assistant = PersonalAssistant(conn)
+# Initiate personal assistant, shared by every channel
+personal_assistant = PersonalAssistant(checkpointer=checkpointer)
 
-# Configuration for the Langgraph checkpoints, specifying thread ID
-config = {"configurable": {"thread_id": "1"}}
+# Optional local copies of the mailbox and the calendar, kept in sync with Google, read by the tools instead of the APIs
+mirrors = [enable_mailbox_mirror("db/mailbox.sqlite")] if os.getenv("MAILBOX_MIRROR", "false").lower() == "true" else []
+if os.getenv("CALENDAR_MIRROR", "false").lower() == "true":
+    mirrors.append(enable_calendar_mirror("db/calendar.sqlite"))
 
+# Stream partial answers by editing a placeholder message instead of waiting for the whole turn
+STREAM_REPLIES = os.getenv("STREAM_REPLIES", "true").lower() == "true"
+
+# Durable inbound queue, so messages survive crashes and restarts
+job_queue = JobQueue()
+
+# Communicate with the agent through every channel configured in .env (Telegram, Slack, WhatsApp)
+channels = [
+    channel() for channel in (TelegramChannel, SlackChannel, WhatsAppChannel)
+    if channel.is_configured()
+]
+
+# Run conversations in parallel while keeping each conversation's messages in order
+runtime = ChannelRuntime(
+    personal_assistant,
+    channels,
+    job_queue,
+    max_workers=int(os.getenv("MAX_CONCURRENT_CONVERSATIONS", 4)),
+    stream_replies=STREAM_REPLIES,
+    warm_up=os.getenv("PREWARM_LLM_CLIENTS", "false").lower() == "true",
+    # Prune old checkpoints every hour (CHECKPOINT_KEEP_LAST per conversation, CHECKPOINT_MAX_AGE_DAYS)
+    retention=CheckpointRetention.from_env(checkpointer) if os.getenv("CHECKPOINT_RETENTION", "true").lower() == "true" else None,
+    mirrors=mirrors
+)
+
+
+async def main():
+    runtime_task = asyncio.create_task(runtime.run())
+    whatsapp = runtime.channels.get("whatsapp")
+    if whatsapp:
+        # WhatsApp messages arrive through Twilio's webhook, served from the same loop
+        webhook_app = FastAPI()
+        webhook_app.include_router(
+            whatsapp.webhook_router(job_queue, max_backlog=int(os.getenv("WHATSAPP_MAX_BACKLOG", 32)))
+        )
+        if telemetry:
+            webhook_app.add_api_route("/metrics", lambda: Response(telemetry.prometheus(), media_type="text/plain"))
+        server = uvicorn.Server(uvicorn.Config(webhook_app, host="0.0.0.0", port=5000))
+        await server.serve()
+        runtime_task.cancel()
+    try:
+        await runtime_task
+    except asyncio.CancelledError:
+        pass
 
-def monitor_channel(after_timestamp, config):
-    while True:
-        new_messages = telegram.receive_messages(after_timestamp)
-        if new_messages:
-            for message in new_messages:
-                sent_message = (
-                    f"Message: {message['text']}\n"
-                    f"Current Date/time: {message['date']}"
-                )
-                answer = personal_assistant.invoke(sent_message, config=config)
-                telegram.send_message(answer)
-        after_timestamp = int(time.time())
-        time.sleep(5)  # Sleep for 5 seconds before checking again
-        
 
 if __name__ == "__main__":
-    print("Personal Assistant Manager is running")
-    monitor_channel(int(time.time()), config)
\ No newline at end of file
+    print(f"Personal Assistant Manager is running on: {', '.join(runtime.channels)}")
+    asyncio.run(main())
@@ -1,66 +1,94 @@
+import os
 import uvicorn
-import asyncio
-import sqlite3
-from fastapi import FastAPI, Form
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from dotenv import load_dotenv
 from src.channels.whatsapp import WhatsAppChannel
 from src.agents.personal_assistant import PersonalAssistant
-from src.utils import get_current_date_time
+from src.checkpoint import CheckpointRetention, PooledSqliteSaver, ZstdSerializer
+from src.runtime import ChannelRuntime, JobQueue
+from src.telemetry import enable_telemetry, get_telemetry
+from src.tools.email.mailbox_mirror import enable_mailbox_mirror
+from src.tools.calendar.calendar_mirror import enable_calendar_mirror
 
 # Load .env variables from the environment file
 load_dotenv()
 
-# Initiate FastAPI app
-app = FastAPI()
 
-# Initialize sqlite3 DB for saving agent memory
-conn = sqlite3.connect("db/checkpoints.sqlite", check_same_thread=False)
-
-# Initiate personal assistant instance
-personal_assistant = PersonalAssistant()
-
-# Configuration for the Langgraph agent, specifying thread ID
-config = {"configurable": {"thread_id": "1"}}
-
-async def process_message_async(to_whatsapp_number, incoming_message):
+def create_app(
+    personal_assistant,
+    whatsapp,
+    job_queue,
+    max_workers=int(os.getenv("MAX_CONCURRENT_CONVERSATIONS", 4)),  # Assistant turns running at once
+    max_backlog=int(os.getenv("WHATSAPP_MAX_BACKLOG", 32)),  # Accepted turns (running + queued) before shedding load
+    drain_timeout=float(os.getenv("WHATSAPP_DRAIN_TIMEOUT", 120)),  # Seconds to wait for in-flight turns on shutdown
+    warm_up=os.getenv("PREWARM_LLM_CLIENTS", "false").lower() == "true",  # Open the LLM connections before the first message
+    retention=None,  # CheckpointRetention run in the background
+    mirrors=()  # Local copies of Google data synced in the background
+):
     """
-    Processes the incoming message asynchronously:
-    1. Formats the message with the current date and time.
-    2. Invokes the personal assistant to get a response.
-    3. Sends the response to the provided WhatsApp number.
+    Builds the WhatsApp webhook app around a personal assistant, a WhatsApp channel and a job queue.
+    Several processes (e.g. uvicorn workers) can serve the app on the same job queue.
     """
-    # Format the message with current date/time
-    message = (
-        f"Message: {incoming_message}\n"
-        f"Current Date/time: {get_current_date_time()}"
+    # Turns are drained from the durable queue by a bounded worker pool, in order per sender, off the event loop
+    runtime = ChannelRuntime(
+        personal_assistant, [whatsapp], job_queue, max_workers=max_workers, warm_up=warm_up, retention=retention,
+        mirrors=mirrors
     )
-    
-    # Invoke the personal assistant to generate a response
-    answer = personal_assistant.invoke(message, config=config)
+    state = {"draining": False}
 
-    # Send the response via Twilio WhatsApp
-    whatsapp = WhatsAppChannel()
-    await asyncio.to_thread(
-        whatsapp.send_message,
-        to_number=to_whatsapp_number,
-        body=answer
-    )
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await runtime.start()
+        yield
+        # Stop accepting messages and let in-flight turns finish before exiting
+        state["draining"] = True
+        stats = runtime.stats()
+        print(f"Draining {stats['queue_depth'] + stats['active_workers']} in-flight messages")
+        if not await runtime.stop(drain_timeout):
+            print("Drain timeout reached, the remaining messages will be retried by another worker")
 
-@app.post("/whatsapp/webhook")
-async def whatsapp_webhook(Body: str = Form(...), From: str = Form(...)):
-    """
-    Webhook endpoint that handles incoming messages from WhatsApp.
-    Receives the message and triggers an asynchronous task to process it.
-    """
-    incoming_message = Body
-    from_number = From
-    print(f"Message received from {from_number}: {incoming_message}")
+    app = FastAPI(lifespan=lifespan)
+    app.state.runtime = runtime
+    app.include_router(whatsapp.webhook_router(job_queue, max_backlog, accepting=lambda: not state["draining"]))
+
+    @app.get("/whatsapp/stats")
+    async def whatsapp_stats():
+        """
+        Returns the job queue counts, worker use and LLM client reuse of this process.
+        """
+        return runtime.stats()
+
+    @app.get("/metrics")
+    async def metrics():
+        """
+        Returns the latency, token and cost metrics of the assistant in the Prometheus text format.
+        """
+        telemetry = get_telemetry()
+        return Response(telemetry.prometheus() if telemetry else "", media_type="text/plain")
+
+    return app
+
+
+# Record the latency, tokens and cost of every agent, LLM and tool call (inspect with `python -m src.telemetry`)
+if os.getenv("TELEMETRY", "true").lower() == "true":
+    enable_telemetry(os.getenv("TELEMETRY_PATH", "db/telemetry.jsonl"))
+
+# Initialize sqlite3 DB for saving agent memory, with pooled connections so concurrent turns don't wait on each other
+checkpointer = PooledSqliteSaver(os.getenv("CHECKPOINT_PATH", "db/checkpoints.sqlite"), serde=ZstdSerializer.from_env())
+
+# Initiate FastAPI app with the personal assistant, a shared Twilio client and the durable job queue
+# Prune old checkpoints every hour (CHECKPOINT_KEEP_LAST per conversation, CHECKPOINT_MAX_AGE_DAYS)
+retention = CheckpointRetention.from_env(checkpointer) if os.getenv("CHECKPOINT_RETENTION", "true").lower() == "true" else None
 
-    # Create an asynchronous task to process the message without blocking
-    asyncio.create_task(process_message_async(from_number, incoming_message))
+# Optional local copies of the mailbox and the calendar, kept in sync with Google, read by the tools instead of the APIs
+mirrors = [enable_mailbox_mirror("db/mailbox.sqlite")] if os.getenv("MAILBOX_MIRROR", "false").lower() == "true" else []
+if os.getenv("CALENDAR_MIRROR", "false").lower() == "true":
+    mirrors.append(enable_calendar_mirror("db/calendar.sqlite"))
 
-    # Respond with a status indicating that the message was received
-    return "Message received", 200
+app = create_app(
+    PersonalAssistant(checkpointer=checkpointer), WhatsAppChannel(), JobQueue(), retention=retention, mirrors=mirrors
+)
 
 if __name__ == "__main__":
     # Start the FastAPI application on the specified host and port
@@ -0,0 +1,89 @@
+"""
+GetCalendarEvents answered by the local calendar mirror vs the Calendar API, against a
+local fake Calendar API answering every request after `--delay` seconds (the round trip
+to Google), with `--events` events spread over a year.
+
+Measured:
+- the first (full) sync and an incremental sync after events are added, moved and deleted
+- week, month and quarter reads: the previous tool (first result page only), the
+  paginated API listing, and the mirror's interval index
+- an event created with AddEventToCalendar, visible in the mirror before the next sync
+
+Usage:
+    python -m benchmarks.calendar_mirror
+    python -m benchmarks.calendar_mirror --events 20000 --delay 0.03
+"""
+import os
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from src.tools.calendar import add_event_to_calendar
+from src.tools.calendar.calendar_mirror import CalendarMirror
+from src.tools.calendar.get_events import list_events
+from benchmarks.fake_calendar_api import FakeCalendarAPI, rfc3339
+
+
+def list_first_page(service, start, end):
+    # The tool's previous implementation
+    return service.events().list(
+        calendarId='primary', timeMin=start, timeMax=end, singleEvents=True, orderBy='startTime'
+    ).execute().get('items', [])
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--delay", type=float, default=0.03, help="Seconds the fake API takes to answer a request")
+    args = parser.parse_args()
+
+    api = FakeCalendarAPI(args.events, delay=args.delay).start()
+    mirror = CalendarMirror(os.path.join(tempfile.mkdtemp(), "calendar.sqlite"), service_factory=api.service)
+
+    changes, elapsed = timed(mirror.sync)
+    print(f"Full sync: {changes} events in {elapsed:.0f} ms, {api.requests} requests")
+    ids = list(api.events)
+    now = time.time()
+    for i in range(20):
+        api.add_event(now + i * 3600, 1800, f"New event {i}")
+    for event_id in ids[:10]:
+        api.move_event(event_id, now + 86400, 3600)
+    for event_id in ids[10:15]:
+        api.delete_event(event_id)
+    api.reset_counters()
+    changes, elapsed = timed(mirror.sync)
+    print(f"Incremental sync: {changes} changes in {elapsed:.0f} ms, {api.requests} requests\n")
+
+    print(f"{'period':<9} {'first page ms':>14} {'events':>7} {'paginated ms':>13} {'events':>7} {'mirror ms':>10} {'events':>7} {'same':>5}")
+    service = api.service()
+    with mock.patch("src.tools.calendar.get_events.get_google_service", return_value=service):
+        for name, days in (("week", 7), ("month", 30), ("quarter", 91)):
+            start, end = now, now + days * 86400
+            first_page, first_ms = timed(list_first_page, service, rfc3339(start), rfc3339(end))
+            live, live_ms = timed(list_events, rfc3339(start), rfc3339(end))
+            local, local_ms = timed(mirror.events_between, start, end)
+            same = [e["id"] for e in live] == [e["id"] for e in local]
+            print(
+                f"{name:<9} {first_ms:>14.0f} {len(first_page):>7} {live_ms:>13.0f} {len(live):>7} "
+                f"{local_ms:>10.2f} {len(local):>7} {str(same):>5}"
+            )
+
+    start_time = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0) + timedelta(days=2)
+    with mock.patch("src.tools.calendar.create_event.get_google_service", return_value=service), \
+            mock.patch("src.tools.calendar.create_event.get_calendar_mirror", return_value=mirror):
+        add_event_to_calendar.invoke({"title": "Dentist", "description": "Checkup", "start_time": start_time.isoformat()})
+    start = start_time.replace(tzinfo=timezone.utc).timestamp()
+    found = [e["summary"] for e in mirror.events_between(start, start + 60)]
+    print(f"\nCreated 'Dentist', in the mirror before the next sync: {'Dentist' in found}")
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Checkpoint operations per second of the manager's checkpointer with 1, 8 and 64 threads
+running turns in parallel, each on its own conversation.
+
+Every step of a turn does what LangGraph does per super-step: read the latest checkpoint
+(get_tuple), store the writes of a task (put_writes) and store the new checkpoint (put).
+The checkpoints hold a conversation of `--messages` messages.
+
+Compared:
+- SqliteSaver on one shared connection (what the apps used)
+- PooledSqliteSaver (WAL, pooled readers, one writer)
+
+Usage:
+    python -m benchmarks.checkpoint_concurrency
+    python -m benchmarks.checkpoint_concurrency --threads 1 8 64 --seconds 5
+"""
+import os
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.sqlite import SqliteSaver
+from src.checkpoint import PooledSqliteSaver
+
+
+def conversation(messages):
+    return [
+        (HumanMessage if i % 2 == 0 else AIMessage)(content=f"Message {i} " + "lorem ipsum dolor sit amet " * 20)
+        for i in range(messages)
+    ]
+
+
+def run_turns(saver, thread_id, messages, stop, counts, errors):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    history = conversation(messages)
+    step = 0
+    while not stop.is_set():
+        try:
+            latest = saver.get_tuple(config)
+            checkpoint = empty_checkpoint()
+            checkpoint["channel_values"] = {"messages": history}
+            parent = latest.config if latest else config
+            saver.put_writes({**parent, "configurable": {**parent["configurable"], "checkpoint_id": checkpoint["id"]}},
+                             [("messages", history[-2:])], f"task-{step}")
+            saver.put(parent, checkpoint, {"source": "loop", "step": step, "writes": {}}, {})
+            counts[thread_id] = counts.get(thread_id, 0) + 3
+            step += 1
+        except sqlite3.OperationalError as e:
+            errors.append(str(e))
+
+
+def measure(saver, threads, seconds, messages):
+    stop = threading.Event()
+    counts, errors = {}, []
+    workers = [
+        threading.Thread(target=run_turns, args=(saver, f"thread-{i}", messages, stop, counts, errors))
+        for i in range(threads)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts.values()) / (time.perf_counter() - start), len(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 64])
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--messages", type=int, default=20, help="Messages in each checkpointed conversation")
+    args = parser.parse_args()
+
+    savers = {
+        "SqliteSaver (shared connection)": lambda path: SqliteSaver(sqlite3.connect(path, check_same_thread=False)),
+        "PooledSqliteSaver": lambda path: PooledSqliteSaver(path),
+    }
+    print(f"{'checkpointer':<34} {'threads':>8} {'ops/s':>9} {'errors':>7}")
+    for name, make_saver in savers.items():
+        for threads in args.threads:
+            path = os.path.join(tempfile.mkdtemp(), "checkpoints.sqlite")
+            ops, errors = measure(make_saver(path), threads, args.seconds, args.messages)
+            print(f"{name:<34} {threads:>8} {ops:>9.0f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Bytes stored and (de)serialization time per value of the checkpoint serializers, for the
+checkpoints and for the task writes (one message each) stored between them.
+
+The corpus is `--conversations` manager conversations of `--turns` turns: each turn adds
+the user message, the manager's tool call, the tool result (emails, calendar events, search
+results) and the answer, with the message metadata the models return. Pass `--path` to use
+the checkpoints and writes of a real database instead. The dictionary is trained on the
+first half of the conversations and measured on the other half.
+
+Compared:
+- JsonPlusSerializer (msgpack, what the checkpointer stored)
+- ZstdSerializer without a dictionary
+- ZstdSerializer with a dictionary trained on past checkpoints
+
+Usage:
+    python -m benchmarks.checkpoint_serialization
+    python -m benchmarks.checkpoint_serialization --conversations 40 --turns 15
+    python -m benchmarks.checkpoint_serialization --path db/checkpoints.sqlite
+"""
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from src.checkpoint import ZstdSerializer
+
+WORDS = (
+    "meeting project review budget invoice client schedule report draft team deadline call "
+    "update proposal contract travel flight hotel dinner launch design feedback quarter sales"
+).split()
+
+TOOLS = {
+    "EmailAgent": lambda rng: "\n\n".join(
+        f"From: {rng.choice(WORDS)}@example.com\nSubject: {sentence(rng, 5)}\n{sentence(rng, 60)}" for _ in range(5)
+    ),
+    "CalendarAgent": lambda rng: "\n".join(
+        f"- {sentence(rng, 4)} on 2026-10-{rng.randint(1, 28):02d} {rng.randint(8, 18)}:00, attendees: "
+        f"{', '.join(rng.choice(WORDS) + '@example.com' for _ in range(3))}" for _ in range(8)
+    ),
+    "ResearcherAgent": lambda rng: "\n\n".join(f"https://{rng.choice(WORDS)}.com\n{sentence(rng, 80)}" for _ in range(3)),
+}
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def usage(rng):
+    prompt, completion = rng.randint(1000, 8000), rng.randint(20, 400)
+    return {"input_tokens": prompt, "output_tokens": completion, "total_tokens": prompt + completion}
+
+
+def conversation(rng, turns):
+    """
+    Yields the checkpoint stored after each turn of a conversation, and the task writes of the turn.
+    """
+    messages = []
+    for turn in range(turns):
+        tool = rng.choice(list(TOOLS))
+        call_id = f"call_{rng.getrandbits(64):016x}"
+        turn_messages = [
+            HumanMessage(content=sentence(rng, 15)),
+            AIMessage(
+                content="",
+                tool_calls=[{"name": tool, "args": {"query": sentence(rng, 10)}, "id": call_id}],
+                response_metadata={"model_name": "gpt-4o-mini", "finish_reason": "tool_calls"},
+                usage_metadata=usage(rng),
+            ),
+            ToolMessage(content=TOOLS[tool](rng), name=tool, tool_call_id=call_id),
+            AIMessage(
+                content=sentence(rng, 50),
+                response_metadata={"model_name": "gpt-4o-mini", "finish_reason": "stop"},
+                usage_metadata=usage(rng),
+            ),
+        ]
+        messages += turn_messages
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {"messages": list(messages)}
+        checkpoint["channel_versions"] = {"messages": turn + 1, "__start__": turn + 1}
+        yield checkpoint, [[message] for message in turn_messages]
+
+
+def generated_corpus(conversations, turns, seed=0):
+    rng = random.Random(seed)
+    return [list(conversation(rng, turns)) for _ in range(conversations)]
+
+
+def database_corpus(path):
+    serde = ZstdSerializer()  # Reads both formats
+    conn = sqlite3.connect(path)
+    threads = {}
+    for thread_id, type_, data in conn.execute("SELECT thread_id, type, checkpoint FROM checkpoints ORDER BY thread_id, checkpoint_id"):
+        threads.setdefault(thread_id, []).append((serde.loads_typed((type_, data)), []))
+    for thread_id, type_, data in conn.execute("SELECT thread_id, type, value FROM writes ORDER BY thread_id, checkpoint_id"):
+        if thread_id in threads:
+            threads[thread_id][-1][1].append(serde.loads_typed((type_, data)))
+    conn.close()
+    return list(threads.values())
+
+
+def values(threads):
+    checkpoints = [checkpoint for thread in threads for checkpoint, _ in thread]
+    writes = [write for thread in threads for _, turn_writes in thread for write in turn_writes]
+    return checkpoints, writes
+
+
+def measure(serde, checkpoints):
+    stored = []
+    start = time.perf_counter()
+    for checkpoint in checkpoints:
+        stored.append(serde.dumps_typed(checkpoint))
+    dumps_s = time.perf_counter() - start
+    start = time.perf_counter()
+    for value in stored:
+        serde.loads_typed(value)
+    loads_s = time.perf_counter() - start
+    return sum(len(data) for _, data in stored), dumps_s, loads_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--path", default=None, help="Checkpoint database to take the corpus from")
+    parser.add_argument("--level", type=int, default=3, help="zstd compression level")
+    args = parser.parse_args()
+
+    corpus = database_corpus(args.path) if args.path else generated_corpus(args.conversations, args.turns)
+    if len(corpus) < 2:
+        print("At least 2 conversations are needed, one to train the dictionary and one to measure it")
+        return
+    train = sum(values(corpus[:len(corpus) // 2]), [])
+    test_checkpoints, test_writes = values(corpus[len(corpus) // 2:])
+
+    plain = JsonPlusSerializer()
+    trained = ZstdSerializer(level=args.level, dictionary_dir=tempfile.mkdtemp())
+    trained.train_dictionary([plain.dumps_typed(value)[1] for value in train])
+    serializers = {
+        "JsonPlusSerializer (msgpack)": plain,
+        "ZstdSerializer": ZstdSerializer(level=args.level, dictionary_dir=tempfile.mkdtemp()),
+        "ZstdSerializer + dictionary": trained,
+    }
+
+    print(f"{len(train)} checkpoints and writes used to train the dictionary")
+    for label, test in (("checkpoints", test_checkpoints), ("writes", test_writes)):
+        if not test:
+            continue
+        print(f"\n{len(test)} {label}")
+        print(f"{'serializer':<30} {'MB':>8} {'ratio':>7} {'dumps us':>9} {'loads us':>9}")
+        baseline = None
+        for name, serde in serializers.items():
+            size, dumps_s, loads_s = measure(serde, test)
+            baseline = baseline or size
+            print(
+                f"{name:<30} {size / 1e6:>8.2f} {baseline / size:>6.1f}x "
+                f"{dumps_s / len(test) * 1e6:>9.0f} {loads_s / len(test) * 1e6:>9.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
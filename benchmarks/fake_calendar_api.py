@@ -0,0 +1,192 @@
+import json
+import time
+import threading
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def rfc3339(timestamp):
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class FakeCalendarAPI:
+    """
+    Minimal in-process stand-in for the Google Calendar endpoints the calendar tools and the
+    calendar mirror call: events.list (pages of `maxResults`, timeMin / timeMax, and
+    incremental listing with syncToken, 410 for unknown tokens), events.insert, calendars.get
+    and freebusy.query.
+    `add_event`, `move_event` and `delete_event` change the calendar.
+
+    Every HTTP request waits `delay` seconds, the network round trip to Google, and is counted.
+    All-day events start and end at midnight in `time_zone`, the calendar's time zone.
+    """
+
+    def __init__(self, events, host="127.0.0.1", port=0, delay=0.0, days=365, start=None, time_zone="UTC"):
+        self.delay = delay
+        self.time_zone_name = time_zone
+        self.time_zone = ZoneInfo(time_zone)
+        self.events = {}  # id -> event, tombstones of deleted events included (status "cancelled")
+        self.version = 0  # Bumped by every change, sync tokens are versions
+        self.requests = 0
+        self._lock = threading.Lock()
+        start = start or time.time() - days * 86400 / 2
+        for i in range(events):
+            self.add_event(start + days * 86400 * i / events, 1800 + (i % 4) * 1800, f"Event {i}")
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+
+    def service(self):
+        """
+        Returns a googleapiclient Calendar service sending its requests to this server.
+        """
+        import httplib2
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.discovery_cache import get_static_doc
+
+        document = json.loads(get_static_doc("calendar", "v3"))
+        document["rootUrl"] = self.base_url
+        return build_from_document(document, http=httplib2.Http())
+
+    def timestamp(self, value):
+        if "dateTime" in value:
+            return datetime.fromisoformat(value["dateTime"]).timestamp()
+        return datetime.fromisoformat(value["date"]).replace(tzinfo=self.time_zone).timestamp()
+
+    def _changed(self, event):
+        self.version += 1
+        event["_version"] = self.version
+        event["updated"] = rfc3339(time.time())
+        self.events[event["id"]] = event
+        return event
+
+    def add_event(self, start, duration, summary, description=None):
+        event = {
+            "id": f"event{len(self.events):08d}",
+            "status": "confirmed",
+            "summary": summary,
+            "start": {"dateTime": rfc3339(start)},
+            "end": {"dateTime": rfc3339(start + duration)},
+        }
+        if description:
+            event["description"] = description
+        return self._changed(event)
+
+    def move_event(self, event_id, start, duration):
+        event = dict(self.events[event_id], start={"dateTime": rfc3339(start)}, end={"dateTime": rfc3339(start + duration)})
+        return self._changed(event)
+
+    def delete_event(self, event_id):
+        return self._changed({"id": event_id, "status": "cancelled"})
+
+    def list_events(self, params):
+        events = sorted(self.events.values(), key=lambda e: (self.timestamp(e["start"]) if "start" in e else 0, e["id"]))
+        if "syncToken" in params:
+            token = int(params["syncToken"])
+            if token > self.version:
+                return None
+            events = [e for e in events if e["_version"] > token]
+        else:
+            events = [e for e in events if e["status"] != "cancelled"]
+            if "timeMin" in params:
+                time_min = datetime.fromisoformat(params["timeMin"]).timestamp()
+                events = [e for e in events if self.timestamp(e["end"]) > time_min]
+            if "timeMax" in params:
+                time_max = datetime.fromisoformat(params["timeMax"]).timestamp()
+                events = [e for e in events if self.timestamp(e["start"]) < time_max]
+        start = int(params.get("pageToken", 0))
+        size = min(int(params.get("maxResults", 250)), 2500)
+        result = {"kind": "calendar#events", "timeZone": self.time_zone_name, "items": [
+            {k: v for k, v in e.items() if k != "_version"} for e in events[start:start + size]
+        ]}
+        if start + size < len(events):
+            result["nextPageToken"] = str(start + size)
+        else:
+            result["nextSyncToken"] = str(self.version)
+        return result
+
+    def free_busy(self, body):
+        # Merged busy periods of the events overlapping the period, free ("transparent") ones excluded
+        time_min = datetime.fromisoformat(body["timeMin"]).timestamp()
+        time_max = datetime.fromisoformat(body["timeMax"]).timestamp()
+        busy = []
+        for start, end in sorted(
+            (max(self.timestamp(e["start"]), time_min), min(self.timestamp(e["end"]), time_max)) for e in self.events.values()
+            if e["status"] != "cancelled" and e.get("transparency") != "transparent"
+            and self.timestamp(e["start"]) < time_max and self.timestamp(e["end"]) > time_min
+        ):
+            if busy and start <= busy[-1][1]:
+                busy[-1][1] = max(busy[-1][1], end)
+            else:
+                busy.append([start, end])
+        periods = [{"start": rfc3339(start), "end": rfc3339(end)} for start, end in busy]
+        return {"kind": "calendar#freeBusy", "calendars": {"primary": {"busy": periods}}}
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like Google's endpoints
+
+            def respond(self, status, result):
+                body = json.dumps(result).encode()
+                if api.delay:
+                    time.sleep(api.delay)
+                with api._lock:
+                    api.requests += 1
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.rstrip("/") == "/calendar/v3/calendars/primary/events":
+                    with api._lock:
+                        result = api.list_events({k: v[0] for k, v in parse_qs(url.query).items()})
+                    if result is None:
+                        return self.respond(410, {"error": {"code": 410, "message": "Sync token is no longer valid"}})
+                    return self.respond(200, result)
+                if url.path.rstrip("/") == "/calendar/v3/calendars/primary":
+                    return self.respond(200, {"kind": "calendar#calendar", "id": "primary", "timeZone": api.time_zone_name})
+                self.respond(404, {"error": {"code": 404, "message": "Not Found"}})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if url.path.rstrip("/") == "/calendar/v3/calendars/primary/events":
+                    start = datetime.fromisoformat(body["start"]["dateTime"]).replace(tzinfo=timezone.utc).timestamp()
+                    end = datetime.fromisoformat(body["end"]["dateTime"]).replace(tzinfo=timezone.utc).timestamp()
+                    with api._lock:
+                        event = api.add_event(start, end - start, body.get("summary"), body.get("description"))
+                    return self.respond(200, {k: v for k, v in event.items() if k != "_version"})
+                if url.path.rstrip("/") == "/calendar/v3/freeBusy":
+                    with api._lock:
+                        result = api.free_busy(body)
+                    return self.respond(200, result)
+                self.respond(404, {"error": {"code": 404, "message": "Not Found"}})
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,235 @@
+import json
+import time
+import uuid
+import base64
+import threading
+from email.parser import Parser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+HEADER_NAMES = [
+    "Delivered-To", "Received", "X-Received", "ARC-Seal", "ARC-Message-Signature", "ARC-Authentication-Results",
+    "Return-Path", "Received-SPF", "Authentication-Results", "DKIM-Signature", "MIME-Version", "Message-ID",
+    "Content-Type", "List-Unsubscribe", "X-Mailer",
+]
+
+
+class FakeGmailAPI:
+    """
+    Minimal in-process stand-in for the Gmail endpoints `read_emails` and the mailbox mirror
+    call: messages.list (with pages, and the after:, before:, from: and plain word search
+    operators), messages.get (full or metadata format), getProfile, history.list and batch
+    HTTP requests. `add_message` and `delete_message` change the mailbox and its history.
+
+    Every HTTP request waits `delay` seconds, the network round trip to Google, and is
+    counted along with the bytes sent back.
+    """
+
+    def __init__(self, messages, host="127.0.0.1", port=0, delay=0.0, page_size=100, body_size=4000, days=30):
+        self.delay = delay
+        self.page_size = page_size  # Gmail's default page size
+        self.body_size = body_size
+        self.messages = {}  # Oldest first
+        self.history = []  # (history id, type, message id)
+        self.history_id = 1000
+        now = time.time()
+        for i in range(messages):
+            self.add_message(i, now - days * 86400 * (messages - i) / messages, record=False)
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests, self.bytes_sent = 0, 0
+
+    @property
+    def ids(self):
+        # Newest first, like Gmail's results
+        return list(reversed(self.messages))
+
+    def add_message(self, i, timestamp=None, subject=None, record=True):
+        message_id = f"{i:016x}"
+        timestamp = timestamp or time.time()
+        self.messages[message_id] = {
+            "id": message_id,
+            "threadId": message_id,
+            "internalDate": str(int(timestamp * 1000)),
+            "snippet": f"Snippet of email {i} about the {['quarterly report', 'team offsite', 'invoice', 'product launch'][i % 4]}",
+            "headers": [{"name": name, "value": f"{name} value of email {i} " * 3} for name in HEADER_NAMES] + [
+                {"name": "Subject", "value": subject or f"Email {i}"},
+                {"name": "From", "value": f"Sender {i % 20} <sender{i % 20}@example.com>"},
+                {"name": "Date", "value": time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.gmtime(timestamp))},
+            ],
+            "body": base64.urlsafe_b64encode((f"Body of email {i}. " * (self.body_size // 20)).encode()).decode(),
+        }
+        self.history_id += 1
+        if record:
+            self.history.append((self.history_id, "messagesAdded", message_id))
+        return message_id
+
+    def delete_message(self, message_id):
+        del self.messages[message_id]
+        self.history_id += 1
+        self.history.append((self.history_id, "messagesDeleted", message_id))
+
+    def service(self):
+        """
+        Returns a googleapiclient Gmail service sending its requests to this server.
+        """
+        import httplib2
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.discovery_cache import get_static_doc
+
+        document = json.loads(get_static_doc("gmail", "v1"))
+        document["rootUrl"] = self.base_url
+        return build_from_document(document, http=httplib2.Http())
+
+    def matches(self, message, query):
+        for term in query.split():
+            operator, _, value = term.rpartition(":")
+            if operator == "after" and int(message["internalDate"]) // 1000 <= int(value):
+                return False
+            if operator == "before" and int(message["internalDate"]) // 1000 >= int(value):
+                return False
+            if operator == "from" and value.lower() not in message["headers"][-2]["value"].lower():
+                return False
+            if not operator and value.lower() not in (message["headers"][-3]["value"] + " " + message["snippet"]).lower():
+                return False
+        return True
+
+    def list_messages(self, params):
+        ids = [i for i in self.ids if self.matches(self.messages[i], params.get("q", ""))]
+        start = int(params.get("pageToken", 0))
+        size = min(int(params.get("maxResults", self.page_size)), 500)
+        page = ids[start:start + size]
+        result = {"messages": [{"id": i, "threadId": i} for i in page], "resultSizeEstimate": len(ids)}
+        if start + size < len(ids):
+            result["nextPageToken"] = str(start + size)
+        return result
+
+    def get_message(self, message_id, params):
+        message = self.messages.get(message_id)
+        if message is None:
+            return None
+        headers = message["headers"]
+        result = {
+            "id": message["id"], "threadId": message["threadId"], "snippet": message["snippet"], "labelIds": ["INBOX"],
+            "internalDate": message["internalDate"],
+        }
+        if params.get("format") == "metadata":
+            wanted = {name.lower() for name in params.get("metadataHeaders", [])}
+            result["payload"] = {"headers": [h for h in headers if not wanted or h["name"].lower() in wanted]}
+        else:
+            result["payload"] = {
+                "mimeType": "multipart/alternative",
+                "headers": headers,
+                "parts": [
+                    {"mimeType": "text/plain", "body": {"size": len(message["body"]), "data": message["body"]}},
+                    {"mimeType": "text/html", "body": {"size": len(message["body"]), "data": message["body"]}},
+                ],
+            }
+        return result
+
+    def list_history(self, params):
+        start = int(params["startHistoryId"])
+        if self.history and start < self.history[0][0] - 1:
+            return None  # Older than the history kept
+        records = [
+            {"id": str(history_id), change: [{"message": {"id": message_id}}]}
+            for history_id, change, message_id in self.history if history_id > start
+        ]
+        return {"history": records, "historyId": str(self.history_id)}
+
+    def route(self, method, path):
+        """
+        Returns the (status, JSON body) of a Gmail API call.
+        """
+        url = urlparse(path)
+        params = {k: v if k == "metadataHeaders" else v[0] for k, v in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+        if method == "GET" and parts[:5] == ["gmail", "v1", "users", "me", "profile"]:
+            return 200, {"emailAddress": "me@example.com", "historyId": str(self.history_id)}
+        if method == "GET" and parts[:5] == ["gmail", "v1", "users", "me", "history"]:
+            history = self.list_history(params)
+            if history is not None:
+                return 200, history
+        if method == "GET" and parts[:5] == ["gmail", "v1", "users", "me", "messages"]:
+            if len(parts) == 5:
+                return 200, self.list_messages(params)
+            message = self.get_message(parts[5], params)
+            if message is not None:
+                return 200, message
+        return 404, {"error": {"code": 404, "message": "Not Found"}}
+
+    def batch(self, content_type, body):
+        """
+        Answers a multipart/mixed batch request, one HTTP response per part.
+        """
+        request = Parser().parsestr(f"Content-Type: {content_type}\r\n\r\n{body}")
+        boundary = uuid.uuid4().hex
+        responses = []
+        for part in request.get_payload():
+            request_line = part.get_payload().lstrip().split("\n", 1)[0]
+            method, path, _ = request_line.split(" ", 2)
+            status, result = self.route(method, path)
+            content_id = part["Content-ID"].strip("<>")
+            responses.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status == 200 else 'Not Found'}\r\n"
+                f"Content-Type: application/json; charset=UTF-8\r\n\r\n{json.dumps(result)}\r\n"
+            )
+        return f"multipart/mixed; boundary={boundary}", "".join(responses) + f"--{boundary}--\r\n"
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like Google's endpoints
+
+            def respond(self, status, content_type, body):
+                body = body.encode()
+                if api.delay:
+                    time.sleep(api.delay)
+                with api._lock:
+                    api.requests += 1
+                    api.bytes_sent += len(body)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                status, result = api.route("GET", self.path)
+                self.respond(status, "application/json; charset=UTF-8", json.dumps(result))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length).decode()
+                if self.path.rstrip("/") in ("/batch", "/batch/gmail/v1"):
+                    content_type, response = api.batch(self.headers["Content-Type"], body)
+                    self.respond(200, content_type, response)
+                else:
+                    self.respond(404, "application/json", json.dumps({"error": {"code": 404}}))
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
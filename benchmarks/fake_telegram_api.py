@@ -0,0 +1,133 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeTelegramAPI:
+    """
+    Minimal in-process stand-in for the Telegram Bot API.
+
+    It implements just enough of getUpdates (including offset confirmation and
+    long polling), sendMessage and editMessageText for the channel benchmarks.
+    Messages pushed with `push_message` remember when they were injected so
+    benchmarks can measure receive-to-dispatch latency.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.updates = []
+        self.injected_at = {}
+        self.sent = []
+        self.edits = []
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._condition = threading.Condition()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}/bot"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._condition:
+            self._condition.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def push_message(self, text, chat_id=1):
+        with self._condition:
+            update_id = self._next_update_id
+            self._next_update_id += 1
+            self.updates.append({
+                "update_id": update_id,
+                "message": {
+                    "message_id": self._new_message_id(),
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+                    "text": text,
+                },
+            })
+            self.injected_at[update_id] = time.perf_counter()
+            self._condition.notify_all()
+        return update_id
+
+    def _new_message_id(self):
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        return message_id
+
+    def get_updates(self, params):
+        offset = params.get("offset")
+        timeout = float(params.get("timeout") or 0)
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            if offset is not None:
+                # Like Telegram, an offset confirms (and forgets) every earlier update
+                self.updates = [u for u in self.updates if u["update_id"] >= int(offset)]
+            while not self.updates and time.monotonic() < deadline:
+                self._condition.wait(deadline - time.monotonic())
+            return list(self.updates[:100])
+
+    def send_message(self, params):
+        message = {
+            "message_id": self._new_message_id(),
+            "date": int(time.time()),
+            "chat": {"id": int(params.get("chat_id", 1)), "type": "private"},
+            "text": params.get("text", ""),
+        }
+        self.sent.append((time.perf_counter(), message))
+        return message
+
+    def edit_message_text(self, params):
+        self.edits.append((time.perf_counter(), params))
+        return {
+            "message_id": int(params.get("message_id", 0)),
+            "date": int(time.time()),
+            "chat": {"id": int(params.get("chat_id", 1)), "type": "private"},
+            "text": params.get("text", ""),
+        }
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                method = self.path.rsplit("/", 1)[-1]
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length).decode() if length else ""
+                if "json" in (self.headers.get("Content-Type") or ""):
+                    params = json.loads(raw or "{}")
+                else:
+                    params = {k: v[0] for k, v in parse_qs(raw).items()}
+
+                if method == "getUpdates":
+                    result = api.get_updates(params)
+                elif method == "sendMessage":
+                    result = api.send_message(params)
+                elif method == "editMessageText":
+                    result = api.edit_message_text(params)
+                elif method == "getMe":
+                    result = {"id": 1, "is_bot": True, "first_name": "FakeBot", "username": "fake_bot"}
+                else:
+                    result = True
+
+                body = json.dumps({"ok": True, "result": result}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
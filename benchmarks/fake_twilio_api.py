@@ -0,0 +1,66 @@
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class FakeTwilioAPI:
+    """
+    Minimal in-process stand-in for Twilio's Messages REST endpoint.
+
+    Every message the app sends is recorded with the time it arrived, so load tests
+    can measure end-to-end completion latency without talking to Twilio.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0):
+        self.delay = delay  # Simulated Twilio API latency in seconds
+        self.messages = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                params = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+                if api.delay:
+                    time.sleep(api.delay)
+                with api._lock:
+                    api.messages.append((time.perf_counter(), params))
+
+                body = json.dumps({
+                    "sid": f"SM{uuid.uuid4().hex}",
+                    "status": "queued",
+                    "to": params.get("To"),
+                    "from": params.get("From"),
+                    "body": params.get("Body"),
+                }).encode()
+                self.send_response(201)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
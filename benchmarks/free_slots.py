@@ -0,0 +1,129 @@
+"""
+FindFreeSlots on calendars of 1,000, 5,000 and 20,000 events over a year (overlapping
+meetings, all-day events, most marked as free), answered from the local calendar mirror,
+for a calendar in UTC and one in another time zone (working hours and all-day events are
+in the calendar's time zone).
+
+For each time zone, calendar and a week / month / quarter period:
+- the time to merge the busy intervals and find the free slots, and of the whole tool call
+  (mirror read included)
+- whether the slots match a minute-by-minute brute force check, and whether the tool gives
+  the same answer without the mirror, from the Calendar freeBusy API (fake, local)
+- the tokens of the tool's answer vs GetCalendarEvents listing the period's events, what
+  the calendar agent had to read before
+
+Usage:
+    python -m benchmarks.free_slots
+    python -m benchmarks.free_slots --events 1000 5000 20000 --duration 45 --buffer 10
+    python -m benchmarks.free_slots --timezones UTC Asia/Kolkata
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from unittest import mock
+from zoneinfo import ZoneInfo
+from src.tools.calendar import find_free_slots, get_calendar_events
+from src.tools.calendar.calendar_mirror import CalendarMirror
+from src.tools.calendar.find_free_slots import busy_intervals, free_slots
+from src.tools.output_compaction import estimate_tokens
+from benchmarks.fake_calendar_api import FakeCalendarAPI
+
+
+def calendar(events, start, time_zone, seed=0):
+    """
+    Returns a fake Calendar API holding `events` events over a year from `start`, mostly in
+    working hours. 5% are all-day events, one in five of them blocking the day.
+    """
+    rng = random.Random(seed)
+    api = FakeCalendarAPI(0, time_zone=time_zone)
+    for i in range(events):
+        day = start + timedelta(days=rng.randrange(365))
+        if rng.random() < 0.05:
+            event = api.add_event(day.timestamp(), 86400, f"All-day {i}")
+            event.update(start={"date": day.date().isoformat()}, end={"date": (day + timedelta(days=1)).date().isoformat()})
+            if rng.random() < 0.8:
+                event["transparency"] = "transparent"
+            continue
+        begin = day + timedelta(minutes=rng.randrange(7 * 60, 19 * 60, 15))
+        api.add_event(begin.timestamp(), rng.choice([15, 30, 30, 45, 60, 60, 90, 120]) * 60, f"Meeting {i}")
+    return api
+
+
+def brute_force(busy, start, end, duration, buffer):
+    # Minute by minute: free minutes in working hours on weekdays (in the time zone of `start`),
+    # grouped in runs of at least `duration`
+    slots, run_start, minute = [], None, start.timestamp()
+    while minute <= end.timestamp():
+        moment = datetime.fromtimestamp(minute, start.tzinfo)
+        free = (
+            minute < end.timestamp() and moment.weekday() < 5 and 9 <= moment.hour < 18
+            and not any(b_start - buffer <= minute < b_end + buffer for b_start, b_end in busy)
+        )
+        if free and run_start is None:
+            run_start = minute
+        elif not free and run_start is not None:
+            if minute - run_start >= duration:
+                slots.append((run_start, minute))
+            run_start = None
+        minute += 60
+    return slots
+
+
+def run(time_zone, events, args):
+    first_monday = datetime(2026, 1, 5, tzinfo=ZoneInfo(time_zone))
+    api = calendar(events, first_monday, time_zone).start()
+    # No time zone given: the mirror takes the calendar's from the listed events
+    mirror = CalendarMirror(os.path.join(tempfile.mkdtemp(), "calendar.sqlite"), service_factory=api.service)
+    mirror.sync()
+    ask = lambda dates: find_free_slots.invoke({**dates, "duration_minutes": args.duration, "buffer_minutes": args.buffer})
+    with mock.patch("src.tools.calendar.calendar_mirror._mirror", mirror):
+        for name, days in (("week", 7), ("month", 28), ("quarter", 91)):
+            start = first_monday + timedelta(days=91)
+            end = start + timedelta(days=days)
+            busy = busy_intervals(start, end)
+
+            begin = time.perf_counter()
+            slots = free_slots(busy, start, end, args.duration * 60, buffer=args.buffer * 60, limit=10**6)
+            slots_ms = (time.perf_counter() - begin) * 1000
+            correct = slots == brute_force(busy, start, end, args.duration * 60, args.buffer * 60) if days <= 28 else "-"
+
+            dates = {"start_date": start.date().isoformat(), "end_date": (end - timedelta(days=1)).date().isoformat()}
+            begin = time.perf_counter()
+            answer = ask(dates)
+            tool_ms = (time.perf_counter() - begin) * 1000
+            # The fake freeBusy API places all-day events in the calendar's time zone on its own, the tool asks for it
+            with mock.patch("src.tools.calendar.calendar_mirror._mirror", None), \
+                    mock.patch("src.tools.calendar.calendar_mirror._calendar_timezone", None), \
+                    mock.patch("src.tools.calendar.calendar_mirror.get_google_service", side_effect=lambda *_: api.service()), \
+                    mock.patch("src.tools.calendar.find_free_slots.get_google_service", side_effect=lambda *_: api.service()):
+                same = ask(dates) == answer
+            listing = get_calendar_events.invoke({"start_date": dates["start_date"], "end_date": end.date().isoformat()})
+            print(
+                f"{time_zone:<19} {events:>7} {name:<8} {len(busy):>6} {slots_ms:>9.2f} {tool_ms:>8.1f} {str(correct):>8} "
+                f"{str(same):>9} {estimate_tokens(listing):>14} {estimate_tokens(answer):>13}"
+            )
+    api.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--duration", type=int, default=30, help="Minutes")
+    parser.add_argument("--buffer", type=int, default=0, help="Minutes")
+    parser.add_argument("--timezones", nargs="+", default=["UTC", "America/Los_Angeles"])
+    args = parser.parse_args()
+
+    print(
+        f"{'time zone':<19} {'events':>7} {'period':<8} {'busy':>6} {'slots ms':>9} {'tool ms':>8} {'correct':>8} "
+        f"{'freeBusy':>9} {'events tokens':>14} {'slots tokens':>13}"
+    )
+    for time_zone in args.timezones:
+        for events in args.events:
+            run(time_zone, events, args)
+
+
+if __name__ == "__main__":
+    main()
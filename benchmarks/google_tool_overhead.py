@@ -0,0 +1,101 @@
+"""
+Overhead of getting a Google API client in a tool call, before the request is sent: what
+every Google tool did (load token.json and build the service from its discovery document)
+vs the shared credentials and per-thread service registry of `src.utils`.
+
+Both use the discovery documents shipped with googleapiclient, and a token.json with a
+valid token written to a temporary directory, so nothing goes over the network. The
+single-flight check expires the token and has `--threads` threads ask for credentials at
+once, with a refresh that takes 200 ms instead of calling Google.
+
+Usage:
+    python -m benchmarks.google_tool_overhead
+    python -m benchmarks.google_tool_overhead --calls 200 --threads 16
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from src import utils
+
+APIS = [("gmail", "v1"), ("calendar", "v3"), ("people", "v1")]
+
+
+def write_token(path):
+    with open(path, "w") as f:
+        json.dump({
+            "token": "benchmark-token",
+            "refresh_token": "benchmark-refresh-token",
+            "client_id": "benchmark.apps.googleusercontent.com",
+            "client_secret": "benchmark-secret",
+            "scopes": utils.SCOPES,
+            "expiry": (datetime.utcnow() + timedelta(days=1)).isoformat() + "Z",
+        }, f)
+
+
+def build_per_call(api, version):
+    # What the tools did before on every call
+    from google.oauth2.credentials import Credentials
+    from googleapiclient.discovery import build
+
+    creds = Credentials.from_authorized_user_file(utils.GOOGLE_TOKEN_PATH, utils.SCOPES)
+    return build(api, version, credentials=creds)
+
+
+def per_call_ms(get_service, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        api, version = APIS[i % len(APIS)]
+        get_service(api, version)
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def concurrent_refreshes(threads):
+    from google.oauth2.credentials import Credentials
+
+    refreshes = []
+
+    def refresh(creds, request):
+        time.sleep(0.2)
+        refreshes.append(threading.get_ident())
+        creds.token = "refreshed-token"
+        creds.expiry = datetime.utcnow() + timedelta(hours=1)
+
+    creds = utils.get_credentials()
+    creds.expiry = datetime.utcnow() - timedelta(minutes=1)
+    original, Credentials.refresh = Credentials.refresh, refresh
+    try:
+        with ThreadPoolExecutor(threads) as pool:
+            tokens = set(pool.map(lambda _: utils.get_credentials().token, range(threads)))
+    finally:
+        Credentials.refresh = original
+    return len(refreshes), tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=60)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    write_token(utils.GOOGLE_TOKEN_PATH)
+    build_per_call(*APIS[0])  # Imports out of the measure
+
+    print(f"{'client':<40} {'ms per tool call':>17}")
+    print(f"{'token.json + build() per call':<40} {per_call_ms(build_per_call, args.calls):>17.2f}")
+    first = per_call_ms(utils.get_google_service, len(APIS))
+    print(f"{'shared credentials + registry (first)':<40} {first:>17.2f}")
+    print(f"{'shared credentials + registry (reused)':<40} {per_call_ms(utils.get_google_service, args.calls):>17.3f}")
+
+    refreshes, tokens = concurrent_refreshes(args.threads)
+    print(f"\n{args.threads} threads with an expired token: {refreshes} refresh, tokens seen {sorted(tokens)}")
+    print(utils.get_google_metrics())
+
+
+if __name__ == "__main__":
+    main()
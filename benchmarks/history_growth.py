@@ -0,0 +1,113 @@
+"""
+Prompt size and turn latency of the manager over a long conversation, with and without
+history summarization.
+
+The manager runs on a stand-in chat model (no API calls) that records the size of every
+prompt it receives, and checkpoints to a SQLite file like in production. Turn latency
+therefore covers the graph, the checkpointer and the history compaction, not the LLM.
+
+Usage:
+    python -m benchmarks.history_growth --turns 1000
+    python -m benchmarks.history_growth --turns 1000 --max-tokens 4000 --keep 10
+"""
+import os
+import random
+import sqlite3
+import argparse
+import tempfile
+import statistics
+import time
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.sqlite import SqliteSaver
+import src.agents.base.agent as agent_module
+import src.agents.base.history as history_module
+from src.agents.base import Agent, AgentsOrchestrator, HistoryManager
+
+WORDS = (
+    "meeting email calendar project client report invoice schedule deadline review team lunch "
+    "call budget design launch tomorrow friday notes draft proposal contract update reminder"
+).split()
+
+
+def sentence(words):
+    return " ".join(random.choice(WORDS) for _ in range(words))
+
+
+class PromptRecordingModel(FakeMessagesListChatModel):
+    """
+    Answers every prompt with a fixed size reply and records the size of the prompts.
+    """
+    prompt_sizes: list = []
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.prompt_sizes.append(sum(len(str(message.content)) // 4 + 4 for message in messages))
+        self.responses = [AIMessage(content=sentence(60))]
+        self.i = 0
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def run(turns, history):
+    model = PromptRecordingModel(responses=[AIMessage(content="")], prompt_sizes=[])
+    summarizer = FakeMessagesListChatModel(responses=[AIMessage(content=sentence(150))])
+    agent_module.get_model_chain = lambda *args, **kwargs: model
+    history_module.get_llm_by_provider = lambda model_string, *args, **kwargs: summarizer
+
+    db_path = os.path.join(tempfile.mkdtemp(), "checkpoints.sqlite")
+    manager = Agent(
+        name="manager_agent",
+        description="Manager agent",
+        model="openai/gpt-4o",
+        system_prompt="You are my personal assistant.",
+        tools=[],
+        sub_agents=[],
+        temperature=0.1,
+        memory=SqliteSaver(sqlite3.connect(db_path, check_same_thread=False))
+    )
+    orchestrator = AgentsOrchestrator(main_agent=manager, agents=[manager], history=history)
+    config = {"configurable": {"thread_id": "benchmark"}}
+
+    latencies = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        orchestrator.invoke(f"Message: {sentence(30)}\nCurrent Date/time: 2024-06-03 09:00", config=config)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return model.prompt_sizes, latencies
+
+
+def report(label, prompt_sizes, latencies, checkpoints):
+    print(f"\n{label}")
+    print(f"{'turns':>12} {'prompt tokens':>14} {'turn ms (p50)':>14}")
+    for upto in checkpoints:
+        window = slice(max(0, upto - 10), upto)
+        print(
+            f"{upto:>12} {statistics.mean(prompt_sizes[window]):>14.0f} "
+            f"{statistics.median(latencies[window]):>14.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=1000)
+    parser.add_argument("--max-tokens", type=int, default=4000, help="History budget of the summarized run")
+    parser.add_argument("--keep", type=int, default=10, help="Messages kept verbatim in the summarized run")
+    args = parser.parse_args()
+
+    random.seed(0)
+    checkpoints = sorted({10, 100, args.turns // 2, args.turns})
+    for label, history in (
+        ("Unbounded history", None),
+        (f"Summarized history (budget {args.max_tokens} tokens, last {args.keep} messages kept)",
+         HistoryManager("openai/gpt-4o", max_tokens=args.max_tokens, keep_messages=args.keep)),
+    ):
+        prompt_sizes, latencies = run(args.turns, history)
+        report(label, prompt_sizes, latencies, checkpoints)
+        if history:
+            print(f"{history.stats()['compactions']} compactions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+ReadEmails searches answered by the local mailbox mirror vs the Gmail API, against a local
+fake Gmail API answering every request after `--delay` seconds (the round trip to Google).
+
+Measured:
+- the cold start import of a `--messages` emails mailbox
+- an incremental sync after new emails arrive and others are deleted
+- date, sender and keyword searches on the mirror and on the API (same emails found; the
+  fake only matches keywords in the subject and snippet, Gmail also matches the bodies, so
+  ReadEmails sends keyword searches to the API)
+
+Usage:
+    python -m benchmarks.mailbox_mirror
+    python -m benchmarks.mailbox_mirror --messages 5000 --delay 0.03
+"""
+import os
+import time
+import argparse
+import tempfile
+from src.tools.email.read_emails import search_gmail
+from src.tools.email.mailbox_mirror import MailboxMirror
+from benchmarks.fake_gmail_api import FakeGmailAPI
+from unittest import mock
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=90, help="Days the emails are spread over")
+    parser.add_argument("--delay", type=float, default=0.03, help="Seconds the fake API takes to answer a request")
+    args = parser.parse_args()
+
+    api = FakeGmailAPI(args.messages, delay=args.delay, days=args.days).start()
+    mirror = MailboxMirror(
+        os.path.join(tempfile.mkdtemp(), "mailbox.sqlite"), days=args.days + 1, service_factory=api.service
+    )
+
+    imported, elapsed = timed(mirror.bulk_import)
+    print(f"Cold start import: {imported} emails in {elapsed / 1000:.1f} s, {api.requests} requests")
+
+    for i in range(args.messages, args.messages + 20):
+        api.add_message(i, subject=f"New email {i}")
+    for message_id in api.ids[-5:]:
+        api.delete_message(message_id)
+    api.reset_counters()
+    changes, elapsed = timed(mirror.sync)
+    print(f"Incremental sync: {changes} changes in {elapsed:.0f} ms, {api.requests} requests\n")
+
+    now = int(time.time())
+    searches = {
+        "last 7 days": dict(from_date=now - 7 * 86400, to_date=now + 60),
+        "from sender3, last 30 days": dict(from_date=now - 30 * 86400, to_date=now + 60, email="sender3@example.com"),
+        "'invoice', last 90 days": dict(from_date=now - 90 * 86400, to_date=now + 60, keywords="invoice"),
+    }
+    print(f"{'search':<28} {'API ms':>8} {'mirror ms':>10} {'emails':>7} {'same':>5}")
+    for name, search in searches.items():
+        with mock.patch("src.tools.email.read_emails.get_google_service", side_effect=lambda *_: api.service()):
+            (live, _, _), live_ms = timed(search_gmail, **search)
+        local, local_ms = timed(
+            mirror.search, search["from_date"], search["to_date"], search.get("email"), search.get("keywords")
+        )
+        same = [e["subject"] for e in live] == [e["subject"] for e in local]
+        print(f"{name:<28} {live_ms:>8.0f} {local_ms:>10.2f} {len(local):>7} {str(same):>5}")
+    api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Turn latency of a model chain (primary + fast fallback) when the primary is healthy, slow
+to produce its first token, or failing, against local stand-in chat models (no API calls).
+
+Scenarios:
+- healthy: the primary answers within the first token budget, the fallback is never called
+- slow: the primary takes 10x the budget to start answering, the fallback is hedged in,
+  then the primary's circuit opens and the fallback is called directly
+- failing: the primary raises, the chain fails over, then its circuit opens and the
+  fallback is called directly
+
+Usage:
+    python -m benchmarks.model_hedging
+    python -m benchmarks.model_hedging --calls 20 --budget 0.2 --async
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+import src.agents.base.model_chain as model_chain
+from src.agents.base import HedgedChatModel, get_model_chain_metrics
+
+
+class StandInChatModel(BaseChatModel):
+    """
+    Streams a fixed answer in a few chunks after `first_token_seconds`, or raises if `fail`.
+    """
+    answer: str = "Here is your answer."
+    first_token_seconds: float = 0.05
+    chunk_seconds: float = 0.01
+    fail: bool = False
+
+    @property
+    def _llm_type(self):
+        return "stand-in"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        chunks = list(self._stream(messages, stop, run_manager, **kwargs))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(c.text for c in chunks)))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.first_token_seconds)
+        if self.fail:
+            raise ConnectionError("503 Service Unavailable")
+        for word in self.answer.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            time.sleep(self.chunk_seconds)
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_seconds)
+        if self.fail:
+            raise ConnectionError("503 Service Unavailable")
+        for word in self.answer.split(" "):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            await asyncio.sleep(self.chunk_seconds)
+
+
+SCENARIOS = {
+    "healthy": {"first_token_seconds": 0.1},
+    "slow": {"first_token_seconds": None},  # 10x the budget
+    "failing": {"first_token_seconds": 0.05, "fail": True},
+}
+
+
+def run(scenario, calls, budget, use_async):
+    model_chain._circuit_breakers.clear()
+    settings = dict(SCENARIOS[scenario])
+    settings["first_token_seconds"] = settings["first_token_seconds"] or budget * 10
+    primary = StandInChatModel(answer="Answer from the primary model.", **settings)
+    fallback = StandInChatModel(answer="Answer from the fallback model.", first_token_seconds=0.03)
+    chain = HedgedChatModel(
+        models=[primary, fallback],
+        model_names=["openai/gpt-4o-mini", "groq/llama-3.3-70b-versatile"],
+        first_token_budget=budget
+    )
+
+    latencies, winners = [], {}
+    for _ in range(calls):
+        start = time.perf_counter()
+        message = asyncio.run(chain.ainvoke("Hi")) if use_async else chain.invoke("Hi")
+        latencies.append((time.perf_counter() - start) * 1000)
+        winner = "primary" if "primary" in message.content else "fallback"
+        winners[winner] = winners.get(winner, 0) + 1
+    return latencies, winners
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=0.2, help="First token budget, in seconds")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Call the chain with ainvoke")
+    args = parser.parse_args()
+
+    print(f"{'scenario':<10} {'p50 ms':>8} {'max ms':>8}  winners")
+    for scenario in SCENARIOS:
+        latencies, winners = run(scenario, args.calls, args.budget, args.use_async)
+        print(f"{scenario:<10} {statistics.median(latencies):>8.0f} {max(latencies):>8.0f}  {winners}")
+    print(f"\n{get_model_chain_metrics()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Time, HTTP requests and bytes downloaded by ReadEmails with 10, 100 and 1,000 matching
+emails, against a local fake Gmail API answering every request after `--delay` seconds
+(the round trip to Google).
+
+Compared:
+- one messages.list call, then one messages.get call per email in the full format (what
+  the tool did, only the first page of results)
+- the paginated search, with the headers and snippet fetched in batch requests of
+  GMAIL_BATCH_SIZE emails (format=metadata), up to READ_EMAILS_MAX_MESSAGES emails
+
+Usage:
+    python -m benchmarks.read_emails_batching
+    python -m benchmarks.read_emails_batching --messages 10 100 1000 --delay 0.03
+"""
+import sys
+import time
+import argparse
+from datetime import date, timedelta
+from unittest import mock
+from email.utils import parsedate_to_datetime
+from src.tools import output_compaction
+from src.tools.email import read_emails
+from benchmarks.fake_gmail_api import FakeGmailAPI
+
+# The package exports the tool under the module's name
+read_emails_module = sys.modules["src.tools.email.read_emails"]
+
+
+def read_emails_sequentially(service, query):
+    # The tool's previous implementation
+    results = service.users().messages().list(userId='me', q=query).execute()
+    email_list = []
+    for message in results.get('messages', []):
+        msg = service.users().messages().get(userId='me', id=message['id']).execute()
+        subject = next((header['value'] for header in msg['payload']['headers'] if header['name'] == 'Subject'), 'No Subject')
+        from_email = next((header['value'] for header in msg['payload']['headers'] if header['name'] == 'From'), 'Unknown Sender')
+        date = next((header['value'] for header in msg['payload']['headers'] if header['name'] == 'Date'), '')
+        parsedate_to_datetime(date)
+        email_list.append(f"From: {from_email}\nSubject: {subject}\nDate: {date}\nSnippet: {msg['snippet']}\n")
+    return "\n".join(email_list)
+
+
+def read_emails_batched(service, query):
+    # Every email is returned, compaction is measured by benchmarks.tool_output_compaction
+    with mock.patch.object(read_emails_module, "get_google_service", return_value=service), \
+            mock.patch.object(output_compaction, "TOOL_OUTPUT_MAX_TOKENS", 10**9):
+        return read_emails.invoke({
+            "from_date": (date.today() - timedelta(days=60)).isoformat(),
+            "to_date": (date.today() + timedelta(days=1)).isoformat(),
+            "email": None
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--delay", type=float, default=0.03, help="Seconds the fake API takes to answer a request")
+    args = parser.parse_args()
+
+    print(f"{'emails':>7} {'implementation':<22} {'seconds':>8} {'requests':>9} {'KB':>8} {'emails read':>12}")
+    for messages in args.messages:
+        api = FakeGmailAPI(messages, delay=args.delay).start()
+        for name, read in (("sequential, full", read_emails_sequentially), ("batched, metadata", read_emails_batched)):
+            service = api.service()
+            api.reset_counters()
+            start = time.perf_counter()
+            output = read(service, "after:0")
+            elapsed = time.perf_counter() - start
+            print(
+                f"{messages:>7} {name:<22} {elapsed:>8.2f} {api.requests:>9} {api.bytes_sent / 1024:>8.0f} "
+                f"{output.count('Subject: '):>12}"
+            )
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Offline evaluation of the intent router on a labelled message set.
+
+Each line of the set is {"message": ..., "route": <sub-agent name or "manager">}. For each
+threshold the script reports:
+- accuracy: share of messages sent where they are labelled
+- routed: share of messages bypassing the manager
+- misrouted: share of messages sent to a sub-agent they aren't labelled for (the costly mistake,
+  the manager would have handled them)
+- latency of one routing decision
+
+Usage:
+    python -m benchmarks.router_eval
+    python -m benchmarks.router_eval --thresholds 0.7 0.8 0.9 --verbose
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from src.agents.router import IntentRouter
+
+DATASET_PATH = os.path.join(os.path.dirname(__file__), "data", "router_messages.jsonl")
+
+
+def load_dataset(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(dataset, threshold, verbose=False):
+    router = IntentRouter(threshold=threshold)
+    correct = routed = misrouted = 0
+    latencies = []
+    for example in dataset:
+        start = time.perf_counter()
+        # Messages reach the assistant wrapped like in the channel runtime
+        route = router.route(f"Message: {example['message']}\nCurrent Date/time: 2024-06-03 09:00")
+        latencies.append((time.perf_counter() - start) * 1e6)
+
+        route = route or "manager"
+        correct += route == example["route"]
+        routed += route != "manager"
+        misrouted += route not in ("manager", example["route"])
+        if verbose and route != example["route"]:
+            print(f"  [{threshold}] expected {example['route']:>16}, got {route:>16}: {example['message']}")
+
+    latencies.sort()
+    return {
+        "threshold": threshold,
+        "accuracy": correct / len(dataset),
+        "routed": routed / len(dataset),
+        "misrouted": misrouted / len(dataset),
+        "p50_us": statistics.median(latencies),
+        "p99_us": latencies[max(0, int(len(latencies) * 0.99) - 1)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.5, 0.6, 0.7, 0.8, 0.9, 1.0])
+    parser.add_argument("--verbose", action="store_true", help="Print every wrong decision")
+    args = parser.parse_args()
+
+    dataset = load_dataset(args.dataset)
+    print(f"{len(dataset)} labelled messages")
+    for threshold in args.thresholds:
+        result = evaluate(dataset, threshold, args.verbose)
+        print(
+            f"threshold={result['threshold']:.2f} accuracy={result['accuracy']:.1%} "
+            f"routed={result['routed']:.1%} misrouted={result['misrouted']:.1%} "
+            f"p50={result['p50_us']:.1f}us p99={result['p99_us']:.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
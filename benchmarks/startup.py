@@ -0,0 +1,112 @@
+"""
+Cold start benchmark of the personal assistant.
+
+Each sample runs in a fresh interpreter and measures:
+- import: `import src.agents.personal_assistant`
+- construct: `PersonalAssistant(conn)` (what a webhook worker pays before serving)
+- first_compile: compiling the manager graph on first use
+- whatsapp_app: importing `app_whatsapp` end to end (imports + construction + FastAPI app)
+
+Results can be appended to benchmarks/results/startup.json with --record, so the
+numbers are tracked in the repo next to the code that produced them.
+
+Usage:
+    python -m benchmarks.startup --samples 5
+    python -m benchmarks.startup --samples 5 --record "lazy imports"
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+RESULTS_PATH = os.path.join(os.path.dirname(__file__), "results", "startup.json")
+
+ASSISTANT_PROBE = """
+import json, sqlite3, time
+t0 = time.perf_counter()
+from src.agents.personal_assistant import PersonalAssistant
+t1 = time.perf_counter()
+assistant = PersonalAssistant(sqlite3.connect(":memory:", check_same_thread=False))
+t2 = time.perf_counter()
+if assistant.manager_agent.agent is None:
+    assistant.manager_agent.initiat_agent()
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "construct": t2 - t1, "first_compile": t3 - t2}))
+"""
+
+WHATSAPP_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app_whatsapp
+print(json.dumps({"whatsapp_app": time.perf_counter() - t0}))
+"""
+
+
+def run_probe(code, data_dir):
+    # Placeholder keys: LLM clients validate that a key is set when they are built.
+    # The app's databases are created in `data_dir`, the ones in db/ are left alone
+    env = {
+        **os.environ,
+        "OPENAI_API_KEY": os.getenv("OPENAI_API_KEY", "benchmark"),
+        "CHECKPOINT_PATH": os.path.join(data_dir, "checkpoints.sqlite"),
+        "JOB_QUEUE_PATH": os.path.join(data_dir, "jobs.sqlite"),
+        "TELEMETRY_PATH": os.path.join(data_dir, "telemetry.jsonl"),
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def git_commit():
+    # "-dirty" when measured on uncommitted changes, which belong to the next commit
+    try:
+        return subprocess.run(
+            ["git", "describe", "--always", "--dirty", "--abbrev=7"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--record", metavar="LABEL", help="Append the medians to benchmarks/results/startup.json")
+    args = parser.parse_args()
+
+    samples = {}
+    for _ in range(args.samples):
+        for probe in (ASSISTANT_PROBE, WHATSAPP_PROBE):
+            for name, seconds in run_probe(probe, tempfile.mkdtemp()).items():
+                samples.setdefault(name, []).append(seconds)
+
+    medians = {name: round(statistics.median(values) * 1000, 1) for name, values in samples.items()}
+    for name, ms in medians.items():
+        print(f"{name:>14}: {ms:8.1f} ms (median of {args.samples})")
+
+    if args.record:
+        results = []
+        if os.path.exists(RESULTS_PATH):
+            with open(RESULTS_PATH) as f:
+                results = json.load(f)
+        results.append({
+            "label": args.record,
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
+            "python": platform.python_version(),
+            "samples": args.samples,
+            "median_ms": medians,
+        })
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Receive-to-dispatch latency of TelegramChannel against a local fake Bot API.
+
+Runs the legacy fixed-interval polling loop and the offset-based long polling
+loop side by side and reports how long each injected message waited before it
+was handed to the assistant.
+
+Usage:
+    python -m benchmarks.telegram_receive_latency --messages 20 --max-gap 2
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from benchmarks.fake_telegram_api import FakeTelegramAPI
+from src.channels.telegram import TelegramChannel, LONG_POLLING, POLLING
+
+
+def run_mode(mode, messages, max_gap, poll_interval):
+    api = FakeTelegramAPI().start()
+    offset_dir = tempfile.mkdtemp()
+    channel = TelegramChannel(
+        mode=mode,
+        poll_timeout=max(1, int(max_gap * 2)),
+        offset_path=os.path.join(offset_dir, "offset"),
+        base_url=api.base_url
+    )
+    dispatched = {}
+    stop = threading.Event()
+
+    # Mirrors the receive loops of the assistant, with the assistant call replaced by a timestamp
+    def consume():
+        after_timestamp = int(time.time())
+        while not stop.is_set():
+            new_messages = channel.receive_messages(after_timestamp)
+            if isinstance(new_messages, list):
+                for message in new_messages:
+                    dispatched.setdefault(message["message_id"], time.perf_counter())
+            if mode == LONG_POLLING:
+                continue
+            after_timestamp = int(time.time())
+            stop.wait(poll_interval)
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    time.sleep(0.5)
+
+    for i in range(messages):
+        api.push_message(f"benchmark message {i}")
+        time.sleep(random.uniform(0, max_gap))
+
+    # Give the slowest mode a full polling cycle to pick up the tail
+    time.sleep(poll_interval + 1)
+    stop.set()
+    api.stop()
+
+    latencies = [
+        (dispatched[update_id] - injected) * 1000
+        for update_id, injected in api.injected_at.items()
+        if update_id in dispatched
+    ]
+    return latencies, messages - len(latencies)
+
+
+def report(mode, latencies, dropped):
+    if not latencies:
+        print(f"{mode:>13}: no messages dispatched, dropped={dropped}")
+        return
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(
+        f"{mode:>13}: n={len(latencies)} dropped={dropped} "
+        f"p50={statistics.median(latencies):.1f}ms p95={p95:.1f}ms max={latencies[-1]:.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--max-gap", type=float, default=2.0, help="Max seconds between injected messages")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Sleep of the legacy polling loop")
+    parser.add_argument("--modes", nargs="+", default=[POLLING, LONG_POLLING])
+    args = parser.parse_args()
+
+    os.environ.setdefault("TELEGRAM_TOKEN", "123456:benchmark")
+    os.environ.setdefault("CHAT_ID", "1")
+    for mode in args.modes:
+        latencies, dropped = run_mode(mode, args.messages, args.max_gap, args.poll_interval)
+        report(mode, latencies, dropped)
+
+
+if __name__ == "__main__":
+    main()
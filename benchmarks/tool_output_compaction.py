@@ -0,0 +1,61 @@
+"""
+Size of large tool results before and after compaction, the time compaction takes, and
+whether the passage answering the request survives it.
+
+Each page is made of random filler paragraphs with one paragraph answering the request
+planted at a random position.
+
+Usage:
+    python -m benchmarks.tool_output_compaction
+    python -m benchmarks.tool_output_compaction --sizes 50 200 800 --max-tokens 3000
+"""
+import time
+import random
+import argparse
+from src.tools.output_compaction import compact, estimate_tokens
+
+FILLER = (
+    "the of and market company revenue growth product team customer data cloud service report year "
+    "platform users features release support integration analytics security partners roadmap"
+).split()
+
+REQUEST = "What does the Pro plan cost per month?"
+ANSWER = "Pricing: the Pro plan costs $49 per month, billed yearly. Enterprise plans are priced on request."
+
+
+def page(kilobytes):
+    paragraphs = []
+    while sum(len(paragraph) for paragraph in paragraphs) < kilobytes * 1024:
+        paragraphs.append(" ".join(random.choice(FILLER) for _ in range(random.randint(40, 160))))
+    paragraphs.insert(random.randrange(len(paragraphs)), ANSWER)
+    return "\n\n".join(paragraphs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 800], help="Page sizes, in KB")
+    parser.add_argument("--max-tokens", type=int, default=3000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f"{'page KB':>8} {'tokens in':>10} {'tokens out':>11} {'compact ms':>11} {'answer kept':>12}")
+    for size in args.sizes:
+        tokens_in = tokens_out = kept = 0
+        seconds = 0.0
+        for _ in range(args.runs):
+            text = page(size)
+            start = time.perf_counter()
+            result = compact(text, REQUEST, args.max_tokens)
+            seconds += time.perf_counter() - start
+            tokens_in += estimate_tokens(text)
+            tokens_out += estimate_tokens(result)
+            kept += ANSWER in result
+        print(
+            f"{size:>8} {tokens_in // args.runs:>10} {tokens_out // args.runs:>11} "
+            f"{seconds / args.runs * 1000:>11.1f} {f'{kept}/{args.runs}':>12}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Load test for the WhatsApp webhook.
+
+Fires concurrent webhook POSTs at app_whatsapp (served by uvicorn in-process, with a
+fake assistant that sleeps for a fixed turn time) and collects the replies on a local
+Twilio stand-in. Reports p50/p99 acknowledgement latency (webhook response time),
+completion latency (webhook POST until the reply reaches "Twilio") and shed requests.
+
+Usage:
+    python -m benchmarks.whatsapp_webhook_load --requests 200 --concurrency 50 --turn-seconds 0.5
+"""
+import argparse
+import asyncio
+import os
+import re
+import socket
+import tempfile
+import threading
+import time
+import httpx
+import uvicorn
+from benchmarks.fake_twilio_api import FakeTwilioAPI
+
+# app_whatsapp builds the real assistant on import, which only needs placeholder keys. Its
+# databases are created in a temporary directory, the ones in db/ are left alone
+os.environ.setdefault("OPENAI_API_KEY", "load-test")
+_data_dir = tempfile.mkdtemp()
+os.environ["CHECKPOINT_PATH"] = os.path.join(_data_dir, "checkpoints.sqlite")
+os.environ["JOB_QUEUE_PATH"] = os.path.join(_data_dir, "jobs.sqlite")
+os.environ["TELEMETRY_PATH"] = os.path.join(_data_dir, "telemetry.jsonl")
+
+from app_whatsapp import create_app  # noqa: E402
+from src.channels.whatsapp import WhatsAppChannel  # noqa: E402
+from src.runtime import JobQueue  # noqa: E402
+
+
+class FakeAssistant:
+    def __init__(self, turn_seconds):
+        self.turn_seconds = turn_seconds
+
+    def invoke(self, message, config=None):
+        time.sleep(self.turn_seconds)
+        return f"Echo: {message}"
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def fire(url, requests, concurrency, senders):
+    semaphore = asyncio.Semaphore(concurrency)
+    sent_at, acks, statuses = {}, [], {}
+
+    async with httpx.AsyncClient(timeout=60) as client:
+        async def post(i):
+            async with semaphore:
+                sent_at[i] = time.perf_counter()
+                response = await client.post(url, data={
+                    "Body": f"load-{i}",
+                    "From": f"whatsapp:+1555{i % senders:07d}",
+                    "MessageSid": f"SM{i:032d}"
+                })
+                acks.append((time.perf_counter() - sent_at[i]) * 1000)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        await asyncio.gather(*(post(i) for i in range(requests)))
+    return sent_at, acks, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--senders", type=int, default=50, help="Distinct WhatsApp numbers sending messages")
+    parser.add_argument("--turn-seconds", type=float, default=0.5, help="Simulated assistant turn duration")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--max-backlog", type=int, default=64)
+    args = parser.parse_args()
+
+    twilio = FakeTwilioAPI().start()
+    app = create_app(
+        FakeAssistant(args.turn_seconds),
+        WhatsAppChannel(base_url=twilio.base_url),
+        JobQueue(path=os.path.join(tempfile.mkdtemp(), "jobs.sqlite")),
+        max_workers=args.workers,
+        max_backlog=args.max_backlog
+    )
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=free_port(), log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    url = f"http://127.0.0.1:{server.config.port}/whatsapp/webhook"
+    sent_at, acks, statuses = asyncio.run(fire(url, args.requests, args.concurrency, args.senders))
+
+    # Wait for every accepted message to be answered
+    accepted = statuses.get(200, 0)
+    deadline = time.monotonic() + 60 + args.turn_seconds * args.requests
+    while len(twilio.messages) < accepted and time.monotonic() < deadline:
+        time.sleep(0.05)
+    server.should_exit = True
+    twilio.stop()
+
+    completions = []
+    for received_at, params in twilio.messages:
+        match = re.search(r"load-(\d+)", params.get("Body", ""))
+        if match:
+            completions.append((received_at - sent_at[int(match.group(1))]) * 1000)
+
+    print(f"requests={args.requests} concurrency={args.concurrency} workers={args.workers} max_backlog={args.max_backlog}")
+    print(f"status codes: {statuses}")
+    print(f"ack latency:        p50={percentile(acks, 50):.1f}ms p99={percentile(acks, 99):.1f}ms")
+    print(f"completion latency: p50={percentile(completions, 50):.1f}ms p99={percentile(completions, 99):.1f}ms "
+          f"(completed {len(completions)}/{accepted})")
+
+
+if __name__ == "__main__":
+    main()
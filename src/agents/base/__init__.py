@@ -1,4 +1,10 @@
 from .agent import Agent
 from .agents_orchestrator import AgentsOrchestrator
+from .delegation_cache import DelegationCache
+from .history import HistoryManager
+from .model_chain import CircuitBreaker, HedgedChatModel, get_model_chain, get_model_chain_metrics
 
-__all__ = ['Agent', 'AgentsOrchestrator']
+__all__ = [
+    'Agent', 'AgentsOrchestrator', 'DelegationCache', 'HistoryManager',
+    'CircuitBreaker', 'HedgedChatModel', 'get_model_chain', 'get_model_chain_metrics'
+]
@@ -1,6 +1,6 @@
+import threading
 from typing import List
-from langgraph.prebuilt import create_react_agent
-from src.utils import get_llm_by_provider
+from .model_chain import get_model_chain
 
 class Agent:
     def __init__(
@@ -12,7 +12,9 @@ class Agent:
         sub_agents: List['Agent'],  # List of sub-agents that the main agent can sned message to
         model: str,  # LLM model (in provider/model format e.g., "openai/gpt-4o", "gemini/gemini-1.5-flash")
         temperature: float,  # Temperature setting for the LLM (affects creativity/randomness),
-        memory=None # Agent memory storage (Optional)
+        memory=None, # Agent memory storage (Optional)
+        fallback_models: List[str] = None,  # Models tried, in order, when the model is slow or failing (Optional)
+        first_token_budget: float = None  # Seconds to wait for the first token before trying a fallback model
 
     ):
         self.name = name
@@ -24,28 +26,87 @@ class Agent:
         self.temperature = temperature
         self.agent = None 
         self.memory = memory
+        self.fallback_models = fallback_models or []
+        self.first_token_budget = first_token_budget
+        self._init_lock = threading.Lock()
 
-    def invoke(self, *args, **kwargs):
-        if not self.agent:
-            self.initiat_agent()
+    def invoke(self, input, config=None, **kwargs):
+        self._ensure_agent()
         
         print(f"--- Calling {self.name} ---")
-        response = self.agent.invoke(*args, **kwargs)
+        response = self.agent.invoke(input, self._with_request(input, config), **kwargs)
         return response
     
-    def stream(self, *args, **kwargs):
-        if not self.agent:
-            self.initiat_agent()
+    def stream(self, input, config=None, **kwargs):
+        self._ensure_agent()
         
         print(f"--- Calling {self.name} ---")
-        for chunk in self.agent.stream(*args, **kwargs):
+        for chunk in self.agent.stream(input, self._with_request(input, config), **kwargs):
             yield chunk
 
+    async def ainvoke(self, input, config=None, **kwargs):
+        self._ensure_agent()
+
+        print(f"--- Calling {self.name} ---")
+        response = await self.agent.ainvoke(input, self._with_request(input, config), **kwargs)
+        return response
+
+    async def astream(self, input, config=None, **kwargs):
+        self._ensure_agent()
+
+        print(f"--- Calling {self.name} ---")
+        async for chunk in self.agent.astream(input, self._with_request(input, config), **kwargs):
+            yield chunk
+
+    def _with_request(self, input, config):
+        # The request being worked on goes in the run metadata, where tools can read it (e.g. to keep the relevant part of large results)
+        messages = input.get("messages") if isinstance(input, dict) else None
+        if not messages:
+            return config
+        request = messages[-1][1] if isinstance(messages[-1], tuple) else getattr(messages[-1], "content", messages[-1])
+        config = dict(config or {})
+        config["metadata"] = {**(config.get("metadata") or {}), "agent_request": str(request)}
+        return config
+
+    @property
+    def models(self):
+        return [self.model, *self.fallback_models]
+
+    def _ensure_agent(self):
+        # The graph is compiled once, on first use, even when concurrent turns reach it together
+        if self.agent is None:
+            with self._init_lock:
+                if self.agent is None:
+                    self.initiat_agent()
+
+    def reset_agent(self):
+        """
+        Drops the compiled graph so the next call recompiles it (e.g. after adding tools).
+        """
+        with self._init_lock:
+            self.agent = None
+
     def initiat_agent(self):
-        llm = get_llm_by_provider(self.model, self.temperature)
+        # Imported here to keep importing the agents cheap, the graph is only built on first use
+        from langgraph.prebuilt import create_react_agent
+
+        llm = get_model_chain(self.models, self.temperature, self.first_token_budget)
         self.agent = create_react_agent(
             llm, 
             tools=self.tools, 
-            state_modifier=self.system_prompt,
+            state_modifier=self._system_message(),
             **({"checkpointer": self.memory} if self.memory else {"checkpointer": False}) # set to False to avoid "MULTIPLE_SUBGRAPHS" error
-        )
+        ).with_config({"run_name": self.name, "metadata": {"agent_name": self.name}})  # Names the agent's runs in callbacks and telemetry
+
+    def _system_message(self):
+        """
+        The system prompt is static (volatile data such as the date comes with each message), so
+        it is a stable prefix providers can cache. Anthropic only caches it when asked to.
+        """
+        from langchain_core.messages import SystemMessage
+
+        if self.model.startswith("anthropic/"):
+            return SystemMessage(content=[
+                {"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}
+            ])
+        return SystemMessage(content=self.system_prompt)
@@ -1,12 +1,26 @@
+import asyncio
+from typing import List, Optional
 from pydantic import Field, create_model
 from .agent import Agent
+from .delegation_cache import DelegationCache
+from .history import HistoryManager
 from src.tools.send_message import SendMessage
 
 class AgentsOrchestrator:
-    def __init__(self, main_agent: Agent, agents: list[Agent]):
+    def __init__(
+        self,
+        main_agent: Agent,
+        agents: list[Agent],
+        delegation_cache: DelegationCache = None,
+        router=None,
+        history: HistoryManager = None
+    ):
         self.main_agent = main_agent
         self.agents = agents
         self.agent_mapping = {}
+        self.delegation_cache = delegation_cache  # Shared by every SendMessage tool (None disables caching)
+        self.router = router  # Sends single-domain messages straight to a sub-agent (None disables routing)
+        self.history = history  # Keeps the main agent's conversation within a token budget (None keeps it all)
 
         # Set up the communication framework
         self._populate_agent_mapping()
@@ -14,13 +28,114 @@ class AgentsOrchestrator:
         
     def invoke(self, message, **kwargs):
         messages = {"messages": [("human", message)]}
-        response = self.main_agent.invoke(messages, **kwargs)
+        recipient = self._route(message, kwargs.get("config"))
+        if recipient:
+            response = recipient.invoke(messages)
+            self._record_writes(recipient, response["messages"])
+            self._record_routed_turn(message, response["messages"][-1].content, kwargs.get("config"))
+        else:
+            response = self.main_agent.invoke(messages, **kwargs)
+        self._compact_history(kwargs.get("config"))
         return response["messages"][-1].content
 
     def stream(self, message, **kwargs):
         messages = {"messages": [("human", message)]}
-        for chunk in self.main_agent.stream(messages, **kwargs):
-            yield chunk
+        recipient = self._route(message, kwargs.get("config"))
+        if recipient:
+            answer, streamed = None, []
+            # The sub-agent has no memory, the manager's checkpoint config isn't passed on
+            stream_kwargs = {key: value for key, value in kwargs.items() if key != "config"}
+            for chunk in recipient.stream(messages, **stream_kwargs):
+                answer = _final_answer(chunk) or answer
+                streamed += _chunk_messages(chunk)
+                yield chunk
+            self._record_writes(recipient, streamed)
+            self._record_routed_turn(message, answer, kwargs.get("config"))
+        else:
+            for chunk in self.main_agent.stream(messages, **kwargs):
+                yield chunk
+        self._compact_history(kwargs.get("config"))
+
+    async def ainvoke(self, message, **kwargs):
+        messages = {"messages": [("human", message)]}
+        # Reading and writing the manager's checkpoints is blocking sqlite work, kept off the event loop
+        recipient = await asyncio.to_thread(self._route, message, kwargs.get("config"))
+        if recipient:
+            response = await recipient.ainvoke(messages)
+            self._record_writes(recipient, response["messages"])
+            await asyncio.to_thread(
+                self._record_routed_turn, message, response["messages"][-1].content, kwargs.get("config")
+            )
+        else:
+            response = await self.main_agent.ainvoke(messages, **kwargs)
+        await asyncio.to_thread(self._compact_history, kwargs.get("config"))
+        return response["messages"][-1].content
+
+    async def astream(self, message, **kwargs):
+        messages = {"messages": [("human", message)]}
+        recipient = await asyncio.to_thread(self._route, message, kwargs.get("config"))
+        if recipient:
+            answer, streamed = None, []
+            stream_kwargs = {key: value for key, value in kwargs.items() if key != "config"}
+            async for chunk in recipient.astream(messages, **stream_kwargs):
+                answer = _final_answer(chunk) or answer
+                streamed += _chunk_messages(chunk)
+                yield chunk
+            self._record_writes(recipient, streamed)
+            await asyncio.to_thread(self._record_routed_turn, message, answer, kwargs.get("config"))
+        else:
+            async for chunk in self.main_agent.astream(messages, **kwargs):
+                yield chunk
+        await asyncio.to_thread(self._compact_history, kwargs.get("config"))
+
+    def _route(self, message, config=None):
+        """
+        Returns the sub-agent `message` can be sent to directly, or None when the manager should handle it.
+        """
+        if self.router is None:
+            return None
+
+        # Answers to a question of the manager ("Should I send it?") need the conversation, leave them to it
+        follow_up = False
+        if config and self.main_agent.memory:
+            self.main_agent._ensure_agent()
+            state = self.main_agent.agent.get_state(config)
+            history = state.values.get("messages", []) if state.values else []
+            follow_up = bool(state.next) or (bool(history) and str(history[-1].content).rstrip().endswith("?"))
+        return self.agent_mapping.get(self.router.route(message, follow_up=follow_up))
+
+    def _record_writes(self, recipient, messages):
+        """
+        Drops the cached delegation answers of a routed sub-agent that ran a write tool, as SendMessage does.
+        """
+        if self.delegation_cache is not None:
+            self.delegation_cache.record_writes(recipient.name, messages)
+
+    def _record_routed_turn(self, message, answer, config=None):
+        """
+        Adds a routed message and its answer to the manager's conversation, so it knows about them on the next turns.
+        """
+        if answer is None or not config or not self.main_agent.memory:
+            return
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        self.main_agent.agent.update_state(
+            config,
+            {"messages": [HumanMessage(content=message), AIMessage(content=answer)]},
+            as_node="agent"
+        )
+
+    def _compact_history(self, config=None):
+        """
+        Folds the old messages of the main agent's conversation into its summary once over budget.
+        """
+        if self.history is None or not config or not self.main_agent.memory:
+            return
+        try:
+            self.history.compact(self.main_agent.agent, config)
+        except Exception as e:
+            # The history is only compacted on a later turn, the answer is already there
+            print(f"Failed to compact the conversation history: {e}")
 
     def _populate_agent_mapping(self):
         """
@@ -40,16 +155,28 @@ class AgentsOrchestrator:
             if sub_agent.description
         )
 
+        # One delegation, used alone or as an item of a batch
+        DynamicDelegation = create_model(
+            f"{agent.name}Delegation",
+            recipient=(str, Field(..., description=recipients_description)),
+            message=(str, Field(..., description="Message to send to sub-agent.")),
+        )
+
         # Create a dynamic input schema
         DynamicSendMessageInput = create_model(
             f"{agent.name}SendMessageInput",
-            recipient=(str, Field(..., description=recipients_description)),
-            message=(str, Field(..., description="Message to send to sub-agent.")),
+            recipient=(Optional[str], Field(None, description=recipients_description)),
+            message=(Optional[str], Field(None, description="Message to send to sub-agent.")),
+            messages=(
+                Optional[List[DynamicDelegation]],
+                Field(None, description="Messages to send to several sub-agents at once, they work on them in parallel."),
+            ),
         )
 
         # Create the SendMessage tool instance
         send_message_tool = SendMessage(args_schema=DynamicSendMessageInput)
         send_message_tool.agent_mapping = self.agent_mapping  # Dynamically bind agent_mapping
+        send_message_tool.cache = self.delegation_cache
         return send_message_tool
 
     def _add_send_message_tool(self):
@@ -61,11 +188,34 @@ class AgentsOrchestrator:
                 send_message_tool = self._create_dynamic_send_message_tool(agent)
                 agent.tools.append(send_message_tool)
 
-                # Bind the new tool to the agent's LLM model
-                agent.initiat_agent()
+                # The new tool is bound to the agent's LLM when its graph is compiled on first use
+                agent.reset_agent()
 
     def get_agent(self, name: str) -> "Agent":
         """
         Retrieves an agent from the mapping by name.
         """
         return self.agent_mapping.get(name)
+
+
+def _chunk_messages(chunk):
+    # Messages of a stream chunk, for the "updates", "values" and "messages" stream modes
+    mode, data = chunk if isinstance(chunk, tuple) and len(chunk) == 2 and isinstance(chunk[0], str) else (None, chunk)
+    if mode == "messages":
+        return [data[0]]
+    if not isinstance(data, dict):
+        return []
+    if "messages" in data:
+        return list(data["messages"])
+    return [message for update in data.values() if isinstance(update, dict) for message in update.get("messages", [])]
+
+
+def _final_answer(chunk):
+    # Last message of the agent without tool calls, for the "updates" and "values" stream modes
+    mode, data = chunk if isinstance(chunk, tuple) and len(chunk) == 2 and isinstance(chunk[0], str) else (None, chunk)
+    if mode == "messages" or not isinstance(data, dict):
+        return None
+    messages = data["agent"]["messages"] if "agent" in data else data.get("messages", [])
+    if messages and not getattr(messages[-1], "tool_calls", None) and getattr(messages[-1], "type", None) == "ai":
+        return messages[-1].content
+    return None
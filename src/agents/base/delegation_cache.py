@@ -0,0 +1,147 @@
+import os
+import re
+import time
+import threading
+
+# Tools changing the data a sub-agent reads, running one drops that sub-agent's cached answers
+WRITE_TOOLS = {"AddEventToCalendar", "SendEmail", "AddTaskInTodoList", "SendSlackMessage"}
+
+# Words that don't change what is asked ("what's on my calendar" == "calendar")
+STOPWORDS = {
+    "a", "an", "the", "my", "me", "i", "you", "your", "is", "are", "was", "be", "do", "does", "have", "has",
+    "what", "which", "whats", "s", "on", "in", "at", "of", "for", "to", "and", "or", "any", "all", "there",
+    "please", "can", "could", "would", "tell", "show", "list", "get", "give", "retrieve", "fetch", "check",
+    "find", "look", "see", "summarize", "them", "it", "this", "that", "with", "about", "scheduled", "up",
+}
+
+# Words the sub-agents treat the same
+SYNONYMS = {
+    "meeting": "event", "calendar": "event", "appointment": "event", "call": "event", "agenda": "event",
+    "email": "mail", "inbox": "mail", "gmail": "mail", "message": "mail",
+    "task": "todo", "todos": "todo", "to-do": "todo",
+    "tonight": "today",
+}
+
+
+def normalize(text):
+    """
+    Returns the set of meaningful words of `text`: lowercased, without stopwords or plurals,
+    and with synonyms folded, so rephrasings of the same question give the same set.
+    """
+    words = set()
+    for word in re.findall(r"[\w@.+-]+", text.lower().replace("'s", "").replace("’s", "")):
+        word = word.strip(".-")
+        if not word or word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss") and "@" not in word:
+            word = word[:-1]
+        words.add(SYNONYMS.get(word, word))
+    return frozenset(words)
+
+
+def called_tools(messages):
+    """
+    Returns the names of the tools called in `messages`: by the agent (tool calls) or run (tool results).
+    """
+    names = set()
+    for message in messages:
+        names.update(tool_call["name"] for tool_call in getattr(message, "tool_calls", None) or [])
+        if getattr(message, "type", None) == "tool" and getattr(message, "name", None):
+            names.add(message.name)
+    return names
+
+
+def similarity(words, other_words):
+    if not words or not other_words:
+        return 0.0
+    # Numbers, dates and addresses must match exactly, "events on the 12th" is not "events on the 13th"
+    if {w for w in words if any(c.isdigit() or c == "@" for c in w)} != \
+            {w for w in other_words if any(c.isdigit() or c == "@" for c in w)}:
+        return 0.0
+    return len(words & other_words) / len(words | other_words)
+
+
+class DelegationCache:
+    """
+    Recent sub-agent answers, per recipient, served again when the manager re-asks a
+    near-identical question before `ttl` seconds. Sub-agents have no memory, so the same
+    question gets the same answer until the data behind it changes: a sub-agent running
+    one of `write_tools` drops its cached answers.
+    """
+
+    def __init__(self, ttl=None, threshold=None, max_entries=128, write_tools=WRITE_TOOLS):
+        self.ttl = ttl if ttl is not None else float(os.getenv("DELEGATION_CACHE_TTL", 300))
+        self.threshold = threshold if threshold is not None else float(os.getenv("DELEGATION_CACHE_THRESHOLD", 0.8))
+        self.max_entries = max_entries  # Per recipient
+        self.write_tools = set(write_tools)
+        self._entries = {}  # recipient -> [(words, answer, created, latency)], oldest first
+        self._invalidated_at = {}  # recipient -> time of the last write
+        self._lock = threading.RLock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "saved_seconds": 0.0}
+
+    def get(self, recipient, message):
+        """
+        Returns the cached answer of the most similar recent message sent to `recipient`, or None.
+        """
+        words = normalize(message)
+        now = time.monotonic()
+        with self._lock:
+            entries = [entry for entry in self._entries.get(recipient, []) if now - entry[2] < self.ttl]
+            self._entries[recipient] = entries
+            best, best_score = None, self.threshold
+            for entry in entries:
+                score = similarity(words, entry[0])
+                if score >= best_score:
+                    best, best_score = entry, score
+            if best is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+            self._stats["saved_seconds"] += best[3]
+            return best[1]
+
+    def record(self, recipient, message, messages, latency):
+        """
+        Stores the answer of a delegation (the last of the sub-agent's `messages`), unless the
+        sub-agent called a write tool, in which case its cached answers are dropped instead.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.record_writes(recipient, messages):
+                return
+            # A write that happened while this answer was generated may have made it stale
+            if self._invalidated_at.get(recipient, float("-inf")) > now - latency:
+                return
+            entries = self._entries.setdefault(recipient, [])
+            entries.append((normalize(message), messages[-1].content, now, latency))
+            del entries[:-self.max_entries]
+
+    def record_writes(self, recipient, messages):
+        """
+        Drops the cached answers of `recipient` if its `messages` ran one of the write tools.
+        Returns whether they did.
+        """
+        if called_tools(messages) & self.write_tools:
+            self.invalidate(recipient)
+            return True
+        return False
+
+    def invalidate(self, recipient=None):
+        """
+        Drops the cached answers of `recipient`, or of every recipient.
+        """
+        with self._lock:
+            now = time.monotonic()
+            for name in list(self._entries) if recipient is None else [recipient]:
+                self._entries.pop(name, None)
+                self._invalidated_at[name] = now
+            self._stats["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0,
+                "entries": sum(len(entries) for entries in self._entries.values()),
+            }
@@ -0,0 +1,128 @@
+import os
+import threading
+from collections import OrderedDict
+from src.utils import get_llm_by_provider
+
+SUMMARY_MESSAGE_PREFIX = "Summary of the earlier conversation:\n"
+
+SUMMARIZE_HISTORY_PROMPT = """
+You maintain the running summary of a conversation between a user and their personal assistant.
+Update the existing summary with the new messages below. Keep every fact that could matter later:
+names, email addresses, dates, decisions, pending tasks and the user's preferences. Drop greetings
+and tool output details. Write at most {max_words} words, as short bullet points.
+
+Existing summary:
+{summary}
+
+New messages:
+{messages}
+"""
+
+
+class HistoryManager:
+    """
+    Keeps an agent's checkpointed conversation within a token budget. Once the history is
+    over `max_tokens`, everything but the last `keep_messages` messages is folded into a
+    running summary, stored in the checkpoint as the first message of the conversation.
+    """
+
+    def __init__(self, model, max_tokens=None, keep_messages=None, summary_model=None, summary_max_tokens=None):
+        self.model = model  # Model of the agent, tokens are counted with its tokenizer
+        self.max_tokens = max_tokens or int(os.getenv("HISTORY_MAX_TOKENS", 6000))
+        self.keep_messages = keep_messages or int(os.getenv("HISTORY_KEEP_MESSAGES", 10))
+        self.summary_model = summary_model or os.getenv("HISTORY_SUMMARY_MODEL", "openai/gpt-4o-mini")
+        self.summary_max_tokens = summary_max_tokens or int(os.getenv("HISTORY_SUMMARY_MAX_TOKENS", 800))
+        self._token_counts = OrderedDict()  # message id -> tokens (only the summary is ever rewritten, its entry is dropped then)
+        self._estimate_tokens = False  # Set once the provider failed to count (e.g. tiktoken can't download its encoding)
+        self._lock = threading.Lock()
+        self._stats = {"compactions": 0, "folded_messages": 0}
+
+    def count_tokens(self, messages):
+        """
+        Returns the number of tokens of `messages` for the agent's provider (tiktoken for
+        OpenAI, the provider's counting method otherwise), or an estimate when the provider
+        can't count them.
+        """
+        total = 0
+        for message in messages:
+            with self._lock:
+                tokens = self._token_counts.get(message.id) if message.id else None
+            if tokens is None:
+                tokens = self._count_message_tokens(message)
+                if message.id:
+                    with self._lock:
+                        self._token_counts[message.id] = tokens
+                        while len(self._token_counts) > 10000:
+                            self._token_counts.popitem(last=False)
+            total += tokens
+        return total
+
+    def _count_message_tokens(self, message):
+        if not self._estimate_tokens:
+            try:
+                return get_llm_by_provider(self.model).get_num_tokens_from_messages([message])
+            except Exception as e:
+                print(f"Can't count tokens with {self.model}, estimating them instead: {e}")
+                self._estimate_tokens = True
+        # ~4 characters per token for English text, plus the message framing
+        return len(str(message.content)) // 4 + len(str(getattr(message, "tool_calls", "") or "")) // 4 + 4
+
+    def compact(self, graph, config):
+        """
+        Folds the old messages of the `config` thread of `graph` into its summary when the
+        history is over budget. Returns True if the history was compacted.
+        """
+        state = graph.get_state(config)
+        messages = state.values.get("messages", []) if state.values else []
+        if state.next or len(messages) <= self.keep_messages or self.count_tokens(messages) <= self.max_tokens:
+            return False
+
+        cut = self._cut_index(messages)
+        if cut is None:
+            return False
+
+        has_summary = _is_summary(messages[0])
+        summary = messages[0].content[len(SUMMARY_MESSAGE_PREFIX):] if has_summary else ""
+        folded = messages[1 if has_summary else 0:cut]
+        if not folded:
+            return False
+        summary = self._summarize(summary, folded)
+
+        from langchain_core.messages import RemoveMessage, SystemMessage
+
+        # The summary replaces the first message in place (same id), so it stays first in the conversation
+        update = [SystemMessage(content=SUMMARY_MESSAGE_PREFIX + summary, id=messages[0].id)]
+        update += [RemoveMessage(id=message.id) for message in messages[1:cut]]
+        graph.update_state(config, {"messages": update}, as_node="agent")
+        with self._lock:
+            self._token_counts.pop(messages[0].id, None)
+            self._stats["compactions"] += 1
+            self._stats["folded_messages"] += len(folded)
+        return True
+
+    def _cut_index(self, messages):
+        # Keep at least `keep_messages` messages, starting on a user message so tool calls stay with their results
+        for index in range(len(messages) - self.keep_messages, 0, -1):
+            if messages[index].type == "human":
+                return index
+        return None
+
+    def _summarize(self, summary, messages):
+        transcript = "\n".join(
+            f"{message.type}: {message.content}" for message in messages if message.content
+        )
+        prompt = SUMMARIZE_HISTORY_PROMPT.format(
+            max_words=int(self.summary_max_tokens * 0.75),
+            summary=summary or "(none)",
+            messages=transcript
+        )
+        llm = get_llm_by_provider(self.summary_model)
+        return llm.bind(max_tokens=self.summary_max_tokens).invoke(prompt).content
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+
+def _is_summary(message):
+    return message.type == "system" and str(message.content).startswith(SUMMARY_MESSAGE_PREFIX)
@@ -0,0 +1,364 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+import contextvars
+from typing import Any, List
+from langchain_core.callbacks import AsyncCallbackManager, CallbackManager
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessageChunk, message_chunk_to_message
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langgraph.constants import TAG_NOSTREAM
+from src.utils import extract_provider_and_model, get_llm_by_provider
+
+# Set in the response metadata of a token chunk telling the stream consumer to drop the text streamed so far
+STREAM_RESET = "stream_reset"
+
+_circuit_breakers = {}  # provider -> CircuitBreaker
+_chain_metrics = {"calls": 0, "hedged": 0, "failovers": 0, "failed": 0, "wins": {}}
+_lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a provider after `failure_threshold` errors in a row. Once
+    `reset_seconds` have passed, one request is let through again: it closes the circuit if
+    it succeeds, and keeps it open for another `reset_seconds` if it fails.
+    """
+
+    def __init__(self, failure_threshold=None, reset_seconds=None):
+        self.failure_threshold = failure_threshold or int(os.getenv("CIRCUIT_BREAKER_FAILURES", 3))
+        self.reset_seconds = reset_seconds or float(os.getenv("CIRCUIT_BREAKER_RESET_SECONDS", 30))
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_seconds:
+                self.opened_at = time.monotonic()  # Let this request through, hold the others back until it ends
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+
+def get_circuit_breaker(provider):
+    with _lock:
+        if provider not in _circuit_breakers:
+            _circuit_breakers[provider] = CircuitBreaker()
+        return _circuit_breakers[provider]
+
+
+class HedgedChatModel(BaseChatModel):
+    """
+    Chat model answering with the first of a chain of models (primary first) to give a good
+    answer. The primary is streamed; if no attempt has produced a token `first_token_budget`
+    seconds after the last one started, or if an attempt fails, the next model of the chain
+    is tried alongside it. The losing attempts are cancelled. Models whose provider circuit
+    is open are skipped.
+
+    Tokens are streamed to the callbacks while a single attempt runs. While two run, their
+    tokens are held back and only the winner's are sent, so a streamed answer doesn't mix the
+    texts of two models. If the streamed attempt fails midway, the next model's tokens are
+    preceded by an empty chunk with `STREAM_RESET` in its response metadata: the consumer
+    drops the text streamed so far.
+
+    A primary that hasn't produced a token within the budget and loses counts as a failure
+    of its provider's circuit, so a stalled provider gets its circuit opened too.
+    """
+
+    models: List[Any]  # Chat models, possibly with tools bound, in the order they are tried
+    model_names: List[str]  # "provider/model" of each model
+    first_token_budget: float = 3.0  # Seconds
+
+    @property
+    def _llm_type(self):
+        return "hedged"
+
+    def _get_ls_params(self, stop=None, **kwargs):
+        provider, model = extract_provider_and_model(self.model_names[0])
+        return {"ls_provider": provider, "ls_model_name": model, "ls_model_type": "chat"}
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"models": [model.bind_tools(tools, **kwargs) for model in self.models]})
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        config = {"callbacks": _child_callbacks(run_manager, CallbackManager)} if run_manager else {}
+        events = queue.Queue()
+        cancelled = threading.Event()
+        tracker = _AttemptTracker(self.models, self.model_names)
+
+        def send_tokens(pieces):
+            for piece in pieces if run_manager else []:
+                chunk = ChatGenerationChunk(message=piece)
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+        def attempt(index):
+            model, name = tracker.candidates[index]
+            try:
+                chunk = None
+                for piece in model.stream(messages, stop=stop, config=config, **kwargs):
+                    if cancelled.is_set():
+                        return
+                    events.put(("token", index, piece))
+                    chunk = piece if chunk is None else chunk + piece
+                events.put(("done", index, _checked_message(chunk, name)))
+            except Exception as e:
+                events.put(("error", index, e))
+
+        def submit(index):
+            # One thread per attempt rather than a shared pool: a cancelled attempt keeps its thread until its
+            # next token, and attempts hung on a stalled provider would fill a pool and hold back the hedges.
+            # Once the stalled provider's circuit opens, only its half-open probes start new ones
+            if index is not None:
+                # The context is copied so the attempt stays nested in the current trace
+                context = contextvars.copy_context()
+                threading.Thread(
+                    target=context.run, args=(attempt, index), name="model-chain-attempt", daemon=True
+                ).start()
+
+        try:
+            submit(tracker.start())
+            while True:
+                try:
+                    kind, index, value = events.get(timeout=tracker.budget(self.first_token_budget))
+                except queue.Empty:
+                    submit(tracker.start(hedge=True))
+                    continue
+                if kind == "token":
+                    send_tokens(tracker.hold(index, value))
+                    continue
+                result = tracker.handle(kind, index, value)
+                if result is not None:
+                    send_tokens(tracker.flush(index))
+                    return result
+                if tracker.should_fail_over():
+                    submit(tracker.start())
+        finally:
+            cancelled.set()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        config = {"callbacks": _child_callbacks(run_manager, AsyncCallbackManager)} if run_manager else {}
+        events = asyncio.Queue()
+        tracker = _AttemptTracker(self.models, self.model_names)
+        tasks = []
+
+        async def send_tokens(pieces):
+            for piece in pieces if run_manager else []:
+                chunk = ChatGenerationChunk(message=piece)
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+
+        async def attempt(index):
+            model, name = tracker.candidates[index]
+            try:
+                chunk = None
+                async for piece in model.astream(messages, stop=stop, config=config, **kwargs):
+                    events.put_nowait(("token", index, piece))
+                    chunk = piece if chunk is None else chunk + piece
+                events.put_nowait(("done", index, _checked_message(chunk, name)))
+            except Exception as e:
+                events.put_nowait(("error", index, e))
+
+        try:
+            tasks.append(asyncio.create_task(attempt(tracker.start())))
+            while True:
+                try:
+                    kind, index, value = await asyncio.wait_for(events.get(), tracker.budget(self.first_token_budget))
+                except asyncio.TimeoutError:
+                    index = tracker.start(hedge=True)
+                    if index is not None:
+                        tasks.append(asyncio.create_task(attempt(index)))
+                    continue
+                if kind == "token":
+                    await send_tokens(tracker.hold(index, value))
+                    continue
+                result = tracker.handle(kind, index, value)
+                if result is not None:
+                    await send_tokens(tracker.flush(index))
+                    return result
+                if tracker.should_fail_over():
+                    tasks.append(asyncio.create_task(attempt(tracker.start())))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class _AttemptTracker:
+    """
+    State of one hedged call: which models were started, which produced a token, which failed.
+    """
+
+    def __init__(self, models, model_names):
+        self.candidates = list(zip(models, model_names))
+        self.position = 0  # Next model of the chain to consider
+        self.forced = False  # Every provider was down, the circuits are ignored
+        self.exhausted = False  # No model is left to start
+        self.started = 0
+        self.running = set()  # Attempts started and not finished
+        self.streaming = set()  # Running attempts that produced their first token
+        self.slow = set()  # Attempts without a token when the budget ran out
+        self.held = {}  # Attempt -> tokens not sent to the callbacks yet
+        self.live = None  # Attempt whose tokens are sent to the callbacks as they come
+        self.reset = False  # The live attempt failed, the stream restarts with the next one
+        self.errors = []
+        with _lock:
+            _chain_metrics["calls"] += 1
+
+    def _next_index(self):
+        # A circuit is only asked when its model is about to be tried, so the single request of
+        # a half-open circuit isn't used up by a call that never reaches it
+        while self.position < len(self.candidates):
+            index = self.position
+            self.position += 1
+            name = self.candidates[index][1]
+            if self.forced or get_circuit_breaker(extract_provider_and_model(name)[0]).allow():
+                return index
+        if not self.started and not self.forced:
+            # Every provider is down, better to try the whole chain than to give up
+            self.forced, self.position = True, 0
+            return self._next_index()
+        return None
+
+    def start(self, hedge=False):
+        """
+        Returns the index of the next model to try, or None if no model is left. Raises the
+        last error when no model is left and none is running anymore.
+        """
+        if hedge:
+            self.slow.update(self.running - self.streaming)
+        index = self._next_index()
+        if index is None:
+            self.exhausted = True
+            if not self.running:
+                with _lock:
+                    _chain_metrics["failed"] += 1
+                raise self.errors[-1]
+            return None
+        if self.started:
+            with _lock:
+                _chain_metrics["hedged" if hedge else "failovers"] += 1
+            print(f"{'Hedging' if hedge else 'Failing over'} to {self.candidates[index][1]}")
+        self.started += 1
+        self.running.add(index)
+        return index
+
+    def budget(self, first_token_budget):
+        # Wait for a first token for `first_token_budget`, or for good once an attempt is streaming or no model is left
+        if self.streaming or self.exhausted:
+            return None
+        return first_token_budget
+
+    def hold(self, index, piece):
+        """
+        Records a token of an attempt. Returns the tokens to send to the callbacks now: none
+        while another attempt runs, the winner's are sent once it is known.
+        """
+        self.streaming.add(index)
+        self.held.setdefault(index, []).append(piece)
+        if len(self.running) == 1 or index == self.live:
+            self.live = index
+            return self.flush(index)
+        return []
+
+    def flush(self, index):
+        """
+        Returns the held tokens of attempt `index`, after a reset chunk if a streamed attempt failed before.
+        """
+        pieces = self.held.pop(index, [])
+        if self.reset and pieces:
+            self.reset = False
+            pieces.insert(0, AIMessageChunk(content="", response_metadata={STREAM_RESET: True}))
+        return pieces
+
+    def handle(self, kind, index, value):
+        """
+        Returns the ChatResult when `value` is the winning answer.
+        """
+        name = self.candidates[index][1]
+        breaker = get_circuit_breaker(extract_provider_and_model(name)[0])
+        self.running.discard(index)
+        self.streaming.discard(index)
+        if kind == "done":
+            breaker.record_success()
+            with _lock:
+                _chain_metrics["wins"][name] = _chain_metrics["wins"].get(name, 0) + 1
+            # The attempts that missed the budget and lost are cancelled, they count as failures
+            for slow_index in self.slow & self.running:
+                slow_name = self.candidates[slow_index][1]
+                print(f"Model {slow_name} lost to {name} after missing its first token budget")
+                get_circuit_breaker(extract_provider_and_model(slow_name)[0]).record_failure()
+            return ChatResult(generations=[ChatGeneration(message=value)])
+
+        print(f"Model {name} failed: {value}")
+        breaker.record_failure()
+        self.errors.append(value)
+        if index == self.live:
+            self.live, self.reset = None, True
+        self.held.pop(index, None)
+        return None
+
+    def should_fail_over(self):
+        # An attempt just failed: start the next model right away unless another one is already answering
+        return not self.running
+
+
+def _child_callbacks(run_manager, manager_class):
+    # The models of the chain report to the callbacks (tracing, telemetry) as children of the chain's run.
+    # Their tokens aren't streamed by LangGraph, the chain sends those of the attempt it streams itself
+    manager = manager_class(handlers=[], parent_run_id=run_manager.run_id)
+    manager.set_handlers(run_manager.inheritable_handlers)
+    manager.add_tags(run_manager.inheritable_tags + [TAG_NOSTREAM])
+    manager.add_metadata(run_manager.inheritable_metadata)
+    return manager
+
+
+def _checked_message(chunk, name):
+    message = message_chunk_to_message(chunk) if chunk is not None else None
+    if message is None or not (message.content or getattr(message, "tool_calls", None)):
+        raise ValueError(f"{name} returned an empty answer")
+    return message
+
+
+def get_model_chain(model_strings, temperature=0.1, first_token_budget=None):
+    """
+    Returns the chat model of the first of `model_strings`, hedged with the next ones if any.
+    """
+    if len(model_strings) == 1:
+        return get_llm_by_provider(model_strings[0], temperature)
+    return HedgedChatModel(
+        models=[get_llm_by_provider(model_string, temperature) for model_string in model_strings],
+        model_names=list(model_strings),
+        first_token_budget=first_token_budget or float(os.getenv("FIRST_TOKEN_BUDGET", 3))
+    )
+
+
+def get_model_chain_metrics():
+    """
+    Returns the number of hedged calls, hedges and failovers, the wins of each model and
+    the circuit state of each provider.
+    """
+    with _lock:
+        metrics = {**_chain_metrics, "wins": dict(_chain_metrics["wins"])}
+        breakers = dict(_circuit_breakers)
+    metrics["circuits"] = {provider: breaker.state for provider, breaker in breakers.items()}
+    return metrics
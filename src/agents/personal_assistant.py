@@ -1,67 +1,78 @@
+import os
 from langgraph.checkpoint.sqlite import SqliteSaver
-from src.agents.base import Agent, AgentsOrchestrator
+from src.agents.base import Agent, AgentsOrchestrator, DelegationCache, HistoryManager
+from src.agents.router import IntentRouter
 from src.prompts import *
 from src.tools.calendar import *
 from src.tools.email import *
 from src.tools.notion import *
 from src.tools.slack import *
 from src.tools.research import *
-from src.utils import get_current_date_time
+from src.tools.output_compaction import fetch_more_output
+from src.utils import prewarm_llm_clients
 
 class PersonalAssistant:
-    def __init__(self, db_connection):
-        # Create sqlite checkpointer for managing manager memory
-        self.checkpointer = SqliteSaver(db_connection)
+    def __init__(self, db_connection=None, checkpointer=None):
+        # Create sqlite checkpointer for managing manager memory (or use the given one, e.g. a PooledSqliteSaver)
+        self.checkpointer = checkpointer or SqliteSaver(db_connection)
+
+        # Fast models tried when an agent's model is slow to answer or failing, e.g. "groq/llama-3.3-70b-versatile"
+        fallback_models = [model for model in os.getenv("FALLBACK_MODELS", "").split(",") if model.strip()]
         
         # Initialize individual agents
         self.email_agent = Agent(
             name="email_agent",
             description="Email agent can manage GMAIL inbox including read and send emails",
             model="openai/gpt-4o-mini",
-            system_prompt=EMAIL_AGENT_PROMPT.format(date_time=get_current_date_time()),
-            tools=[read_emails, send_email, find_contact_email],
+            system_prompt=EMAIL_AGENT_PROMPT,
+            tools=[read_emails, send_email, find_contact_email, fetch_more_output],
             sub_agents=[],
-            temperature=0.1
+            temperature=0.1,
+            fallback_models=fallback_models
         )
 
         self.calendar_agent = Agent(
             name="calendar_agent",
-            description="Calendar agent can manage Google Calendar including get events and create events",
+            description="Calendar agent can manage Google Calendar including get events, find free slots and create events",
             model="openai/gpt-4o-mini",
-            system_prompt=CALENDAR_AGENT_PROMPT.format(date_time=get_current_date_time()),
-            tools=[get_calendar_events, add_event_to_calendar, find_contact_email],
+            system_prompt=CALENDAR_AGENT_PROMPT,
+            tools=[get_calendar_events, find_free_slots, add_event_to_calendar, find_contact_email],
             sub_agents=[],
-            temperature=0.1
+            temperature=0.1,
+            fallback_models=fallback_models
         )
 
         self.notion_agent = Agent(
             name="notion_agent",
             description="Notion agent can manage Notion including get my todo list and add task in todo list",
             model="openai/gpt-4o-mini",
-            system_prompt=NOTION_AGENT_PROMPT.format(date_time=get_current_date_time()),
+            system_prompt=NOTION_AGENT_PROMPT,
             tools=[get_my_todo_list, add_task_in_todo_list],
             sub_agents=[],
-            temperature=0.1
+            temperature=0.1,
+            fallback_models=fallback_models
         )
 
         self.slack_agent = Agent(
             name="slack_agent",
             description="Slack agent can read and send messages through Slack",
             model="openai/gpt-4o-mini",
-            system_prompt=SLACK_AGENT_PROMPT.format(date_time=get_current_date_time()),
-            tools=[get_slack_messages, send_slack_message],
+            system_prompt=SLACK_AGENT_PROMPT,
+            tools=[get_slack_messages, send_slack_message, fetch_more_output],
             sub_agents=[],
-            temperature=0.1
+            temperature=0.1,
+            fallback_models=fallback_models
         )
 
         self.researcher_agent = Agent(
             name="researcher_agent",
             description="Researcher agent can search the web, scrape websites or LinkedIn profiles",
             model="openai/gpt-4o-mini",
-            system_prompt=RESEARCHER_AGENT_PROMPT.format(date_time=get_current_date_time()),
-            tools=[search_web, scrape_website_to_markdown, search_linkedin_tool],
+            system_prompt=RESEARCHER_AGENT_PROMPT,
+            tools=[search_web, scrape_website_to_markdown, search_linkedin_tool, fetch_more_output],
             sub_agents=[],
-            temperature=0.1
+            temperature=0.1,
+            fallback_models=fallback_models
         )
 
         # Initialize the manager agent
@@ -69,7 +80,7 @@ class PersonalAssistant:
             name="manager_agent",
             description="Manager agent",
             model="openai/gpt-4o",
-            system_prompt=ASSISTANT_MANAGER_PROMPT.format(date_time=get_current_date_time()),
+            system_prompt=ASSISTANT_MANAGER_PROMPT,
             tools=[],
             sub_agents=[
                 self.email_agent,
@@ -79,7 +90,9 @@ class PersonalAssistant:
                 self.researcher_agent
             ],
             temperature=0.1,
-            memory=self.checkpointer # only manager has memory feature
+            memory=self.checkpointer, # only manager has memory feature
+            fallback_models=fallback_models,
+            first_token_budget=float(os.getenv("MANAGER_FIRST_TOKEN_BUDGET", 5))  # gpt-4o is slower to start than the sub-agents' model
         )
 
         # Initialize the orchestrator
@@ -92,8 +105,22 @@ class PersonalAssistant:
                 self.notion_agent,
                 self.slack_agent,
                 self.researcher_agent
-            ]
+            ],
+            # Reuse sub-agent answers to repeated questions for a few minutes (DELEGATION_CACHE=false to disable)
+            delegation_cache=DelegationCache() if os.getenv("DELEGATION_CACHE", "true").lower() == "true" else None,
+            # Send clearly single-domain messages straight to their sub-agent (ROUTE_MESSAGES=false to disable)
+            router=IntentRouter() if os.getenv("ROUTE_MESSAGES", "true").lower() == "true" else None,
+            # Fold old messages into a running summary so the manager's prompt stops growing with the conversation
+            history=HistoryManager(self.manager_agent.model)
         )
 
+    def warm_up(self):
+        """
+        Compiles every agent graph and opens the LLM provider connections ahead of the first message.
+        """
+        prewarm_llm_clients([model for agent in self.assistant_orchestrator.agents for model in agent.models])
+        for agent in self.assistant_orchestrator.agents:
+            agent._ensure_agent()
+
     def __getattr__(self, name):
         return getattr(self.assistant_orchestrator, name)
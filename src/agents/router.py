@@ -0,0 +1,89 @@
+import os
+import re
+import threading
+
+# Keywords (and their weight) hinting that a message is for one sub-agent only
+DEFAULT_ROUTES = {
+    "calendar_agent": {
+        "calendar": 2, "meeting": 2, "event": 2, "appointment": 2, "agenda": 2, "availability": 2,
+        "reschedule": 2, "schedule": 1.5, "scheduled": 1.5, "busy": 2, "free": 1.5, "available": 1,
+    },
+    "email_agent": {
+        "email": 2, "mail": 2, "inbox": 2, "gmail": 2, "unread": 0.5, "reply": 1, "subject": 1,
+        "newsletter": 1, "contact": 1,
+    },
+    "notion_agent": {
+        "todo": 2.5, "to-do": 2.5, "task": 2, "notion": 2.5, "checklist": 1.5,
+    },
+    "slack_agent": {
+        "slack": 2.5, "channel": 2, "dm": 1.5, "mention": 1, "workspace": 1,
+    },
+    "researcher_agent": {
+        "linkedin": 2.5, "search": 2, "google": 2, "web": 1.5, "website": 2, "research": 2,
+        "scrape": 2, "news": 2, "article": 1, "profile": 1, "http": 2, "https": 2,
+    },
+}
+
+# Words announcing several steps ("cancel the meeting then email Emily"), left to the manager
+MULTI_STEP_MARKERS = {"then", "after", "afterwards", "also", "before", "both"}
+
+
+def _words(text):
+    text = re.sub(r"\bto do\b", "todo", text.lower())
+    for word in re.findall(r"[a-z][a-z-]*", text):
+        # Naive singular, enough for keywords ("meetings" -> "meeting", "tasks" -> "task")
+        yield word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+
+
+class IntentRouter:
+    """
+    Keyword classifier picking the sub-agent a message is clearly meant for, so single-domain
+    requests skip the manager's round-trips. Messages matching several domains, announcing
+    several steps or matching nothing get no route (None) and go to the manager.
+    """
+
+    def __init__(self, routes=None, threshold=None, max_words=60):
+        self.routes = routes or DEFAULT_ROUTES
+        # Minimum confidence (0 to 1) to bypass the manager, 1.01 disables routing
+        self.threshold = threshold if threshold is not None else float(os.getenv("ROUTER_THRESHOLD", 0.8))
+        self.max_words = max_words  # Longer messages are rarely a single simple request
+        self._lock = threading.Lock()
+        self._stats = {"routed": 0, "to_manager": 0}
+
+    def classify(self, text):
+        """
+        Returns the best matching sub-agent name and the confidence of the match.
+        """
+        words = list(_words(text))
+        scores = {
+            agent: sum(keywords.get(word, 0) for word in words)
+            for agent, keywords in self.routes.items()
+        }
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (best, top), second = ranked[0], ranked[1][1] if len(ranked) > 1 else 0
+        if top == 0:
+            return None, 0.0
+
+        # Share of the evidence pointing at the best agent, discounted when the evidence is thin
+        confidence = top / (top + second) * min(1.0, top / 2)
+        if MULTI_STEP_MARKERS.intersection(words):
+            confidence *= 0.5
+        if len(words) > self.max_words:
+            confidence *= 0.5
+        return best, confidence
+
+    def route(self, text, follow_up=False):
+        """
+        Returns the sub-agent to send `text` to directly, or None to go through the manager.
+        `follow_up` messages answer a question of the manager and always go back to it.
+        """
+        agent, confidence = self.classify(text)
+        routed = agent if confidence >= self.threshold and not follow_up else None
+        with self._lock:
+            self._stats["routed" if routed else "to_manager"] += 1
+        return routed
+
+    def stats(self):
+        with self._lock:
+            total = self._stats["routed"] + self._stats["to_manager"]
+            return {**self._stats, "routed_ratio": self._stats["routed"] / total if total else 0.0}
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+
+
+class Channel:
+    """
+    Common async interface of the communication channels.
+
+    Channels are driven from one asyncio loop (see `src.runtime.ChannelRuntime`):
+    `receive()` streams incoming messages, `send()` and `edit()` deliver answers.
+    Each channel keeps one pooled HTTP client for its provider, created in `start()`.
+
+    Assistant turns run on worker threads, so every channel also exposes blocking
+    wrappers (`send_message`, `create_message`, `edit_message`) that schedule the async
+    methods on the channel's loop. Used outside a runtime, the channel starts its own
+    loop in a background thread on first use.
+    """
+    name = None  # Channel name used as job queue channel
+    edit_interval = 1.0  # Minimum seconds between two edits of a message
+    max_message_length = 4096
+    supports_edit = True  # Whether answers can be streamed by editing a message
+
+    def __init__(self):
+        self.loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
+
+    async def start(self):
+        """
+        Binds the channel to the running loop and opens its HTTP client.
+        """
+        self.loop = asyncio.get_running_loop()
+
+    async def close(self):
+        """
+        Releases the channel's HTTP client.
+        """
+
+    async def receive(self):
+        """
+        Yields incoming messages as dicts with `text`, `date`, `chat_id` and `message_id`
+        (the provider's unique message id). Webhook based channels don't poll and yield nothing.
+        """
+        return
+        yield
+
+    async def send(self, text, chat_id=None, markdown=True):
+        """
+        Sends a message and returns its provider message id, or None on failure.
+        """
+        raise NotImplementedError
+
+    async def edit(self, message_id, text, chat_id=None, markdown=False):
+        """
+        Replaces the text of a message sent by `send`.
+        """
+        raise NotImplementedError
+
+    def _run(self, coroutine):
+        with self._loop_lock:
+            if self.loop is None:
+                self._start_background_loop()
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def _start_background_loop(self):
+        loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=loop.run_forever, name=f"{self.name}-loop", daemon=True)
+        self._loop_thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(), loop).result()
+
+    def shutdown(self):
+        """
+        Closes the channel and stops its background loop, if it started one.
+        """
+        if self._loop_thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.close(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._loop_thread.join()
+        self.loop, self._loop_thread = None, None
+
+    def send_message(self, text, chat_id=None):
+        if self._run(self.send(text, chat_id=chat_id)) is None:
+            return f"Failed to send message on {self.name}"
+        return f"Message sent successfully on {self.name}"
+
+    def create_message(self, text, chat_id=None):
+        """
+        Sends a plain text message and returns its id, so it can be edited later.
+        """
+        return self._run(self.send(text, chat_id=chat_id, markdown=False))
+
+    def edit_message(self, message_id, text, chat_id=None, markdown=False):
+        return self._run(self.edit(message_id, text, chat_id=chat_id, markdown=markdown))
@@ -1,46 +1,141 @@
 import os
-import requests
+import time
+import asyncio
+import httpx
 from datetime import datetime
+from .base import Channel
 
-class SlackChannel():
-    def __init__(self):
+
+class SlackChannel(Channel):
+    name = "slack"
+    edit_interval = 1.5  # chat.update is rate limited to ~50/min
+    max_message_length = 40000
+
+    def __init__(self, poll_interval=2.0, base_url="https://slack.com/api/", cursor_path=None):
+        super().__init__()
         self.token = os.getenv("SLACK_BOT_TOKEN")
         self.channel_id = os.getenv("SLACK_CHANNEL_ID")
+        self.poll_interval = poll_interval  # Seconds between two conversations.history calls
+        self.base_url = base_url
+        # File where the ts of the last received message is persisted between restarts
+        self.cursor_path = cursor_path or os.getenv("SLACK_CURSOR_PATH", "db/slack_cursor")
+        self.client = None
+        self.last_ts = self._load_cursor()
+
+    @staticmethod
+    def is_configured():
+        return bool(os.getenv("SLACK_BOT_TOKEN") and os.getenv("SLACK_CHANNEL_ID"))
+
+    async def start(self):
+        await super().start()
+        # One keep-alive connection pool for every Slack Web API call
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {self.token}"},
+            timeout=30
+        )
+
+    async def close(self):
+        # Confirm the last received messages
+        self._save_cursor()
+        if self.client:
+            await self.client.aclose()
+
+    async def _call(self, method, **payload):
+        response = await self.client.post(method, json=payload)
+        return response.json()
+
+    async def receive(self):
+        """
+        Polls the channel for the messages after the last received one.
 
-    def send_message(self, text):
-        url = "https://slack.com/api/chat.postMessage"
-        headers = {
-            "Authorization": f"Bearer {self.token}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "channel": self.channel_id,
-            "text": text
-        }
-        response = requests.post(url, json=payload, headers=headers).json()
+        The ts of the last message is persisted before each poll, once the previous batch
+        was handed over, so after a restart the channel resumes where it stopped instead
+        of dropping the messages sent while it was down. Without a stored ts (first run),
+        only the messages sent from now on are received.
+        """
+        if self.last_ts is None:
+            self.last_ts = f"{time.time():.6f}"
+        while True:
+            self._save_cursor()
+            new_messages = await self._fetch_messages(float(self.last_ts))
+            if isinstance(new_messages, str):
+                print(new_messages)
+                await asyncio.sleep(5)  # Back off before polling again
+                continue
+            for message in new_messages:
+                yield message
+                # Only once handed over, so a message whose handling failed is fetched again
+                if float(message["message_id"]) > float(self.last_ts):
+                    self.last_ts = message["message_id"]
+            await asyncio.sleep(self.poll_interval)
+
+    async def send(self, text, chat_id=None, markdown=True):
+        response = await self._call("chat.postMessage", channel=chat_id or self.channel_id, text=text)
+        if not response.get("ok"):
+            print(f"Failed to send message: {response.get('error')}")
+            return None
+        return response["ts"]
+
+    async def edit(self, message_id, text, chat_id=None, markdown=False):
+        """
+        Slack always renders mrkdwn, so `markdown` has no effect.
+        """
+        response = await self._call("chat.update", channel=chat_id or self.channel_id, ts=message_id, text=text)
         if not response.get("ok"):
+            return f"Failed to edit message: {response.get('error')}"
+        return "Message edited successfully on Slack"
+
+    def send_message(self, text, chat_id=None):
+        if self._run(self.send(text, chat_id=chat_id)) is None:
             return "Failed to send message"
         return "Message sent successfully on Slack"
 
     def receive_messages(self, after_timestamp):
-        url = "https://slack.com/api/conversations.history"
-        headers = {
-            "Authorization": f"Bearer {self.token}"
-        }
-        params = {
-            "channel": self.channel_id,
-            "oldest": after_timestamp
-        }
-        response = requests.get(url, headers=headers, params=params).json()
+        return self._run(self._fetch_messages(after_timestamp))
+
+    async def _fetch_messages(self, after_timestamp):
+        try:
+            response = await self.client.get(
+                "conversations.history",
+                params={"channel": self.channel_id, "oldest": after_timestamp}
+            )
+            response = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            return f"Failed to retrieve messages: {str(e)}"
         if not response.get("ok"):
-            return []
+            return f"Failed to retrieve messages: {response.get('error')}"
 
         new_messages = []
-        for message in response.get("messages", []):
+        # Slack returns the newest messages first
+        for message in reversed(response.get("messages", [])):
+            # Skip the assistant's own answers and channel events (joins, edits...)
+            if message.get("bot_id") or message.get("subtype"):
+                continue
             if float(message["ts"]) > after_timestamp:
                 new_messages.append({
                     "text": message["text"],
-                    "date": datetime.fromtimestamp(float(message["ts"])).strftime("%Y-%m-%d %H:%M")
+                    "date": datetime.fromtimestamp(float(message["ts"])).strftime("%Y-%m-%d %H:%M"),
+                    "chat_id": self.channel_id,
+                    "message_id": message["ts"],
                 })
 
-        return new_messages
\ No newline at end of file
+        return new_messages
+
+    def _load_cursor(self):
+        try:
+            with open(self.cursor_path) as f:
+                ts = f.read().strip()
+            float(ts)
+            return ts
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save_cursor(self):
+        if self.last_ts is None:
+            return
+        # Write to a temporary file first so a crash never leaves a truncated ts behind
+        tmp_path = f"{self.cursor_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.last_ts)
+        os.replace(tmp_path, self.cursor_path)
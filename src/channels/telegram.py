@@ -1,39 +1,204 @@
 import os
+import time
 import asyncio
 from telegram import Bot, Update
 from telegram.constants import ParseMode
 from telegram.error import TelegramError
+from .base import Channel
 
+LONG_POLLING = "long_polling"
+POLLING = "polling"
 
-class TelegramChannel:
-    def __init__(self):
+
+class TelegramChannel(Channel):
+    name = "telegram"
+    edit_interval = 1.0  # Telegram allows ~1 edit/s per chat
+    max_message_length = 4096
+
+    def __init__(
+        self,
+        mode=None,  # "long_polling" (default) or the legacy "polling" mode
+        poll_timeout=30,  # Seconds Telegram holds a getUpdates call open when there is nothing new
+        poll_interval=5.0,  # Seconds between two getUpdates calls in the "polling" mode
+        offset_path=None,  # File where the next update offset is persisted between restarts
+        base_url=None  # Bot API base URL (e.g. a local fake Bot API for benchmarks)
+    ):
+        super().__init__()
         self.token = os.getenv("TELEGRAM_TOKEN")
         self.chat_id = os.getenv("CHAT_ID")
-        self.bot = Bot(token=self.token)
+        self.mode = mode or os.getenv("TELEGRAM_RECEIVE_MODE", LONG_POLLING)
+        self.poll_timeout = poll_timeout
+        self.poll_interval = poll_interval
+        self.offset_path = offset_path or os.getenv("TELEGRAM_OFFSET_PATH", "db/telegram_offset")
+        self.base_url = base_url
+        self.bot = None
+        self.offset = self._load_offset()
+
+    @staticmethod
+    def is_configured():
+        return bool(os.getenv("TELEGRAM_TOKEN"))
+
+    async def start(self):
+        await super().start()
+        # The bot keeps pooled HTTP clients (one for getUpdates, one for the other calls) bound to this loop
+        self.bot = Bot(token=self.token, **({"base_url": self.base_url} if self.base_url else {}))
+        await self.bot.initialize()
+
+    async def close(self):
+        # Confirm the last received updates
+        self._save_offset()
+        if self.bot:
+            await self.bot.shutdown()
+
+    async def receive(self):
+        """
+        Long polls Telegram, or with the "polling" mode fetches the recent updates every
+        `poll_interval` seconds. The offset only moves past a message once it was handed
+        over, so a message whose handling failed is fetched again.
+        """
+        if self.mode == POLLING:
+            async for message in self._receive_polling():
+                yield message
+            return
+        while True:
+            polled = await self._poll_updates()
+            if isinstance(polled, str):
+                print(polled)
+                await asyncio.sleep(5)  # Back off before polling again
+                continue
+            new_messages, next_offset = polled
+            for message in new_messages:
+                yield message
+                self.offset = max(self.offset or 0, message["message_id"] + 1)
+            # Updates without a message for the assistant are confirmed too
+            if next_offset is not None:
+                self.offset = max(self.offset or 0, next_offset)
+
+    async def _receive_polling(self):
+        after_timestamp = time.time()
+        while True:
+            updates = await self._recent_updates(after_timestamp)
+            if isinstance(updates, str):
+                print(updates)
+            else:
+                for update in updates:
+                    yield self._format_message(update)
+                    after_timestamp = max(after_timestamp, update.message.date.timestamp())
+            await asyncio.sleep(self.poll_interval)
 
-    def send_message(self, text):
+    async def send(self, text, chat_id=None, markdown=True):
         try:
-            loop = asyncio.get_event_loop()
-            loop.run_until_complete(
-                self.bot.send_message(chat_id=self.chat_id, text=text, parse_mode=ParseMode.MARKDOWN)
+            message = await self.bot.send_message(
+                chat_id=chat_id or self.chat_id,
+                text=text,
+                **({"parse_mode": ParseMode.MARKDOWN} if markdown else {})
             )
-            return "Message sent successfully on Telegram"
+            return message.message_id
         except TelegramError as e:
-            return f"Failed to send message: {str(e)}"
+            if markdown:
+                # The answer isn't always valid Markdown, fall back to plain text
+                return await self.send(text, chat_id, markdown=False)
+            print(f"Failed to send message: {str(e)}")
+            return None
 
-    def receive_messages(self, after_timestamp):
+    async def edit(self, message_id, text, chat_id=None, markdown=False):
+        """
+        Partial answers are sent as plain text since unfinished Markdown fails to parse.
+        """
         try:
-            loop = asyncio.get_event_loop()
-            updates = loop.run_until_complete(self.bot.get_updates())
-            new_messages = []
-            for update in updates:
-                if isinstance(update, Update) and update.message:
-                    message = update.message
-                    if message.date.timestamp() > after_timestamp:
-                        new_messages.append({
-                            "text": message.text,
-                            "date": message.date.strftime("%Y-%m-%d %H:%M"),
-                        })
+            await self.bot.edit_message_text(
+                text=text,
+                chat_id=chat_id or self.chat_id,
+                message_id=message_id,
+                **({"parse_mode": ParseMode.MARKDOWN} if markdown else {})
+            )
+            return "Message edited successfully on Telegram"
+        except TelegramError as e:
+            if markdown:
+                return await self.edit(message_id, text, chat_id)
+            return f"Failed to edit message: {str(e)}"
+
+    def send_message(self, text, chat_id=None):
+        if self._run(self.send(text, chat_id=chat_id)) is None:
+            return "Failed to send message on Telegram"
+        return "Message sent successfully on Telegram"
+
+    def receive_messages(self, after_timestamp=None):
+        if self.mode == LONG_POLLING:
+            polled = self._run(self._poll_updates())
+            if isinstance(polled, str):
+                return polled
+            new_messages, next_offset = polled
+            if next_offset is not None:
+                self.offset = max(self.offset or 0, next_offset)
             return new_messages
+        updates = self._run(self._recent_updates(after_timestamp))
+        if isinstance(updates, str):
+            return updates
+        return [self._format_message(update) for update in updates]
+
+    async def _recent_updates(self, after_timestamp):
+        # The legacy polling mode: every update Telegram still holds, those sent after `after_timestamp` are new
+        try:
+            updates = await self.bot.get_updates()
+            return [
+                update for update in updates
+                if isinstance(update, Update) and update.message and update.message.text
+                and update.message.date.timestamp() > after_timestamp and self._is_owner(update)
+            ]
         except TelegramError as e:
             return f"Failed to retrieve messages: {str(e)}"
+
+    async def _poll_updates(self):
+        """
+        Blocks until new updates arrive (or `poll_timeout` expires) and returns the messages
+        after the stored offset, with the offset following them.
+
+        The offset is persisted right before it is sent to Telegram: sending it is what
+        confirms the previous batch, so after a restart the channel resumes exactly where
+        Telegram does, without replaying handled updates or dropping unhandled ones.
+        """
+        try:
+            self._save_offset()
+            updates = await self.bot.get_updates(
+                offset=self.offset, timeout=self.poll_timeout, allowed_updates=["message"]
+            )
+            new_messages, next_offset = [], self.offset
+            for update in updates:
+                next_offset = max(next_offset or 0, update.update_id + 1)
+                if isinstance(update, Update) and update.message and update.message.text:
+                    # Only the owner's chat talks to the assistant
+                    if not self._is_owner(update):
+                        continue
+                    new_messages.append(self._format_message(update))
+            return new_messages, next_offset
+        except TelegramError as e:
+            return f"Failed to retrieve messages: {str(e)}"
+
+    def _is_owner(self, update):
+        return not self.chat_id or str(update.message.chat_id) == str(self.chat_id)
+
+    def _format_message(self, update):
+        message = update.message
+        return {
+            "text": message.text,
+            "date": message.date.strftime("%Y-%m-%d %H:%M"),
+            "chat_id": message.chat_id,
+            "message_id": update.update_id,
+        }
+
+    def _load_offset(self):
+        try:
+            with open(self.offset_path) as f:
+                return int(f.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save_offset(self):
+        if self.offset is None:
+            return
+        # Write to a temporary file first so a crash never leaves a truncated offset behind
+        tmp_path = f"{self.offset_path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(str(self.offset))
+        os.replace(tmp_path, self.offset_path)
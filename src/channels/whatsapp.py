@@ -1,33 +1,86 @@
 import os
+import uuid
+import asyncio
+from fastapi import APIRouter, Form, Response
 from twilio.rest import Client
+from .base import Channel
+from src.utils import get_current_date_time
 
 
-class WhatsAppChannel:
-    def __init__(self):
+class WhatsAppChannel(Channel):
+    name = "whatsapp"
+    max_message_length = 1600
+    supports_edit = False  # WhatsApp messages can't be edited, answers are sent once complete
+
+    def __init__(self, base_url=None):
         """
-        Initializes the WhatsAppChannel with Twilio client.
+        Initializes the WhatsAppChannel with one Twilio client, whose HTTP session is reused for every message.
+        `base_url` overrides the Twilio REST API URL (e.g. a local stand-in for load tests).
         """
+        super().__init__()
         self.client = Client(os.getenv("TWILIO_ACCOUNT_SID"), os.getenv("TWILIO_AUTH_TOKEN"))
+        if base_url:
+            self.client.api.base_url = base_url
 
-    def send_message(self, to_number, body):
-        """
-        Sends a WhatsApp message.
-        """
+    @staticmethod
+    def is_configured():
+        return bool(os.getenv("TWILIO_ACCOUNT_SID"))
+
+    async def send(self, text, chat_id=None, markdown=True):
+        # The Twilio client is synchronous, keep it off the event loop
+        return await asyncio.to_thread(self._send_with_twilio, chat_id, text)
+
+    def _send_with_twilio(self, to_number, body):
         try:
             message = self.client.messages.create(
                 body=body,
                 from_=os.getenv('FROM_WHATSAPP_NUMBER'),  # Should be your Twilio WhatsApp number with 'whatsapp:' prefix
                 to=to_number # Ensure to prefix the number with 'whatsapp:'
             )
-            return f"Message sent successfully with SID: {message.sid}"
+            return message.sid
         except Exception as e:
-            return f"Failed to send message: {e}"
+            print(f"Failed to send message: {e}")
+            return None
 
-    def receive_messages(self):
+    def webhook_router(self, job_queue, max_backlog=32, accepting=lambda: True):
         """
-        Receiving messages is handled via webhooks.
-
-        This method is not implemented because incoming WhatsApp messages are typically received through a webhook configured in the Twilio account. 
-        The webhook sends an HTTP request to our server when a message is received.
+        Receiving messages is handled via webhooks: Twilio sends an HTTP request to our server
+        when a message is received. The returned router stores each message in `job_queue`
+        and answers 503 once `max_backlog` messages are waiting or when `accepting()` is False.
         """
-        pass 
\ No newline at end of file
+        router = APIRouter()
+
+        @router.post("/whatsapp/webhook")
+        async def whatsapp_webhook(Body: str = Form(...), From: str = Form(...), MessageSid: str = Form(None)):
+            """
+            Webhook endpoint that handles incoming messages from WhatsApp.
+            Stores the message in the job queue and returns without waiting for the answer.
+            """
+            incoming_message = Body
+            from_number = From
+            print(f"Message received from {from_number}: {incoming_message}")
+
+            # Shed load once the backlog is full so Twilio retries later instead of piling up turns
+            backlog = await asyncio.to_thread(job_queue.backlog, self.name)
+            if not accepting() or backlog >= max_backlog:
+                return Response("Server busy, retry later", status_code=503, headers={"Retry-After": "30"})
+
+            # Twilio retries reuse the MessageSid, so they are stored (and answered) only once
+            message_id = MessageSid or uuid.uuid4().hex
+            await asyncio.to_thread(
+                job_queue.enqueue,
+                self.name,
+                message_id,
+                from_number,
+                {
+                    "text": incoming_message,
+                    "date": get_current_date_time(),
+                    "chat_id": from_number,
+                    "message_id": message_id
+                }
+            )
+
+            # Respond with a status indicating that the message was received
+            return "Message received", 200
+
+        return router
@@ -0,0 +1,5 @@
+from .saver import PooledSqliteSaver
+from .serializer import ZstdSerializer
+from .retention import CheckpointRetention, checkpoint_time, database_size
+
+__all__ = ['PooledSqliteSaver', 'ZstdSerializer', 'CheckpointRetention', 'checkpoint_time', 'database_size']
@@ -0,0 +1,94 @@
+"""
+Prunes the checkpoint database and reports its size and checkpoint load time before and after.
+
+Usage:
+    python -m src.checkpoint --keep-last 20
+    python -m src.checkpoint --keep-last 20 --max-age-days 90 --dry-run
+    python -m src.checkpoint --full-vacuum
+    python -m src.checkpoint --train-dictionary
+"""
+import os
+import sqlite3
+import argparse
+from .retention import CheckpointRetention
+from .serializer import ZstdSerializer
+
+
+def print_stats(label, stats):
+    load = f"{stats['load_ms_p50']:.2f} ms (max {stats['load_ms_max']:.2f} ms)" if stats["load_ms_p50"] is not None else "-"
+    print(
+        f"{label:<7} {stats['size_bytes'] / 1e6:>9.1f} MB  {stats['checkpoints']:>9} checkpoints  "
+        f"{stats['writes']:>9} writes  {stats['threads']:>6} threads  load {load}"
+    )
+
+
+def train_dictionary(path, serde, samples):
+    """
+    Trains the checkpoint compression dictionary on the most recent checkpoints and writes of the database.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT type, checkpoint FROM checkpoints ORDER BY checkpoint_id DESC LIMIT ?", (samples,)
+        ).fetchall()
+        rows += conn.execute(
+            "SELECT type, value FROM writes ORDER BY checkpoint_id DESC LIMIT ?", (samples,)
+        ).fetchall()
+    finally:
+        conn.close()
+    payloads = [serde.raw_payload(type_, data) for type_, data in rows if type_ and data]
+    if len(payloads) < 100:
+        print(f"Only {len(payloads)} checkpoints and writes in {path}, not enough to train a dictionary")
+        return
+    dict_id = serde.train_dictionary(payloads)
+    print(f"Trained dictionary {dict_id} on {len(payloads)} payloads, saved in {serde.dictionary_dir}")
+    print(f"Keep {serde.dictionary_dir} with {path} (backups included), its checkpoints can't be read without it")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=os.getenv("CHECKPOINT_PATH", "db/checkpoints.sqlite"))
+    parser.add_argument("--keep-last", type=int, default=None, help="Checkpoints kept per conversation")
+    parser.add_argument("--max-age-days", type=float, default=None, help="Drop checkpoints older than this")
+    parser.add_argument("--keep-writes", action="store_true", help="Keep the pending writes of older checkpoints")
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would be deleted")
+    parser.add_argument(
+        "--full-vacuum", action="store_true",
+        help="Rewrite the database once to enable incremental vacuum (blocks the apps' writes meanwhile)"
+    )
+    parser.add_argument(
+        "--train-dictionary", type=int, nargs="?", const=2000, default=None, metavar="SAMPLES",
+        help="Train the zstd dictionary new checkpoints are compressed with (restart the apps to use it)"
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"No checkpoint database at {args.path}")
+        return
+
+    serde = ZstdSerializer()  # Also reads checkpoints stored uncompressed
+    if args.train_dictionary:
+        train_dictionary(args.path, serde, args.train_dictionary)
+        return
+
+    retention = CheckpointRetention(
+        args.path, keep_last=args.keep_last, max_age_days=args.max_age_days, compact_writes=not args.keep_writes,
+        serde=serde
+    )
+    if args.dry_run:
+        delete, compact = retention.plan()
+        print_stats("current", retention.stats())
+        print(f"Would delete {len(delete)} checkpoints and the writes of {len(delete) + len(compact)} checkpoints")
+        return
+
+    report = retention.run(vacuum=not args.full_vacuum)
+    if args.full_vacuum:
+        retention.vacuum(full=True)
+        report["after"] = retention.stats()
+    print_stats("before", report["before"])
+    print_stats("after", report["after"])
+    print(f"Deleted {report['deleted_checkpoints']} checkpoints and {report['deleted_writes']} writes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+import threading
+import statistics
+from contextlib import contextmanager
+
+# Offset between the UUID epoch (1582-10-15) and the Unix epoch, in 100 ns intervals
+_UUID_EPOCH_OFFSET = 0x01B21DD213814000
+
+# Databases already told to run --full-vacuum by this process
+_vacuum_notices = set()
+
+
+def checkpoint_time(checkpoint_id):
+    """
+    Returns the Unix time a checkpoint was created at, read from its uuid6 id, or None for
+    ids that aren't uuid6.
+    """
+    try:
+        value = uuid.UUID(checkpoint_id)
+    except (ValueError, TypeError):
+        return None
+    if value.version != 6:
+        return None
+    timestamp = ((value.int >> 80) << 12) | ((value.int >> 64) & 0x0FFF)
+    return (timestamp - _UUID_EPOCH_OFFSET) / 1e7
+
+
+def database_size(path):
+    """
+    Returns the size in bytes of the database file and its WAL and shared memory files.
+    """
+    return sum(os.path.getsize(path + suffix) for suffix in ("", "-wal", "-shm") if os.path.exists(path + suffix))
+
+
+class CheckpointRetention:
+    """
+    Prunes the checkpoint database: keeps the last `keep_last` checkpoints of each thread
+    and drops the ones older than `max_age_days` (whole conversations when their latest
+    checkpoint is that old). With `compact_writes`, the pending writes of checkpoints that
+    have a newer one are dropped too, they are only needed to resume the latest.
+
+    Rows are deleted and free pages vacuumed in small batches, each one a short write
+    transaction, so live turns only ever wait for one batch; the checkpoints to delete are
+    found on a separate read connection, without the writer lock. Pass the app's `saver` to
+    share its writer connection and lock, otherwise pass the `serde` the checkpoints were
+    written with.
+    """
+
+    def __init__(
+        self,
+        path,
+        keep_last=None,
+        max_age_days=None,
+        compact_writes=True,
+        batch_size=500,  # Rows deleted per transaction
+        vacuum_pages=256,  # Pages released per incremental vacuum step
+        saver=None,
+        serde=None
+    ):
+        self.path = path
+        self.keep_last = keep_last
+        self.max_age_days = max_age_days
+        self.compact_writes = compact_writes
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.saver = saver
+        self._read_conn = None
+        if saver is None:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+
+            # Own connection, checkpoints are loaded (to time them) through a SqliteSaver sharing it
+            self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self.lock = threading.Lock()
+            self._loader = SqliteSaver(self.conn, serde=serde)
+            self._loader.lock = self.lock
+        (saver or self._loader).setup()
+
+    @classmethod
+    def from_env(cls, saver):
+        max_age_days = os.getenv("CHECKPOINT_MAX_AGE_DAYS")
+        return cls(
+            saver.path,
+            keep_last=int(os.getenv("CHECKPOINT_KEEP_LAST", 20)),
+            max_age_days=float(max_age_days) if max_age_days else None,
+            saver=saver
+        )
+
+    @contextmanager
+    def _write(self):
+        lock, conn = (self.saver.lock, self.saver.conn) if self.saver else (self.lock, self.conn)
+        with lock:
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    @contextmanager
+    def _read(self):
+        """
+        Lends a read-only connection of its own, in a read transaction: with WAL, long scans
+        neither take the writer lock nor block the turns' writes.
+        """
+        if self.path == ":memory:":
+            # An in-memory database only exists on the writer connection
+            with self._write() as conn:
+                yield conn
+            return
+        if self._read_conn is None:
+            self._read_conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            self._read_conn.execute("PRAGMA query_only=ON")
+        self._read_conn.execute("BEGIN")
+        try:
+            yield self._read_conn
+        finally:
+            self._read_conn.execute("COMMIT")
+
+    def plan(self):
+        """
+        Returns the (thread_id, checkpoint_ns, checkpoint_id) keys of the checkpoints to delete,
+        and of the kept checkpoints whose writes can be dropped.
+        """
+        cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days is not None else None
+        delete, compact = [], []
+        position, previous = 0, None
+        with self._read() as conn:
+            rows = conn.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id FROM checkpoints "
+                "ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+            )
+            for key in rows:
+                position = position + 1 if key[:2] == previous else 0
+                previous = key[:2]
+                created = checkpoint_time(key[2])
+                if (self.keep_last is not None and position >= self.keep_last) or \
+                        (cutoff is not None and created is not None and created < cutoff):
+                    delete.append(key)
+                elif position > 0 and self.compact_writes:
+                    compact.append(key)
+        return delete, compact
+
+    def run(self, vacuum=True):
+        """
+        Applies the policies, vacuums the freed pages and returns the database stats before
+        and after, with the number of rows deleted.
+        """
+        before = self.stats()
+        delete, compact = self.plan()
+        deleted_writes = self._delete("writes", delete + compact)
+        deleted_checkpoints = self._delete("checkpoints", delete)
+        freed_pages = self.vacuum() if vacuum else 0
+        return {
+            "before": before,
+            "after": self.stats(),
+            "deleted_checkpoints": deleted_checkpoints,
+            "deleted_writes": deleted_writes,
+            "freed_pages": freed_pages,
+        }
+
+    def _delete(self, table, keys):
+        deleted = 0
+        for start in range(0, len(keys), self.batch_size):
+            with self._write() as conn:
+                cursor = conn.executemany(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    keys[start:start + self.batch_size]
+                )
+                deleted += cursor.rowcount
+            time.sleep(0)  # Let waiting turns take the lock between batches
+        return deleted
+
+    def vacuum(self, full=False):
+        """
+        Returns the free pages of the database to the file system, `vacuum_pages` at a time.
+        Databases created without incremental auto vacuum are only shrunk with `full=True`,
+        which rewrites the whole file once (and blocks writers meanwhile) to switch them to it.
+        Returns the number of pages released.
+        """
+        with self._write() as conn:
+            mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if mode != 2 and not full:
+            if free_pages and self.path not in _vacuum_notices:
+                _vacuum_notices.add(self.path)
+                print(f"{free_pages} free pages left in {self.path}, run `python -m src.checkpoint --full-vacuum` once to reclaim them")
+            free_pages = 0
+        elif mode != 2:
+            with self._write() as conn:
+                conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                isolation_level = conn.isolation_level
+                conn.isolation_level = None  # VACUUM can't run in a transaction
+                try:
+                    conn.execute("VACUUM")
+                finally:
+                    conn.isolation_level = isolation_level
+        else:
+            while True:
+                with self._write() as conn:
+                    remaining = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    if not remaining:
+                        break
+                    conn.execute(f"PRAGMA incremental_vacuum({self.vacuum_pages})").fetchall()
+                time.sleep(0)
+        with self._write() as conn:
+            # Fold the WAL back into the database and truncate it
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return free_pages
+
+    def stats(self, sample_threads=20):
+        """
+        Returns the database size, row counts, and the time to load the latest checkpoint of
+        the `sample_threads` most recently active threads.
+        """
+        with self._read() as conn:
+            checkpoints, threads = conn.execute("SELECT COUNT(*), COUNT(DISTINCT thread_id) FROM checkpoints").fetchone()
+            writes = conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+            recent = [row[0] for row in conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id ORDER BY MAX(checkpoint_id) DESC LIMIT ?",
+                (sample_threads,)
+            )]
+
+        saver = self.saver or self._loader
+        load_ms = []
+        for thread_id in recent:
+            start = time.perf_counter()
+            saver.get_tuple({"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}})
+            load_ms.append((time.perf_counter() - start) * 1000)
+        return {
+            "size_bytes": database_size(self.path),
+            "checkpoints": checkpoints,
+            "threads": threads,
+            "writes": writes,
+            "load_ms_p50": statistics.median(load_ms) if load_ms else None,
+            "load_ms_max": max(load_ms) if load_ms else None,
+        }
+
+    async def run_forever(self, interval=None):
+        """
+        Runs the retention every `interval` seconds, off the event loop, until cancelled.
+        """
+        interval = interval or float(os.getenv("CHECKPOINT_RETENTION_INTERVAL", 3600))
+        while True:
+            try:
+                report = await asyncio.to_thread(self.run)
+                print(
+                    f"Checkpoint retention: {report['deleted_checkpoints']} checkpoints and "
+                    f"{report['deleted_writes']} writes deleted, {report['before']['size_bytes'] / 1e6:.1f} MB -> "
+                    f"{report['after']['size_bytes'] / 1e6:.1f} MB"
+                )
+            except Exception as e:
+                print(f"Checkpoint retention failed: {e}")
+            await asyncio.sleep(interval)
+
@@ -0,0 +1,172 @@
+import os
+import queue
+import asyncio
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from langgraph.checkpoint.base import WRITES_IDX_MAP, CheckpointTuple
+from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.sqlite.utils import search_where
+
+# Applied to every connection: WAL lets readers work while a write is in progress, and only syncs to disk on
+# WAL checkpoints with synchronous=NORMAL (a power cut can lose the last commits, never corrupt the file)
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # 16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",
+)
+
+
+class PooledSqliteSaver(SqliteSaver):
+    """
+    SqliteSaver for concurrent turns: one writer connection (writes are serialized by SQLite
+    anyway) and a pool of up to `readers` read-only connections, so reading a checkpoint
+    doesn't wait for other threads' reads or writes.
+
+    Writes of the tasks of a super-step (`put_writes`) are committed as soon as they are put,
+    so a turn interrupted mid-step resumes without re-running the finished tasks. The async
+    methods run the sync ones in a thread, so the saver can be used from FastAPI handlers.
+    """
+
+    def __init__(self, path, readers=None, busy_timeout=30, serde=None):
+        self.path = path
+        self.busy_timeout = busy_timeout  # Seconds a connection waits for a lock before "database is locked"
+        super().__init__(self._connect(), serde=serde)
+        # Only applies to new databases: freed pages can then be returned to the file system a few at a time
+        self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # An in-memory database only exists on its own connection, it is read through the writer
+        self.max_readers = 0 if path == ":memory:" else readers or int(os.getenv("CHECKPOINT_READERS", 8))
+        self._readers = queue.LifoQueue()  # Idle reader connections, the most recently used first (warm caches)
+        self._opened_readers = 0
+        self._readers_lock = threading.Lock()
+
+    def _connect(self, read_only=False):
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=self.busy_timeout)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if read_only:
+            conn.isolation_level = None  # Transactions are opened explicitly, see `_reader`
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _ensure_setup(self):
+        if not self.is_setup:
+            with self.lock:
+                self.setup()
+
+    @contextmanager
+    def cursor(self, transaction=True):
+        """
+        Write cursors use the writer connection, read cursors a pooled reader connection.
+        """
+        if not transaction and self.max_readers:
+            self._ensure_setup()
+            with self._reader() as conn, closing(conn.cursor()) as cur:
+                yield cur
+            return
+        with self.lock:
+            self.setup()
+            cur = self.conn.cursor()
+            try:
+                yield cur
+            finally:
+                if transaction:
+                    self.conn.commit()
+                cur.close()
+
+    @contextmanager
+    def _reader(self):
+        """
+        Lends a reader connection inside a read transaction, so every query sees the same snapshot.
+        """
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                can_open = self._opened_readers < self.max_readers
+                self._opened_readers += can_open
+            conn = self._connect(read_only=True) if can_open else self._readers.get()
+        try:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+        finally:
+            self._readers.put(conn)
+
+    def put_writes(self, config, writes, task_id):
+        query = (
+            "INSERT OR REPLACE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+            if all(w[0] in WRITES_IDX_MAP for w in writes)
+            else "INSERT OR IGNORE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        rows = [
+            (
+                str(config["configurable"]["thread_id"]),
+                str(config["configurable"]["checkpoint_ns"]),
+                str(config["configurable"]["checkpoint_id"]),
+                task_id,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        with self.cursor() as cur:
+            cur.executemany(query, rows)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        # Same as SqliteSaver.list, with the writes read on the reader connection instead of the writer
+        where, param_values = search_where(config, filter, before)
+        query = f"""SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata
+        FROM checkpoints
+        {where}
+        ORDER BY checkpoint_id DESC"""
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        with self.cursor(transaction=False) as cur, closing(cur.connection.cursor()) as wcur:
+            cur.execute(query, param_values)
+            for thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata in cur:
+                wcur.execute(
+                    "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                )
+                yield _checkpoint_tuple(
+                    self, thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata, wcur
+                )
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        checkpoints = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint in checkpoints:
+            yield checkpoint
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id):
+        await asyncio.to_thread(self.put_writes, config, writes, task_id)
+
+    def close(self):
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+        self.conn.close()
+
+
+def _checkpoint_tuple(saver, thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type_, checkpoint, metadata, writes):
+    return CheckpointTuple(
+        {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+        saver.serde.loads_typed((type_, checkpoint)),
+        saver.jsonplus_serde.loads(metadata) if metadata is not None else {},
+        (
+            {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_checkpoint_id}}
+            if parent_checkpoint_id
+            else None
+        ),
+        [(task_id, channel, saver.serde.loads_typed((type_, value))) for task_id, channel, type_, value in writes],
+    )
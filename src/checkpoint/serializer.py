@@ -0,0 +1,119 @@
+import os
+import glob
+import threading
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+# Trained dictionaries, one file per dictionary id: every one ever used is needed to read old checkpoints,
+# the directory goes with the checkpoint database (backups, moves to another host)
+DICTIONARY_DIR = os.getenv("CHECKPOINT_ZSTD_DICT_DIR", "db/zstd_dicts")
+
+# Payloads smaller than this are stored as is, zstd's frame header would eat most of the gain
+MIN_COMPRESS_SIZE = 128
+
+
+class ZstdSerializer(JsonPlusSerializer):
+    """
+    Checkpoint serializer storing the msgpack payloads of the default serializer compressed
+    with zstd, with a dictionary trained on past checkpoints when there is one (see
+    `train_dictionary`). Compressed payloads get a "+zstd" suffix on their type, so
+    checkpoints written by the default serializer are still read as they are.
+    """
+
+    def __init__(self, level=3, dictionary_dir=DICTIONARY_DIR):
+        super().__init__()
+        self.level = level
+        self.dictionary_dir = dictionary_dir
+        self._dictionaries = {}  # dictionary id -> zstd.ZstdCompressionDict
+        self._current = None  # Dictionary new payloads are compressed with
+        self._local = threading.local()  # zstd (de)compressors aren't thread-safe, one set per thread
+        self._load_dictionaries()
+
+    def _load_dictionaries(self):
+        import zstandard as zstd
+
+        paths = sorted(glob.glob(os.path.join(self.dictionary_dir, "*.dict")), key=os.path.getmtime)
+        for path in paths:
+            with open(path, "rb") as f:
+                dictionary = zstd.ZstdCompressionDict(f.read())
+            self._dictionaries[dictionary.dict_id()] = dictionary
+            self._current = dictionary  # The most recently trained one
+        self._local = threading.local()
+
+    def _compressor(self):
+        import zstandard as zstd
+
+        if getattr(self._local, "compressor", None) is None:
+            self._local.compressor = zstd.ZstdCompressor(level=self.level, dict_data=self._current)
+        return self._local.compressor
+
+    def _decompressor(self, dict_id):
+        import zstandard as zstd
+
+        decompressors = getattr(self._local, "decompressors", None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+        if dict_id not in decompressors:
+            dictionary = self._dictionaries.get(dict_id) if dict_id else None
+            if dict_id and dictionary is None:
+                # The checkpoint can't be read without it, say which file to restore
+                raise ValueError(
+                    f"Checkpoint compressed with zstd dictionary {dict_id}, but "
+                    f"{os.path.join(self.dictionary_dir, f'{dict_id}.dict')} is missing. The dictionaries of "
+                    f"{self.dictionary_dir} must be kept, and backed up or moved, with the checkpoint database"
+                )
+            decompressors[dict_id] = zstd.ZstdDecompressor(dict_data=dictionary)
+        return decompressors[dict_id]
+
+    def dumps_typed(self, obj):
+        type_, data = super().dumps_typed(obj)
+        if type_ not in ("msgpack", "json") or len(data) < MIN_COMPRESS_SIZE:
+            return type_, data
+        return f"{type_}+zstd", self._compressor().compress(data)
+
+    def loads_typed(self, data):
+        type_, data_ = data
+        if type_.endswith("+zstd"):
+            import zstandard as zstd
+
+            dict_id = zstd.get_frame_parameters(data_).dict_id
+            return super().loads_typed((type_[:-len("+zstd")], self._decompressor(dict_id).decompress(data_)))
+        return super().loads_typed(data)
+
+    def raw_payload(self, type_, data):
+        """
+        Returns the uncompressed payload of a stored value (e.g. to train a dictionary on it).
+        """
+        if type_.endswith("+zstd"):
+            import zstandard as zstd
+
+            return self._decompressor(zstd.get_frame_parameters(data).dict_id).decompress(data)
+        return data
+
+    def train_dictionary(self, samples, size=112640):
+        """
+        Trains a dictionary of `size` bytes on the uncompressed `samples`, saves it in
+        `dictionary_dir` and compresses new payloads with it. Returns its id.
+        """
+        import zstandard as zstd
+
+        dictionary = zstd.train_dictionary(size, samples, level=self.level)
+        os.makedirs(self.dictionary_dir, exist_ok=True)
+        with open(os.path.join(self.dictionary_dir, f"{dictionary.dict_id()}.dict"), "wb") as f:
+            f.write(dictionary.as_bytes())
+        self._load_dictionaries()
+        return dictionary.dict_id()
+
+    @classmethod
+    def from_env(cls):
+        """
+        Returns the serializer picked by CHECKPOINT_COMPRESSION: a ZstdSerializer ("zstd", the
+        default), or None to use the default serializer ("none").
+        """
+        if os.getenv("CHECKPOINT_COMPRESSION", "zstd").lower() == "none":
+            return None
+        try:
+            import zstandard  # noqa: F401
+        except ImportError:
+            print("zstandard is not installed, checkpoints are stored uncompressed")
+            return None
+        return cls(level=int(os.getenv("CHECKPOINT_ZSTD_LEVEL", 3)))
@@ -26,6 +26,9 @@ to read or write emails to my contacts.
 
 * **GetCalendarEvents:** Use this tool to retrieve all calendars events between 2 time periods from my calendar.
 
+* **FindFreeSlots:** Use this tool to find when I am free ("when am I free Thursday afternoon", "find 1 hour for a meeting next week"), instead of
+reading all my events. Give it the duration needed and, when the task says so, the hours of the day to search and a buffer around my events.
+
 * **AddEventToCalendar:** Use this tool to add a new event in my calendar.
 
 **# Notes**
@@ -33,5 +36,5 @@ to read or write emails to my contacts.
 * You will always report back to your manager agent in as much detail as possible..
 * You must always use the FindContactEmail tool to get my contacts email given their names.
 * NEVER make up an email for one of my contacts.
-- **Today’s date is: {date_time}**
+- **Today’s date and time are given at the end of each message ("Current Date/time").**
 """
\ No newline at end of file
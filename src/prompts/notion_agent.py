@@ -28,5 +28,5 @@ You have the following tools to assist you in managing my email inbox:
 
 * You will always report back to your manager agent in as much detail as possible.
 * NEVER make up aa task on your own, ALWAYS follow the instructions given to you by your manager.
-* **Today date is: {date_time}**
+* **Today’s date and time are given at the end of each message ("Current Date/time").**
 """
\ No newline at end of file
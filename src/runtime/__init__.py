@@ -0,0 +1,6 @@
+from .dispatcher import ConversationDispatcher
+from .job_queue import JobQueue, JobWorker
+from .streaming import StreamingReply, stream_reply
+from .channel_runtime import ChannelRuntime
+
+__all__ = ['ChannelRuntime', 'ConversationDispatcher', 'JobQueue', 'JobWorker', 'StreamingReply', 'stream_reply']
@@ -0,0 +1,129 @@
+import asyncio
+from src.utils import get_google_metrics, get_llm_metrics
+from src.agents.base import get_model_chain_metrics
+from .job_queue import JobWorker
+from .streaming import StreamingReply, stream_reply
+
+
+class ChannelRuntime:
+    """
+    Serves several channels from one asyncio loop against one shared personal assistant.
+
+    Every channel's `receive()` stream is pumped into the durable job queue (webhook
+    channels write to it themselves), and a JobWorker runs the assistant turns on a
+    bounded pool of worker threads, in order per conversation. Answers are streamed by
+    editing a placeholder message on channels that support it.
+    """
+
+    def __init__(
+        self, personal_assistant, channels, job_queue, max_workers=4, stream_replies=True, warm_up=False, retention=None,
+        mirrors=()
+    ):
+        self.personal_assistant = personal_assistant
+        self.channels = {channel.name: channel for channel in channels}
+        self.job_queue = job_queue
+        self.stream_replies = stream_replies
+        self.warm_up = warm_up  # Build the LLM clients and graphs at startup instead of on the first message
+        self.retention = retention  # CheckpointRetention pruning the checkpoint database periodically (None disables it)
+        self.mirrors = list(mirrors)  # Local copies of Google data (e.g. MailboxMirror) synced in the background
+        self.worker = JobWorker(job_queue, self.handle_job, max_workers=max_workers, channels=list(self.channels))
+        self._receive_tasks = []
+        self._warm_up_task = None
+        self._retention_task = None
+        self._purge_task = None
+        self._mirror_tasks = []
+
+    def handle_job(self, job):
+        """
+        Runs one assistant turn for a queued message (called on a worker thread).
+        """
+        channel = self.channels[job["channel"]]
+        message = job["payload"]
+        # Each conversation gets its own Langgraph checkpoint thread
+        config = {"configurable": {"thread_id": str(message["chat_id"])}}
+        sent_message = (
+            f"Message: {message['text']}\n"
+            f"Current Date/time: {message['date']}"
+        )
+        if self.stream_replies and channel.supports_edit:
+            # Show a placeholder right away and edit it as the answer is generated
+            stream_reply(self.personal_assistant, sent_message, config, StreamingReply(channel, chat_id=message["chat_id"]))
+        else:
+            answer = self.personal_assistant.invoke(sent_message, config=config)
+            channel.send_message(answer, chat_id=message["chat_id"])
+
+    async def start(self):
+        if self.warm_up and hasattr(self.personal_assistant, "warm_up"):
+            # In the background, so the channels start serving right away
+            self._warm_up_task = asyncio.create_task(asyncio.to_thread(self.personal_assistant.warm_up))
+        if self.retention is not None:
+            self._retention_task = asyncio.create_task(self.retention.run_forever(), name="checkpoint-retention")
+        # Drop the finished jobs, and the messages they hold, after JOB_RETENTION_DAYS
+        self._purge_task = asyncio.create_task(self.job_queue.run_forever(), name="job-queue-purge")
+        self._mirror_tasks = [
+            asyncio.create_task(mirror.run_forever(), name=f"{type(mirror).__name__}-sync") for mirror in self.mirrors
+        ]
+        for channel in self.channels.values():
+            await channel.start()
+        self.worker.start()
+        self._receive_tasks = [
+            asyncio.create_task(self._pump(channel), name=f"{channel.name}-receive")
+            for channel in self.channels.values()
+        ]
+
+    async def _pump(self, channel):
+        # One channel failing (provider outage, busy job queue...) must not stop the others, it is restarted instead
+        while True:
+            try:
+                async for message in channel.receive():
+                    # The provider message id makes redelivered messages a no-op
+                    await asyncio.to_thread(
+                        self.job_queue.enqueue, channel.name, message["message_id"], message["chat_id"], message
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Receiving {channel.name} messages failed, retrying in 5 seconds: {e}")
+            await asyncio.sleep(5)
+
+    async def run(self):
+        """
+        Starts the runtime and serves until cancelled.
+        """
+        await self.start()
+        try:
+            await asyncio.gather(*self._receive_tasks)
+            await asyncio.Event().wait()  # Webhook-only channels have nothing to pump
+        finally:
+            await self.stop()
+
+    async def stop(self, drain_timeout=None):
+        """
+        Stops receiving, waits for in-flight turns (up to `drain_timeout` seconds) and closes
+        the channels. Returns False if some turns were still running.
+        """
+        for task in self._receive_tasks:
+            task.cancel()
+        if self._retention_task:
+            self._retention_task.cancel()
+        if self._purge_task:
+            self._purge_task.cancel()
+        for task in self._mirror_tasks:
+            task.cancel()
+        drained = await asyncio.to_thread(self.worker.stop, drain_timeout)
+        for channel in self.channels.values():
+            await channel.close()
+        return drained
+
+    def stats(self):
+        stats = {**self.worker.stats(), "llm": get_llm_metrics(), "model_chains": get_model_chain_metrics(),
+                 "google": get_google_metrics()}
+        delegation_cache = getattr(self.personal_assistant, "delegation_cache", None)
+        if delegation_cache is not None:
+            stats["delegation_cache"] = delegation_cache.stats()
+        router = getattr(self.personal_assistant, "router", None)
+        if router is not None:
+            stats["router"] = router.stats()
+        for mirror in self.mirrors:
+            stats[type(mirror).__name__] = mirror.stats()
+        return stats
@@ -0,0 +1,135 @@
+import time
+import threading
+from collections import deque
+
+
+class ConversationDispatcher:
+    """
+    Runs message handlers on a bounded pool of worker threads.
+
+    Messages sharing a conversation key (chat id / thread id) are handled strictly
+    one after the other in submission order, while different conversations run in
+    parallel. A worker handles one message of a conversation and then re-queues the
+    conversation, so a chatty conversation can't starve the others.
+
+    The workers are daemon threads: a handler still running after `shutdown(wait=False)`
+    doesn't hold up the exit of the process.
+    """
+
+    def __init__(self, handler, max_workers=4):
+        self.handler = handler  # Callable receiving one submitted item
+        self.max_workers = max_workers
+        self._queues = {}  # Conversation key -> deque of pending items
+        self._ready = deque()  # Conversations waiting for a worker, none of their items is being handled
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._work = threading.Condition(self._lock)
+        self._stopped = False
+        self._pending = 0
+        self._active = 0
+        self._processed = 0
+        self._failed = 0
+        self._busy_seconds = 0.0
+        self._started_at = time.monotonic()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"conversation-{i}", daemon=True) for i in range(max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key, item):
+        """
+        Queues `item` behind every earlier item of the same conversation.
+        """
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("The dispatcher is shut down")
+            queue = self._queues.get(key)
+            if queue is None:
+                # No drain is scheduled for this conversation yet
+                queue = self._queues[key] = deque()
+                self._ready.append(key)
+                self._work.notify()
+            queue.append(item)
+            self._pending += 1
+
+    def _worker(self):
+        while True:
+            with self._lock:
+                self._work.wait_for(lambda: self._ready or self._stopped)
+                if self._stopped:
+                    return
+                key = self._ready.popleft()
+                item = self._queues[key].popleft()
+                self._pending -= 1
+                self._active += 1
+            self._handle(key, item)
+
+    def _handle(self, key, item):
+        started_at = time.monotonic()
+        try:
+            self.handler(item)
+            failed = False
+        except Exception as e:
+            print(f"Error while handling message of conversation {key}: {e}")
+            failed = True
+
+        with self._lock:
+            self._active -= 1
+            self._busy_seconds += time.monotonic() - started_at
+            self._processed += 1
+            self._failed += failed
+            if self._queues[key]:
+                self._ready.append(key)
+                self._work.notify()
+            else:
+                del self._queues[key]
+            self._idle.notify_all()
+
+    def stats(self):
+        """
+        Returns a snapshot of the queue depth and worker use.
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self._started_at
+            return {
+                "queue_depth": self._pending,
+                "active_workers": self._active,
+                "max_workers": self.max_workers,
+                "worker_utilization": self._active / self.max_workers,
+                "average_utilization": self._busy_seconds / (elapsed * self.max_workers) if elapsed else 0.0,
+                "conversations": len(self._queues),
+                "processed": self._processed,
+                "failed": self._failed,
+            }
+
+    def join(self, timeout=None):
+        """
+        Blocks until every submitted item was handled. Returns False on timeout.
+        """
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._queues, timeout)
+
+    def shutdown(self, wait=True):
+        """
+        Stops the workers once the items being handled are done, after handling every submitted
+        item if `wait`. Returns the items that were never started, dropped from the queues.
+        """
+        if wait:
+            self.join()
+        with self._lock:
+            self._stopped = True
+            dropped = [item for queue in self._queues.values() for item in queue]
+            for queue in self._queues.values():
+                queue.clear()
+            # Conversations with an item being handled are removed by their worker when it is done
+            for key in self._ready:
+                del self._queues[key]
+            self._ready.clear()
+            self._pending -= len(dropped)
+            self._work.notify_all()
+            self._idle.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        return dropped
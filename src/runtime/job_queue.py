@@ -0,0 +1,376 @@
+import os
+import json
+import asyncio
+import time
+import uuid
+import sqlite3
+import threading
+from .dispatcher import ConversationDispatcher
+
+QUEUED = "queued"
+PROCESSING = "processing"
+DONE = "done"
+DEAD = "dead"
+
+
+class JobQueue:
+    """
+    Durable inbound message queue stored in SQLite.
+
+    - Messages are deduplicated on (channel, provider message id), so provider retries
+      (e.g. Twilio re-posting the same MessageSid) are only processed once.
+    - Processing is at-least-once: a claimed job stays invisible for `visibility_timeout`
+      seconds and is handed out again if it is not acknowledged in time (worker crash).
+    - Only the oldest unfinished job of a conversation can be claimed, so messages of a
+      conversation are processed in order even across several worker processes.
+    """
+
+    def __init__(
+        self,
+        path=None,  # SQLite file shared by every process draining the queue
+        visibility_timeout=float(os.getenv("JOB_VISIBILITY_TIMEOUT", 600)),  # Seconds a claimed job stays hidden
+        max_attempts=5,  # Claims before a job is moved to the dead letter status
+        retry_delay=5  # Base delay in seconds before a failed job is retried (doubles each attempt)
+    ):
+        self.path = path or os.getenv("JOB_QUEUE_PATH", "db/jobs.sqlite")
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.new_job = threading.Event()  # Wakes up local workers as soon as a job is enqueued
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                provider_message_id TEXT NOT NULL,
+                conversation_id TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                visible_at REAL NOT NULL,
+                locked_by TEXT,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                UNIQUE (channel, provider_message_id)
+            );
+            CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, visible_at);
+            CREATE INDEX IF NOT EXISTS jobs_conversation ON jobs (channel, conversation_id, status);
+            """
+        )
+
+    def _transaction(self):
+        return _Transaction(self)
+
+    def enqueue(self, channel, provider_message_id, conversation_id, payload):
+        """
+        Stores a message. Returns False if this provider message id was already queued.
+        """
+        now = time.time()
+        with self._transaction() as cursor:
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO jobs
+                    (channel, provider_message_id, conversation_id, payload, status, visible_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (channel, str(provider_message_id), str(conversation_id), json.dumps(payload), QUEUED, now, now, now)
+            )
+            inserted = cursor.rowcount == 1
+        if inserted:
+            self.new_job.set()
+        return inserted
+
+    def claim(self, worker_id, channels=None):
+        """
+        Claims the next visible job, skipping conversations that already have an older
+        unfinished job. Returns the job as a dict, or None if nothing is ready.
+        """
+        channel_filter = ""
+        params = [time.time()]
+        if channels:
+            channel_filter = f"AND j.channel IN ({', '.join('?' for _ in channels)})"
+            params.extend(channels)
+
+        with self._transaction() as cursor:
+            while True:
+                now = time.time()
+                params[0] = now
+                row = cursor.execute(
+                    f"""
+                    SELECT * FROM jobs j
+                    WHERE j.status IN ('{QUEUED}', '{PROCESSING}') AND j.visible_at <= ? {channel_filter}
+                      AND NOT EXISTS (
+                        SELECT 1 FROM jobs e
+                        WHERE e.channel = j.channel AND e.conversation_id = j.conversation_id
+                          AND e.status IN ('{QUEUED}', '{PROCESSING}') AND e.id < j.id
+                      )
+                    ORDER BY j.id LIMIT 1
+                    """,
+                    params
+                ).fetchone()
+                if row is None:
+                    return None
+
+                if row["attempts"] >= self.max_attempts:
+                    # Claimed too many times without being acknowledged, stop retrying it
+                    cursor.execute(
+                        "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?",
+                        (DEAD, now, row["id"])
+                    )
+                    continue
+
+                cursor.execute(
+                    """
+                    UPDATE jobs SET status = ?, attempts = attempts + 1, visible_at = ?, locked_by = ?, updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (PROCESSING, now + self.visibility_timeout, worker_id, now, row["id"])
+                )
+                return {
+                    "id": row["id"],
+                    "channel": row["channel"],
+                    "provider_message_id": row["provider_message_id"],
+                    "conversation_id": row["conversation_id"],
+                    "payload": json.loads(row["payload"]),
+                    "attempts": row["attempts"] + 1,
+                }
+
+    def ack(self, job_id):
+        """
+        Marks a job as processed.
+        """
+        with self._transaction() as cursor:
+            cursor.execute(
+                "UPDATE jobs SET status = ?, locked_by = NULL, updated_at = ? WHERE id = ?",
+                (DONE, time.time(), job_id)
+            )
+
+    def fail(self, job_id, error):
+        """
+        Makes a failed job visible again after an exponential backoff.
+        """
+        with self._transaction() as cursor:
+            attempts = cursor.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()["attempts"]
+            now = time.time()
+            cursor.execute(
+                """
+                UPDATE jobs SET status = ?, visible_at = ?, locked_by = NULL, last_error = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (QUEUED, now + self.retry_delay * 2 ** (attempts - 1), str(error), now, job_id)
+            )
+
+    def release(self, job_id):
+        """
+        Gives back a claimed job that was not started: visible again right away, and the claim
+        doesn't count as an attempt.
+        """
+        now = time.time()
+        with self._transaction() as cursor:
+            cursor.execute(
+                """
+                UPDATE jobs SET status = ?, attempts = attempts - 1, visible_at = ?, locked_by = NULL, updated_at = ?
+                WHERE id = ? AND status = ?
+                """,
+                (QUEUED, now, now, job_id, PROCESSING)
+            )
+
+    def extend(self, job_id):
+        """
+        Pushes back the visibility timeout of a job that is still being processed.
+        """
+        now = time.time()
+        with self._transaction() as cursor:
+            cursor.execute(
+                "UPDATE jobs SET visible_at = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (now + self.visibility_timeout, now, job_id, PROCESSING)
+            )
+
+    def backlog(self, channel=None):
+        """
+        Returns the number of queued and in-progress jobs.
+        """
+        query = f"SELECT COUNT(*) FROM jobs WHERE status IN ('{QUEUED}', '{PROCESSING}')"
+        params = ()
+        if channel:
+            query += " AND channel = ?"
+            params = (channel,)
+        with self.lock:
+            return self.conn.execute(query, params).fetchone()[0]
+
+    def stats(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def purge(self, older_than=7 * 24 * 3600):
+        """
+        Deletes finished jobs older than `older_than` seconds. Their ids can't be deduplicated anymore.
+        """
+        with self._transaction() as cursor:
+            cursor.execute(
+                f"DELETE FROM jobs WHERE status IN ('{DONE}', '{DEAD}') AND updated_at < ?",
+                (time.time() - older_than,)
+            )
+            return cursor.rowcount
+
+    async def run_forever(self, interval=None, older_than=None):
+        """
+        Purges the finished jobs (and the messages they hold) every `interval` seconds, off the
+        event loop, until cancelled.
+        """
+        interval = interval or float(os.getenv("JOB_PURGE_INTERVAL", 3600))
+        older_than = older_than or float(os.getenv("JOB_RETENTION_DAYS", 7)) * 24 * 3600
+        while True:
+            try:
+                deleted = await asyncio.to_thread(self.purge, older_than)
+                if deleted:
+                    print(f"Job queue: {deleted} finished jobs purged")
+            except Exception as e:
+                print(f"Job queue purge failed: {e}")
+            await asyncio.sleep(interval)
+
+
+class _Transaction:
+    """
+    Serializes access to the connection inside this process and takes SQLite's write lock
+    up front (BEGIN IMMEDIATE) so concurrent claims from other processes can't interleave.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __enter__(self):
+        self.queue.lock.acquire()
+        try:
+            self.cursor = self.queue.conn.cursor()
+            self.cursor.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.queue.lock.release()
+            raise
+        return self.cursor
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.cursor.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        finally:
+            self.queue.lock.release()
+
+
+class JobWorker:
+    """
+    Drains a JobQueue into a ConversationDispatcher.
+
+    Jobs are claimed only while a worker thread is free, handled by `handler(job)` and
+    acknowledged once it returns. Jobs whose handler raises are retried with a backoff.
+    While a job is handled its visibility timeout is extended, so a turn running longer than
+    the timeout isn't handed out a second time. Several processes can run a JobWorker on the
+    same queue.
+    """
+
+    def __init__(self, queue, handler, max_workers=4, channels=None, poll_interval=1.0):
+        self.queue = queue
+        self.handler = handler
+        self.channels = channels  # Only claim jobs of these channels (all channels if None)
+        self.poll_interval = poll_interval  # Seconds between claims when idle (picks up other processes' jobs)
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.dispatcher = ConversationDispatcher(self._run_job, max_workers=max_workers)
+        self._stop = threading.Event()
+        self._thread = None
+        self._running = set()  # Ids of the jobs being handled
+        self._unacked = set()  # Ids of the jobs handled whose acknowledgement failed, retried by the heartbeat
+        self._running_lock = threading.Lock()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._claim_loop, name="job-worker", daemon=True)
+        self._thread.start()
+        threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+        return self
+
+    def _heartbeat_loop(self):
+        # Runs until the worker is stopped and its last job is done and acknowledged, or the process exits
+        while True:
+            time.sleep(self.queue.visibility_timeout / 3)
+            with self._running_lock:
+                unacked = list(self._unacked)
+            for job_id in unacked:
+                self._ack(job_id)
+            with self._running_lock:
+                job_ids = list(self._running | self._unacked)
+            if self._stop.is_set() and not job_ids:
+                return
+            for job_id in job_ids:
+                try:
+                    self.queue.extend(job_id)
+                except sqlite3.OperationalError as e:
+                    print(f"Failed to extend job {job_id}: {e}")
+
+    def _claim_loop(self):
+        while not self._stop.is_set():
+            stats = self.dispatcher.stats()
+            if stats["queue_depth"] + stats["active_workers"] >= self.dispatcher.max_workers:
+                # Every worker is busy, leave the jobs to other processes for now
+                self._stop.wait(0.05)
+                continue
+
+            self.queue.new_job.clear()
+            try:
+                job = self.queue.claim(self.worker_id, self.channels)
+            except sqlite3.OperationalError as e:
+                print(f"Failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                self.queue.new_job.wait(self.poll_interval)
+                continue
+            self.dispatcher.submit((job["channel"], job["conversation_id"]), job)
+
+    def _run_job(self, job):
+        with self._running_lock:
+            self._running.add(job["id"])
+        try:
+            self.handler(job)
+        except Exception as e:
+            self.queue.fail(job["id"], e)
+            raise
+        finally:
+            with self._running_lock:
+                self._running.discard(job["id"])
+        self._ack(job["id"])
+
+    def _ack(self, job_id):
+        # A failed acknowledgement (e.g. database locked) must not hand the answered job out again:
+        # it stays hidden and the heartbeat retries it
+        try:
+            self.queue.ack(job_id)
+        except sqlite3.OperationalError as e:
+            print(f"Failed to acknowledge job {job_id}, retrying later: {e}")
+            with self._running_lock:
+                self._unacked.add(job_id)
+        else:
+            with self._running_lock:
+                self._unacked.discard(job_id)
+
+    def stats(self):
+        return {**self.dispatcher.stats(), "jobs": self.queue.stats()}
+
+    def stop(self, timeout=None):
+        """
+        Stops claiming jobs and waits for the claimed ones to finish. Returns False on timeout:
+        the jobs not started yet are released to other workers right away, and the ones still
+        running are handed out again after their visibility timeout if this process exits first.
+        """
+        self._stop.set()
+        self.queue.new_job.set()
+        if self._thread:
+            self._thread.join()
+        drained = self.dispatcher.join(timeout)
+        for job in self.dispatcher.shutdown(wait=False):
+            self.queue.release(job["id"])
+        return drained
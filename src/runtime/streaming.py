@@ -0,0 +1,121 @@
+import time
+from langchain_core.messages import AIMessageChunk
+from src.agents.base.model_chain import STREAM_RESET
+
+PLACEHOLDER = "⏳ Working on it..."
+
+
+class StreamingReply:
+    """
+    A chat message that is sent as a placeholder first and then edited in place as the
+    answer streams in. Edits are throttled to the channel's `edit_interval` and identical
+    texts are skipped, so provider edit rate limits are respected.
+    """
+
+    def __init__(self, channel, chat_id=None, min_interval=None):
+        self.channel = channel  # Channel implementing create_message/edit_message (Telegram, Slack)
+        self.chat_id = chat_id
+        self.min_interval = min_interval if min_interval is not None else channel.edit_interval
+        self.max_length = channel.max_message_length
+        self.message_id = None
+        self._shown_text = None
+        self._last_edit = 0.0
+
+    def start(self, text=PLACEHOLDER):
+        self.message_id = self.channel.create_message(text, chat_id=self.chat_id)
+        self._shown_text = text
+        self._last_edit = time.monotonic()
+        return self.message_id
+
+    def update(self, text):
+        """
+        Shows a partial answer, unless the previous edit is too recent.
+        """
+        if time.monotonic() - self._last_edit < self.min_interval:
+            return
+        self._edit(text[:self.max_length])
+
+    def finish(self, text):
+        """
+        Shows the final answer, sending whatever doesn't fit in one message as follow-up messages.
+        """
+        chunks = [text[i:i + self.max_length] for i in range(0, len(text), self.max_length)] or [text]
+        if self.message_id is None:
+            self.channel.send_message(chunks[0], chat_id=self.chat_id)
+        else:
+            # Respect the rate limit for the final edit too
+            wait = self.min_interval - (time.monotonic() - self._last_edit)
+            if wait > 0:
+                time.sleep(wait)
+            self._edit(chunks[0], markdown=True)
+        for chunk in chunks[1:]:
+            self.channel.send_message(chunk, chat_id=self.chat_id)
+
+    def _edit(self, text, markdown=False):
+        if self.message_id is None or not text or (text == self._shown_text and not markdown):
+            return
+        self.channel.edit_message(self.message_id, text, chat_id=self.chat_id, markdown=markdown)
+        self._shown_text = text
+        self._last_edit = time.monotonic()
+
+
+def _is_manager_token(metadata):
+    # Sub-agents run inside the manager's tool node, so their namespace is nested ("tools:..|agent:..")
+    namespace = metadata.get("langgraph_checkpoint_ns") or metadata.get("checkpoint_ns", "")
+    return metadata.get("langgraph_node") == "agent" and "|" not in namespace
+
+
+def stream_reply(personal_assistant, message, config, reply):
+    """
+    Runs one assistant turn with `AgentsOrchestrator.stream` and mirrors its progress into `reply`:
+    the manager's tokens as they are generated plus one status line per sub-agent delegation.
+    Returns the final answer.
+    """
+    reply.start()
+    progress = {}  # Tool call id -> status line of a SendMessage delegation
+    answer, final_answer = "", None
+
+    def render():
+        lines = list(progress.values())
+        if answer:
+            lines.append(("\n" if lines else "") + answer)
+        return "\n".join(lines)
+
+    try:
+        for mode, chunk in personal_assistant.stream(message, config=config, stream_mode=["messages", "updates"]):
+            if mode == "messages":
+                token, metadata = chunk
+                if isinstance(token, AIMessageChunk) and isinstance(token.content, str) and _is_manager_token(metadata):
+                    # The model streaming the answer failed midway, the next one starts it over
+                    answer = "" if token.response_metadata.get(STREAM_RESET) else answer + token.content
+            elif "agent" in chunk:
+                for ai_message in chunk["agent"]["messages"]:
+                    if ai_message.tool_calls:
+                        # The manager is delegating, its next message starts from scratch
+                        answer = ""
+                        for tool_call in ai_message.tool_calls:
+                            progress[tool_call["id"]] = _delegation_status(tool_call)
+                    else:
+                        final_answer = ai_message.content
+            elif "tools" in chunk:
+                for tool_message in chunk["tools"]["messages"]:
+                    if tool_message.tool_call_id in progress:
+                        progress[tool_message.tool_call_id] = progress[tool_message.tool_call_id].replace("⏳", "✅", 1)
+            reply.update(render())
+    except Exception:
+        reply.finish("⚠️ Something went wrong while working on your request, I'll try again.")
+        raise
+
+    final_answer = final_answer if final_answer is not None else answer
+    reply.finish(final_answer)
+    return final_answer
+
+
+def _delegation_status(tool_call):
+    args = tool_call.get("args", {})
+    # A SendMessage call names one recipient, or several in a batch
+    recipients = [args["recipient"]] if args.get("recipient") else []
+    recipients += [item.get("recipient") for item in args.get("messages") or [] if item.get("recipient")]
+    if not recipients:
+        return f"⏳ Running {tool_call['name']}"
+    return f"⏳ Asking {', '.join(recipients)}"
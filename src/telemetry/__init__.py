@@ -0,0 +1,60 @@
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .recorder import Telemetry, estimate_cost, group_turns, load_spans
+from .callbacks import TelemetryCallbackHandler
+
+_telemetry = None
+_handler = None
+
+
+def enable_telemetry(path=None, max_spans=10000):
+    """
+    Records every agent run, LLM call and tool call of this process from now on, in memory
+    and in the JSON lines file `path` if given. Returns the Telemetry instance.
+    """
+    global _telemetry, _handler
+    if _telemetry is not None:
+        return _telemetry
+    from langchain_core.tracers.context import register_configure_hook
+
+    _telemetry = Telemetry(path, max_spans)
+    _handler = TelemetryCallbackHandler(_telemetry)
+    # A context variable defaulting to the handler adds it to every run, in every thread
+    register_configure_hook(ContextVar("telemetry_handler", default=_handler), inheritable=True)
+    return _telemetry
+
+
+def get_telemetry():
+    """
+    Returns the Telemetry instance, or None if telemetry isn't enabled.
+    """
+    return _telemetry
+
+
+@contextmanager
+def span(name, kind="call"):
+    """
+    Records the enclosed block as a span of the current run, for steps inside a tool
+    worth timing on their own (e.g. a Selenium session, a batch of API calls).
+    """
+    if _handler is None:
+        yield
+        return
+    from langchain_core.runnables.config import var_child_runnable_config
+
+    callbacks = (var_child_runnable_config.get() or {}).get("callbacks")
+    run_id = uuid.uuid4()
+    _handler._start(run_id, getattr(callbacks, "parent_run_id", None), kind, name)
+    try:
+        yield
+    except BaseException as e:
+        _handler._end(run_id, e)
+        raise
+    _handler._end(run_id)
+
+
+__all__ = [
+    'Telemetry', 'TelemetryCallbackHandler', 'enable_telemetry', 'get_telemetry', 'span',
+    'estimate_cost', 'group_turns', 'load_spans'
+]
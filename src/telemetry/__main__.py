@@ -0,0 +1,63 @@
+"""
+Prints the slowest spans of the most recent turns recorded in the telemetry file.
+
+Usage:
+    python -m src.telemetry
+    python -m src.telemetry --turns 50 --top 20 --kind tool
+"""
+import os
+import argparse
+import statistics
+from . import group_turns, load_spans
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(0, int(round(len(values) * fraction)) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", default=os.getenv("TELEMETRY_PATH", "db/telemetry.jsonl"))
+    parser.add_argument("--turns", type=int, default=20, help="Number of recent turns to look at")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest spans to print")
+    parser.add_argument("--kind", choices=["agent", "llm", "hedge", "tool", "delegation", "call"], help="Only show this kind of span")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"No telemetry recorded yet in {args.path}")
+        return
+
+    turns = group_turns(load_spans(args.path), args.turns)
+    spans = [span for turn in turns for span in turn]
+    if args.kind:
+        spans = [span for span in spans if span["kind"] == args.kind]
+    if not spans:
+        print("No spans found")
+        return
+
+    print(f"{len(turns)} turns, {len(spans)} spans\n")
+    print(f"{'name':<40} {'kind':<10} {'count':>6} {'p50 s':>8} {'p95 s':>8} {'tokens':>9} {'cached':>7} {'cost $':>9} {'errors':>6}")
+    by_name = {}
+    for span in spans:
+        by_name.setdefault((span["name"], span["kind"]), []).append(span)
+    for (name, kind), group in sorted(by_name.items(), key=lambda item: -percentile([s["seconds"] for s in item[1]], 0.95)):
+        seconds = [span["seconds"] for span in group]
+        tokens = sum((span.get("prompt_tokens") or 0) + (span.get("completion_tokens") or 0) for span in group)
+        prompt_tokens = sum(span.get("prompt_tokens") or 0 for span in group)
+        cached = sum(span.get("cached_tokens") or 0 for span in group) / prompt_tokens if prompt_tokens else 0
+        cost = sum(span.get("cost_usd") or 0 for span in group)
+        errors = sum(bool(span.get("error")) for span in group)
+        print(
+            f"{str(name)[:40]:<40} {kind:<10} {len(group):>6} {statistics.median(seconds):>8.2f} "
+            f"{percentile(seconds, 0.95):>8.2f} {tokens:>9} {cached:>7.0%} {cost:>9.4f} {errors:>6}"
+        )
+
+    print(f"\nSlowest {args.top} spans:")
+    for span in sorted(spans, key=lambda span: span["seconds"], reverse=True)[:args.top]:
+        error = f"  ERROR {span['error']}" if span.get("error") else ""
+        print(f"{span['seconds']:>8.2f}s  {span['kind']:<10} {str(span['name'])[:50]:<50} turn {span['turn_id'][:8]}{error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import time
+import threading
+from langchain_core.callbacks import BaseCallbackHandler
+from .recorder import estimate_cost
+
+
+class TelemetryCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback handler turning agent runs, LLM calls and tool calls into spans.
+
+    Agent runs are the graphs compiled by `Agent`, recognised by their `agent_name` metadata.
+    Tool calls of SendMessage are recorded as "delegation" spans. Every span carries the id
+    of its turn, the outermost run it belongs to. Runs still open after `max_run_seconds`
+    (streams abandoned by their consumer never end) are forgotten.
+    """
+
+    run_inline = True  # Cheap and thread-safe, no need to be moved to an executor in async runs
+
+    def __init__(self, telemetry, max_run_seconds=3600):
+        self.telemetry = telemetry
+        self.max_run_seconds = max_run_seconds
+        self._runs = {}  # run id -> (turn id, span or None, start time)
+        self._lock = threading.Lock()
+        self._last_eviction = time.monotonic()
+
+    def _evict(self, now):
+        # At most once a minute, the open runs are few but a scan on every start would add up
+        if now - self._last_eviction < 60:
+            return
+        self._last_eviction = now
+        for run_id in [run_id for run_id, run in self._runs.items() if now - run[2] > self.max_run_seconds]:
+            del self._runs[run_id]
+
+    def _start(self, run_id, parent_run_id, kind=None, name=None, **fields):
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            parent = self._runs.get(parent_run_id)
+            turn_id = parent[0] if parent else str(parent_run_id or run_id)
+            span = None
+            if kind:
+                span = {
+                    "turn_id": turn_id,
+                    "span_id": str(run_id),
+                    "parent_id": str(parent_run_id) if parent_run_id else None,
+                    "kind": kind,
+                    "name": name,
+                    "start": time.time(),
+                    "_started": time.perf_counter(),
+                    **fields,
+                }
+            self._runs[run_id] = (turn_id, span, now)
+
+    def _end(self, run_id, error=None, **fields):
+        with self._lock:
+            _, span, _ = self._runs.pop(run_id, (None, None, None))
+        if span is None:
+            return
+        span["seconds"] = time.perf_counter() - span.pop("_started")
+        span["error"] = f"{type(error).__name__}: {error}" if error else None
+        span.update(fields)
+        self.telemetry.record(span)
+
+    # Agents (and every other chain, only tracked to find the turn of nested runs)
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        name = kwargs.get("name")
+        is_agent = bool(metadata) and metadata.get("agent_name") == name
+        self._start(run_id, parent_run_id, "agent" if is_agent else None, name)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # LLM calls
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        invocation_params = kwargs.get("invocation_params") or {}
+        model = (metadata or {}).get("ls_model_name") or invocation_params.get("model")
+        agent = (metadata or {}).get("agent_name")
+        # A model chain is a "hedge" span around the "llm" spans of the models it tried, which hold the tokens
+        kind = "hedge" if invocation_params.get("_type") == "hedged" else "llm"
+        self._start(run_id, parent_run_id, kind, f"{agent}:{model}" if agent else model, model=model)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        model = (metadata or {}).get("ls_model_name")
+        self._start(run_id, parent_run_id, "llm", model, model=model)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            _, span, _ = self._runs.get(run_id, (None, None, None))
+        if span is None or span["kind"] != "llm":
+            self._end(run_id)
+            return
+        usage = _token_usage(response)
+        self._end(run_id, **usage, cost_usd=estimate_cost(span.get("model"), **usage))
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+    # Tool calls
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name")
+        self._start(run_id, parent_run_id, "delegation" if name == "SendMessage" else "tool", name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error)
+
+
+def _token_usage(response):
+    """
+    Returns the prompt and completion tokens of an LLMResult, and how many of the prompt tokens
+    were read from (cached_tokens) or written to (cache_creation_tokens) the provider's prompt cache.
+    Taken from the message usage metadata when the provider reports it, else from `llm_output`.
+    """
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cache_creation_tokens": 0}
+    for generations in response.generations:
+        for generation in generations:
+            usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage_metadata:
+                details = usage_metadata.get("input_token_details") or {}
+                usage["prompt_tokens"] += usage_metadata.get("input_tokens", 0)
+                usage["completion_tokens"] += usage_metadata.get("output_tokens", 0)
+                usage["cached_tokens"] += details.get("cache_read") or 0
+                usage["cache_creation_tokens"] += details.get("cache_creation") or 0
+    if not usage["prompt_tokens"] and not usage["completion_tokens"] and response.llm_output:
+        token_usage = response.llm_output.get("token_usage") or response.llm_output.get("usage") or {}
+        usage["prompt_tokens"] = token_usage.get("prompt_tokens", token_usage.get("input_tokens", 0))
+        usage["completion_tokens"] = token_usage.get("completion_tokens", token_usage.get("output_tokens", 0))
+        usage["cached_tokens"] = (
+            (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+            or token_usage.get("cache_read_input_tokens") or 0
+        )
+    return usage
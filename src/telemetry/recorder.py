@@ -0,0 +1,235 @@
+import os
+import json
+import queue
+import atexit
+import threading
+from collections import deque
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotation isn't coordinated between processes
+    fcntl = None
+
+# USD per million (prompt, completion, cached prompt) tokens, used to estimate the cost of each LLM call
+MODEL_PRICES = {
+    "gpt-4o": (2.5, 10.0, 1.25),
+    "gpt-4o-mini": (0.15, 0.6, 0.075),
+    "gpt-4.1": (2.0, 8.0, 0.5),
+    "gpt-4.1-mini": (0.4, 1.6, 0.1),
+    "claude-3-5-sonnet": (3.0, 15.0, 0.3),
+    "claude-3-5-haiku": (0.8, 4.0, 0.08),
+    "gemini-1.5-flash": (0.075, 0.3, 0.01875),
+    "gemini-1.5-pro": (1.25, 5.0, 0.3125),
+}
+
+# Writing a prompt to Anthropic's cache costs 25% more than reading it uncached
+CACHE_WRITE_PREMIUM = 1.25
+
+# Size after which the spans file is rotated, the previous file is kept as `<path>.1`
+TELEMETRY_MAX_BYTES = int(os.getenv("TELEMETRY_MAX_BYTES", 50 * 2 ** 20))
+
+# Spans waiting to be written, the ones recorded while it is full are dropped (and counted)
+TELEMETRY_QUEUE_SIZE = int(os.getenv("TELEMETRY_QUEUE_SIZE", 10000))
+
+# Upper bounds (seconds) of the Prometheus latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens=0, cache_creation_tokens=0):
+    """
+    Returns the estimated USD cost of a call, or None for models without a known price.
+    `prompt_tokens` includes the cached ones. Dated model names ("gpt-4o-2024-08-06") use
+    the price of their base model.
+    """
+    if not model:
+        return None
+    matches = [name for name in MODEL_PRICES if model == name or model.startswith(f"{name}-")]
+    if not matches:
+        return None
+    prompt_price, completion_price, cached_price = MODEL_PRICES[max(matches, key=len)]
+    uncached_tokens = prompt_tokens - cached_tokens - cache_creation_tokens
+    return (
+        uncached_tokens * prompt_price
+        + cached_tokens * cached_price
+        + cache_creation_tokens * prompt_price * CACHE_WRITE_PREMIUM
+        + completion_tokens * completion_price
+    ) / 1e6
+
+
+class Telemetry:
+    """
+    Collects finished spans (agent runs, LLM calls, tool calls, SendMessage hops) in memory,
+    appends them to a JSON lines file and aggregates them for Prometheus.
+
+    The file is written by a background thread holding it open, so recording a span never
+    waits on the disk; spans recorded while `max_queued` are waiting are dropped. The file
+    is rotated once it reaches `max_bytes` (at most twice that is kept), under a lock file
+    so the processes of a multi-worker server appending to it rotate it only once.
+
+    A span is a dict: turn_id, span_id, parent_id, kind, name, start (unix time), seconds,
+    error and, for LLM calls, model, prompt_tokens, completion_tokens, cached_tokens,
+    cache_creation_tokens and cost_usd.
+    """
+
+    def __init__(self, path=None, max_spans=10000, max_bytes=None, max_queued=None):
+        self.path = path  # JSON lines file, None keeps the spans in memory only
+        self.max_bytes = max_bytes or TELEMETRY_MAX_BYTES
+        self.spans = deque(maxlen=max_spans)
+        self.dropped = 0  # Spans not written because the writer was behind
+        self._lock = threading.Lock()
+        self._latency = {}  # (kind, name) -> [count, sum, errors, bucket counts]
+        self._tokens = {}  # (model, type) -> count
+        self._cost = {}  # model -> USD
+        self._lines = queue.Queue(maxsize=max_queued or TELEMETRY_QUEUE_SIZE)  # Lines waiting to be written, None stops the writer
+        self._writer = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._writer = threading.Thread(target=self._write_loop, name="telemetry-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def record(self, span):
+        line = json.dumps(span, default=str) if self.path else None
+        with self._lock:
+            self.spans.append(span)
+            stats = self._latency.setdefault((span["kind"], span["name"]), [0, 0.0, 0, [0] * len(LATENCY_BUCKETS)])
+            stats[0] += 1
+            stats[1] += span["seconds"]
+            stats[2] += bool(span.get("error"))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if span["seconds"] <= bound:
+                    stats[3][i] += 1
+            if span["kind"] == "llm":
+                model = span.get("model") or "unknown"
+                for token_type in ("prompt", "completion", "cached", "cache_creation"):
+                    key = (model, token_type)
+                    self._tokens[key] = self._tokens.get(key, 0) + (span.get(f"{token_type}_tokens") or 0)
+                self._cost[model] = self._cost.get(model, 0.0) + (span.get("cost_usd") or 0.0)
+        if line:
+            try:
+                self._lines.put_nowait(line)
+            except queue.Full:
+                # The disk is slower than the spans come: losing some beats slowing the turns down
+                with self._lock:
+                    self.dropped += 1
+
+    def _write_loop(self):
+        f = open(self.path, "a")
+        try:
+            while True:
+                # Everything recorded meanwhile is written at once
+                lines = [self._lines.get()]
+                while not self._lines.empty():
+                    lines.append(self._lines.get_nowait())
+                f.write("".join(line + "\n" for line in lines if line is not None))
+                f.flush()
+                if None in lines:
+                    return
+                if f.tell() >= self.max_bytes:
+                    self._rotate()
+                if not _same_file(f, self.path):
+                    # Rotated, by this process or another one writing the same file
+                    f.close()
+                    f = open(self.path, "a")
+        finally:
+            f.close()
+
+    def _rotate(self):
+        with open(self.path + ".lock", "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            # Another process may have rotated it while this one waited for the lock
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+
+    def close(self):
+        """
+        Writes the spans recorded so far to the file and stops the writer.
+        """
+        if self._writer is not None and self._writer.is_alive():
+            self._lines.put(None)
+            self._writer.join()
+
+    def recent_turns(self, limit=20):
+        """
+        Returns the spans of the `limit` most recent turns, grouped by turn id.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        return group_turns(spans, limit)
+
+    def prometheus(self):
+        """
+        Renders the aggregated spans in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP assistant_span_seconds Wall time of agent runs, LLM calls, tool calls and delegations.",
+            "# TYPE assistant_span_seconds histogram",
+        ]
+        with self._lock:
+            latency = {key: (count, total, errors, list(buckets)) for key, (count, total, errors, buckets) in self._latency.items()}
+            tokens, cost, dropped = dict(self._tokens), dict(self._cost), self.dropped
+
+        for (kind, name), (count, total, errors, buckets) in sorted(latency.items()):
+            labels = f'kind="{kind}",name="{_escape(name)}"'
+            for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                lines.append(f'assistant_span_seconds_bucket{{{labels},le="{bound}"}} {bucket_count}')
+            lines.append(f'assistant_span_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"assistant_span_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"assistant_span_seconds_count{{{labels}}} {count}")
+
+        lines += ["# HELP assistant_span_errors_total Spans that ended with an error.", "# TYPE assistant_span_errors_total counter"]
+        for (kind, name), (_, _, errors, _) in sorted(latency.items()):
+            lines.append(f'assistant_span_errors_total{{kind="{kind}",name="{_escape(name)}"}} {errors}')
+
+        lines += ["# HELP assistant_llm_tokens_total Tokens used by LLM calls (cached and cache_creation are part of prompt).", "# TYPE assistant_llm_tokens_total counter"]
+        for (model, token_type), count in sorted(tokens.items()):
+            lines.append(f'assistant_llm_tokens_total{{model="{_escape(model)}",type="{token_type}"}} {count}')
+
+        lines += ["# HELP assistant_llm_cost_usd_total Estimated cost of LLM calls.", "# TYPE assistant_llm_cost_usd_total counter"]
+        for model, usd in sorted(cost.items()):
+            lines.append(f'assistant_llm_cost_usd_total{{model="{_escape(model)}"}} {usd:.6f}')
+
+        lines += [
+            "# HELP assistant_telemetry_dropped_spans_total Spans not written to the file because the writer was behind.",
+            "# TYPE assistant_telemetry_dropped_spans_total counter",
+            f"assistant_telemetry_dropped_spans_total {dropped}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def group_turns(spans, limit=20):
+    """
+    Groups `spans` by turn and returns the `limit` most recent turns, oldest first.
+    """
+    turns = {}
+    for span in spans:
+        turns.setdefault(span["turn_id"], []).append(span)
+    ordered = sorted(turns.values(), key=lambda turn_spans: min(span["start"] for span in turn_spans))
+    return ordered[-limit:]
+
+
+def load_spans(path):
+    """
+    Returns the spans of the file at `path`, preceded by those of its rotated file if any.
+    """
+    spans = []
+    for file_path in (path + ".1", path):
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path) as f:
+            for line in f:
+                if line.strip():
+                    spans.append(json.loads(line))
+    return spans
+
+
+def _same_file(f, path):
+    try:
+        return os.path.samestat(os.fstat(f.fileno()), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
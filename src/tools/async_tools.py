@@ -0,0 +1,35 @@
+import os
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+# Blocking SDKs (googleapiclient, smtplib, selenium...) run on their own bounded pool when tools are awaited,
+# so they can't starve the event loop's default executor
+_blocking_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("BLOCKING_TOOL_THREADS", 32)),
+    thread_name_prefix="blocking-tool"
+)
+
+
+def run_in_tool_executor(func):
+    """
+    Returns a coroutine function running the synchronous `func` on the blocking tools pool.
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        # Copy the context so tracing and callbacks follow the call into the worker thread
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(_blocking_executor, call)
+
+    return wrapper
+
+
+def add_async(tool, coroutine=None):
+    """
+    Gives `tool` an async implementation used by `ainvoke`: the native `coroutine` when
+    there is one, else its synchronous function run on the blocking tools pool.
+    """
+    tool.coroutine = coroutine or run_in_tool_executor(tool.func)
+    return tool
@@ -1,4 +1,5 @@
 from .create_event import add_event_to_calendar
 from .get_events import get_calendar_events
+from .find_free_slots import find_free_slots
 
-__all__ = ['add_event_to_calendar', 'get_calendar_events']
+__all__ = ['add_event_to_calendar', 'get_calendar_events', 'find_free_slots']
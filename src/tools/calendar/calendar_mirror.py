@@ -0,0 +1,240 @@
+import os
+import json
+import time
+import math
+import asyncio
+import sqlite3
+import threading
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from src.utils import get_google_service
+
+# Time zone of the calendar (all-day events start and end at its midnight), overriding the one Google Calendar reports
+CALENDAR_TIMEZONE = os.getenv("CALENDAR_TIMEZONE")
+
+# Seconds between two syncs, and after which the mirror is synced again before being read
+CALENDAR_SYNC_INTERVAL = float(os.getenv("CALENDAR_SYNC_INTERVAL", 60))
+CALENDAR_MAX_STALENESS = float(os.getenv("CALENDAR_MAX_STALENESS", 120))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY,  -- Explicit, so VACUUM keeps it (the index rows point to it)
+    id TEXT NOT NULL UNIQUE,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    event TEXT NOT NULL  -- The event as returned by the API, JSON
+);
+-- Interval index on [start, end] in minutes: overlap queries read only the matching events
+CREATE VIRTUAL TABLE IF NOT EXISTS events_index USING rtree_i32 (seq, start_minute, end_minute);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_mirror = None
+_calendar_timezone = None  # Reported by Google Calendar, when there is no mirror keeping it
+
+
+def event_time(value, tz=None):
+    """
+    Returns the Unix time of an event start or end, timed ("dateTime") or all-day ("date",
+    midnight in the `tz` time zone, the calendar's by default).
+    """
+    if "dateTime" in value:
+        return datetime.fromisoformat(value["dateTime"]).timestamp()
+    return datetime.fromisoformat(value["date"]).replace(tzinfo=ZoneInfo(tz or calendar_timezone())).timestamp()
+
+
+def calendar_timezone():
+    """
+    Returns the time zone of the primary calendar: CALENDAR_TIMEZONE when set, otherwise the
+    one Google Calendar reports (kept by the mirror, or asked once), UTC if it can't be known.
+    """
+    global _calendar_timezone
+    if CALENDAR_TIMEZONE:
+        return CALENDAR_TIMEZONE
+    if _mirror is not None and _mirror.is_ready():
+        return _mirror.timezone
+    if _calendar_timezone is None:
+        try:
+            calendar = get_google_service("calendar", "v3").calendars().get(calendarId='primary').execute()
+            _calendar_timezone = calendar.get('timeZone') or "UTC"
+        except Exception as e:
+            print(f"Could not get the calendar's time zone, using UTC: {e}")
+            return "UTC"
+    return _calendar_timezone
+
+
+class CalendarMirror:
+    """
+    Local copy of the primary calendar's events, in SQLite with an interval index, so
+    GetCalendarEvents reads events overlapping a period without calling Google Calendar.
+
+    The first `sync` lists every event (recurring events expanded into their instances);
+    the next ones only ask for the changes since the last sync with the returned syncToken,
+    following the result pages. Events created by the assistant are written to the mirror
+    right away (`store_event`), and a mirror not synced for `max_staleness` seconds is
+    synced before it is read.
+    """
+
+    def __init__(self, path, max_staleness=None, service_factory=None, calendar_id='primary', timezone=None):
+        self.path = path
+        self.timezone_override = timezone or CALENDAR_TIMEZONE  # Otherwise the calendar's, from the last sync
+        self.max_staleness = max_staleness or CALENDAR_MAX_STALENESS
+        self.service_factory = service_factory or (lambda: get_google_service("calendar", "v3"))
+        self.calendar_id = calendar_id
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+        self._sync_lock = threading.Lock()  # One sync at a time, concurrent callers wait for it
+
+    def _state(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, conn, **values):
+        conn.executemany(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", [(k, str(v)) for k, v in values.items()]
+        )
+
+    def is_ready(self):
+        """
+        Whether the first sync is done.
+        """
+        return self._state("sync_token") is not None
+
+    @property
+    def timezone(self):
+        """
+        Time zone of the all-day events: the override, or the one of the calendar as of the last sync.
+        """
+        return self.timezone_override or self._state("time_zone") or "UTC"
+
+    def is_fresh(self):
+        return time.time() - float(self._state("last_sync", 0)) <= self.max_staleness
+
+    def _delete(self, conn, ids):
+        conn.executemany("DELETE FROM events_index WHERE seq = (SELECT seq FROM events WHERE id = ?)", [(i,) for i in ids])
+        conn.executemany("DELETE FROM events WHERE id = ?", [(i,) for i in ids])
+
+    def _store(self, conn, events, tz):
+        # Cancelled events (deleted, or a removed instance of a recurring event) are only listed to be dropped
+        self._delete(conn, [event['id'] for event in events])
+        for event in events:
+            if event.get('status') == 'cancelled' or 'start' not in event:
+                continue
+            start = event_time(event['start'], tz)
+            end = event_time(event.get('end', event['start']), tz)
+            cursor = conn.execute(
+                "INSERT INTO events (id, start_ts, end_ts, event) VALUES (?, ?, ?, ?)",
+                (event['id'], start, end, json.dumps(event))
+            )
+            # Minutes rounded outwards, the exact times are checked on the events table
+            conn.execute(
+                "INSERT INTO events_index VALUES (?, ?, ?)", (cursor.lastrowid, math.floor(start / 60), math.ceil(end / 60))
+            )
+
+    def store_event(self, event):
+        """
+        Adds or updates an event just created or changed through the API.
+        """
+        tz = self.timezone
+        with self.lock, self.conn:
+            self._store(self.conn, [event], tz)
+
+    def sync(self):
+        """
+        Fetches the changes since the last sync (every event on the first one, or when Google
+        expired the sync token) and applies them. Returns the number of events changed.
+
+        The calendar's time zone, returned with the events, is stored along the sync token.
+        """
+        from googleapiclient.errors import HttpError
+
+        with self._sync_lock:
+            sync_token = self._state("sync_token")
+            stored_time_zone = self._state("time_zone")
+            full = sync_token is None
+            try:
+                events, sync_token, time_zone = self._list_changes(sync_token)
+            except HttpError as error:
+                if error.resp.status != 410 or full:
+                    raise
+                # Google expired the sync token, list every event again
+                full = True
+                events, sync_token, time_zone = self._list_changes(None)
+            time_zone = time_zone or stored_time_zone or "UTC"
+            if not full and not self.timezone_override and time_zone != stored_time_zone:
+                # The calendar moved to another time zone, the stored all-day events are placed at the old midnight
+                full = True
+                events, sync_token, time_zone = self._list_changes(None)
+                time_zone = time_zone or "UTC"
+            with self.lock, self.conn:
+                if full:
+                    self.conn.execute("DELETE FROM events_index")
+                    self.conn.execute("DELETE FROM events")
+                self._store(self.conn, events, self.timezone_override or time_zone)
+                self._set_state(self.conn, sync_token=sync_token, time_zone=time_zone, last_sync=time.time())
+            return len(events)
+
+    def _list_changes(self, sync_token):
+        service = self.service_factory()
+        events, page_token = [], None
+        while True:
+            params = {"calendarId": self.calendar_id, "singleEvents": True, "maxResults": 2500, "pageToken": page_token}
+            if sync_token:
+                params["syncToken"] = sync_token
+            results = service.events().list(**params).execute()
+            events += results.get('items', [])
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return events, results.get('nextSyncToken'), results.get('timeZone')
+
+    def events_between(self, start, end):
+        """
+        Returns the events overlapping the `start` - `end` Unix times, by start time.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT e.event FROM events_index i JOIN events e ON e.seq = i.seq "
+                "WHERE i.start_minute <= ? AND i.end_minute >= ? AND e.start_ts < ? AND e.end_ts > ? "
+                "ORDER BY e.start_ts, e.id",
+                (math.ceil(end / 60), math.floor(start / 60), end, start)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def stats(self):
+        with self.lock:
+            events = self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+        last_sync = float(self._state("last_sync", 0))
+        return {"events": events, "seconds_since_sync": time.time() - last_sync if last_sync else None}
+
+    async def run_forever(self, interval=None):
+        """
+        Syncs the calendar every `interval` seconds, off the event loop, until cancelled.
+        """
+        interval = interval or CALENDAR_SYNC_INTERVAL
+        while True:
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                print(f"Calendar sync failed: {e}")
+            await asyncio.sleep(interval)
+
+
+def enable_calendar_mirror(path="db/calendar.sqlite", **kwargs):
+    """
+    Makes the calendar tools read and write through the mirror at `path`. Returns the
+    CalendarMirror, whose `run_forever` keeps it in sync.
+    """
+    global _mirror
+    if _mirror is None:
+        _mirror = CalendarMirror(path, **kwargs)
+    return _mirror
+
+
+def get_calendar_mirror():
+    """
+    Returns the CalendarMirror, or None if it isn't enabled.
+    """
+    return _mirror
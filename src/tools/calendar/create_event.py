@@ -2,9 +2,9 @@ from datetime import datetime, timedelta
 from langsmith import traceable
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from src.utils import get_credentials
+from src.tools.async_tools import add_async
+from src.utils import get_google_service
+from src.tools.calendar.calendar_mirror import get_calendar_mirror
 
 class AddEventToCalendarInput(BaseModel):
     title: str = Field(description="Title of the event")
@@ -15,9 +15,11 @@ class AddEventToCalendarInput(BaseModel):
 @traceable(run_type="tool", name="AddEventToCalendar")
 def add_event_to_calendar(title: str, description: str, start_time: str):
     "Use this to create a new event in my calendar"
+    # Google client libraries are only imported on first use to keep startup fast
+    from googleapiclient.errors import HttpError
+
     try:
-        creds = get_credentials()
-        service = build("calendar", "v3", credentials=creds)
+        service = get_google_service("calendar", "v3")
 
         # Convert the string to a datetime object
         event_datetime = datetime.fromisoformat(start_time)
@@ -36,7 +38,14 @@ def add_event_to_calendar(title: str, description: str, start_time: str):
         }
 
         event = service.events().insert(calendarId='primary', body=event).execute()
+        mirror = get_calendar_mirror()
+        if mirror is not None:
+            # Written through, so the event is seen before the next sync
+            mirror.store_event(event)
         return f"Event created successfully. Event ID: {event.get('id')}"
 
     except HttpError as error:
-        return f"An error occurred: {error}"
\ No newline at end of file
+        return f"An error occurred: {error}"
+
+# googleapiclient is synchronous, `ainvoke` runs it on the blocking tools pool
+add_async(add_event_to_calendar)
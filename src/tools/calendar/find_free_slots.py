@@ -0,0 +1,143 @@
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from langsmith import traceable
+from pydantic import BaseModel, Field
+from langchain_core.tools import tool
+from src.tools.async_tools import add_async
+from src.utils import get_google_service
+from src.tools.calendar.calendar_mirror import calendar_timezone, event_time
+from src.tools.calendar.get_events import read_through_mirror
+
+# Most free slots returned per call
+MAX_FREE_SLOTS = 10
+
+class FindFreeSlotsInput(BaseModel):
+    start_date: str = Field(description="Start of the period to search")
+    end_date: str = Field(description="End of the period to search")
+    duration_minutes: int = Field(default=30, description="Minimum length of a free slot, in minutes")
+    day_start: str = Field(default="09:00", description="Start of the working day (HH:MM)")
+    day_end: str = Field(default="18:00", description="End of the working day (HH:MM)")
+    buffer_minutes: int = Field(default=0, description="Free time to keep before and after every event, in minutes")
+    include_weekends: bool = Field(default=False, description="Also search Saturdays and Sundays")
+
+def merge_intervals(intervals, buffer=0):
+    """
+    Returns the (start, end) intervals widened by `buffer` on both sides, sorted and with
+    the overlapping or touching ones merged.
+    """
+    merged = []
+    for start, end in sorted((start - buffer, end + buffer) for start, end in intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def free_slots(busy, start, end, duration, day_start=time(9), day_end=time(18), buffer=0, weekends=False, limit=MAX_FREE_SLOTS):
+    """
+    Returns up to `limit` free (start, end) Unix time intervals of at least `duration`
+    seconds between the `start` and `end` datetimes, within the working hours of each day
+    (in the time zone of `start`), outside the `busy` intervals widened by `buffer` seconds.
+    """
+    busy = merge_intervals(busy, buffer)
+    slots, i = [], 0
+    day = start.date()
+    while day <= end.date() and len(slots) < limit:
+        if weekends or day.weekday() < 5:
+            window_start = max(start.timestamp(), datetime.combine(day, day_start, start.tzinfo).timestamp())
+            window_end = min(end.timestamp(), datetime.combine(day, day_end, start.tzinfo).timestamp())
+            cursor = window_start
+            # Busy intervals are sorted and the days increasing: the ones already over are never looked at again
+            while i < len(busy) and busy[i][1] <= cursor:
+                i += 1
+            j = i
+            while j < len(busy) and busy[j][0] < window_end:
+                if busy[j][0] - cursor >= duration:
+                    slots.append((cursor, busy[j][0]))
+                cursor = max(cursor, busy[j][1])
+                j += 1
+            if window_end - cursor >= duration:
+                slots.append((cursor, window_end))
+        day += timedelta(days=1)
+    return slots[:limit]
+
+def is_busy(event):
+    """
+    Whether an event blocks its time, like the freeBusy API: not if marked as free or declined.
+    """
+    if event.get('transparency') == 'transparent':
+        return False
+    return not any(attendee.get('self') and attendee.get('responseStatus') == 'declined' for attendee in event.get('attendees', []))
+
+def busy_intervals(start_datetime, end_datetime):
+    """
+    Returns the busy (start, end) Unix time intervals of the period, from the calendar
+    mirror when there is one, otherwise from the Calendar freeBusy API.
+    """
+    events = read_through_mirror(start_datetime, end_datetime)
+    if events is not None:
+        tz = calendar_timezone()
+        return [(event_time(e['start'], tz), event_time(e.get('end', e['start']), tz)) for e in events if is_busy(e)]
+
+    service = get_google_service("calendar", "v3")
+    result = service.freebusy().query(body={
+        "timeMin": start_datetime.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        "timeMax": end_datetime.astimezone(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        "items": [{"id": "primary"}],
+    }).execute()
+    return [
+        (datetime.fromisoformat(b['start']).timestamp(), datetime.fromisoformat(b['end']).timestamp())
+        for b in result['calendars']['primary'].get('busy', [])
+    ]
+
+@tool("FindFreeSlots", args_schema=FindFreeSlotsInput)
+@traceable(run_type="tool", name="FindFreeSlots")
+def find_free_slots(
+    start_date: str,
+    end_date: str,
+    duration_minutes: int = 30,
+    day_start: str = "09:00",
+    day_end: str = "18:00",
+    buffer_minutes: int = 0,
+    include_weekends: bool = False
+):
+    "Use this to find when I am free between 2 time periods, for a given duration and within working hours"
+    # Google client libraries are only imported on first use to keep startup fast
+    from googleapiclient.errors import HttpError
+
+    try:
+        # Working hours, dates given without a time zone and all-day events are in the calendar's time zone
+        tz_name = calendar_timezone()
+        tz = ZoneInfo(tz_name)
+        start_datetime = datetime.fromisoformat(start_date)
+        end_datetime = datetime.fromisoformat(end_date)
+        start_datetime = start_datetime if start_datetime.tzinfo else start_datetime.replace(tzinfo=tz)
+        end_datetime = end_datetime if end_datetime.tzinfo else end_datetime.replace(tzinfo=tz)
+        if len(end_date.strip()) == 10:
+            end_datetime += timedelta(days=1)  # An end date without a time includes that day
+
+        busy = busy_intervals(start_datetime, end_datetime)
+        slots = free_slots(
+            busy,
+            start_datetime.astimezone(tz),
+            end_datetime.astimezone(tz),
+            duration_minutes * 60,
+            time.fromisoformat(day_start),
+            time.fromisoformat(day_end),
+            buffer=buffer_minutes * 60,
+            weekends=include_weekends
+        )
+
+        if not slots:
+            return f"No free slot of {duration_minutes} minutes between {day_start} and {day_end} in this period."
+        lines = []
+        for slot_start, slot_end in slots:
+            slot_start, slot_end = datetime.fromtimestamp(slot_start, tz), datetime.fromtimestamp(slot_end, tz)
+            lines.append(f"- {slot_start:%a %Y-%m-%d %H:%M}-{slot_end:%H:%M}")
+        return f"Free slots ({tz_name}):\n" + "\n".join(lines)
+
+    except HttpError as error:
+        return f"An error occurred: {error}"
+
+# googleapiclient is synchronous, `ainvoke` runs it on the blocking tools pool
+add_async(find_free_slots)
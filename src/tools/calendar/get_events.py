@@ -2,49 +2,81 @@ from datetime import datetime, timezone
 from langsmith import traceable
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from src.utils import get_credentials
+from src.tools.async_tools import add_async
+from src.utils import get_google_service
+from src.tools.calendar.calendar_mirror import get_calendar_mirror
 
 class GetCalendarEventsInput(BaseModel):
     start_date: str = Field(description="Start date for fetching events")
     end_date: str = Field(description="End date for fetching events")
 
+def list_events(start_rfc3339, end_rfc3339):
+    """
+    Lists the events between the 2 times with the Calendar API, following the result pages.
+    """
+    service = get_google_service("calendar", "v3")
+    events, page_token = [], None
+    while True:
+        results = service.events().list(
+            calendarId='primary',
+            timeMin=start_rfc3339,
+            timeMax=end_rfc3339,
+            singleEvents=True,
+            orderBy='startTime',
+            maxResults=2500,
+            pageToken=page_token
+        ).execute()
+        events += results.get('items', [])
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            return events
+
+def read_through_mirror(start_datetime, end_datetime):
+    """
+    Returns the events from the calendar mirror, synced first if it is stale, or None when
+    there is no synced mirror to read.
+    """
+    mirror = get_calendar_mirror()
+    if mirror is None or not mirror.is_ready():
+        return None
+    if not mirror.is_fresh():
+        try:
+            mirror.sync()
+        except Exception as e:
+            print(f"Calendar sync failed, reading the Calendar API: {e}")
+            return None
+    return mirror.events_between(start_datetime.timestamp(), end_datetime.timestamp())
+
 @tool("GetCalendarEvents", args_schema=GetCalendarEventsInput)
 @traceable(run_type="tool", name="GetCalendarEvents")
 def get_calendar_events(start_date: str, end_date: str):
     "Use this to get all calendars events between 2 time periods"
-    try:
-        creds = get_credentials()
-        service = build("calendar", "v3", credentials=creds)
+    # Google client libraries are only imported on first use to keep startup fast
+    from googleapiclient.errors import HttpError
 
+    try:
         # Convert string times to datetime objects and ensure they're in UTC
         start_datetime = datetime.fromisoformat(start_date).replace(tzinfo=timezone.utc)
         end_datetime = datetime.fromisoformat(end_date).replace(tzinfo=timezone.utc)
 
-        # Format date-times in RFC3339 format
-        start_rfc3339 = start_datetime.isoformat().replace('+00:00', 'Z')
-        end_rfc3339 = end_datetime.isoformat().replace('+00:00', 'Z')
-
-        events = service.events().list(
-            calendarId='primary',
-            timeMin=start_rfc3339,
-            timeMax=end_rfc3339,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
-
-        if not events:
-            return "No events found in the specified time range."
+        events = read_through_mirror(start_datetime, end_datetime)
+        if events is None:
+            # Format date-times in RFC3339 format
+            start_rfc3339 = start_datetime.isoformat().replace('+00:00', 'Z')
+            end_rfc3339 = end_datetime.isoformat().replace('+00:00', 'Z')
+            events = list_events(start_rfc3339, end_rfc3339)
 
         event_list = []
-        for event in events['items']:
+        for event in events:
             start = event['start'].get('dateTime', event['start'].get('date'))
-            event_list.append(f"Event: {event['summary']}, Description: {event['description']}, Start: {start}")
+            event_list.append(f"Event: {event.get('summary', '')}, Description: {event.get('description', '')}, Start: {start}")
 
         if event_list:
             return "\n".join(event_list)
         return "No event found for this dates"
 
     except HttpError as error:
-        return f"An error occurred: {error}"
\ No newline at end of file
+        return f"An error occurred: {error}"
+
+# googleapiclient is synchronous, `ainvoke` runs it on the blocking tools pool
+add_async(get_calendar_events)
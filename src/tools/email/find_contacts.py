@@ -2,9 +2,8 @@ import re
 from langsmith import traceable
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from src.utils import get_credentials
+from src.tools.async_tools import add_async
+from src.utils import get_google_service
 
 class FindContactEmailInput(BaseModel):
     name: str = Field(description="Name of the contact")
@@ -13,9 +12,11 @@ class FindContactEmailInput(BaseModel):
 @traceable(run_type="tool", name="FindContactEmail")
 def find_contact_email(name: str):
     "Use this to get the a contact email from his name"
+    # Google client libraries are only imported on first use to keep startup fast
+    from googleapiclient.errors import HttpError
+
     try:
-        creds = get_credentials()
-        service = build('people', 'v1', credentials=creds)
+        service = get_google_service('people', 'v1')
 
         # Search for the contact
         results = service.people().searchContacts(
@@ -60,4 +61,7 @@ def find_contact_email(name: str):
         return str(matching_contacts)
 
     except HttpError as error:
-        return f"An error occurred: {error}"
\ No newline at end of file
+        return f"An error occurred: {error}"
+
+# googleapiclient is synchronous, `ainvoke` runs it on the blocking tools pool
+add_async(find_contact_email)
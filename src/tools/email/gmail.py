@@ -0,0 +1,60 @@
+from src.telemetry import span
+
+# messages.get requests per batch HTTP request, Gmail throttles larger batches
+GMAIL_BATCH_SIZE = 50
+
+METADATA_HEADERS = ["Subject", "From", "Date"]
+
+
+def list_message_ids(service, query, max_messages):
+    """
+    Returns the ids of the first `max_messages` messages matching `query`, and whether there are more.
+    """
+    ids, page_token = [], None
+    while len(ids) < max_messages:
+        with span("gmail.messages.list"):
+            results = service.users().messages().list(
+                userId='me', q=query, pageToken=page_token, maxResults=min(500, max_messages - len(ids))
+            ).execute()
+        ids += [message['id'] for message in results.get('messages', [])]
+        page_token = results.get('nextPageToken')
+        if not page_token:
+            break
+    return ids[:max_messages], page_token is not None
+
+
+def get_messages_metadata(service, ids):
+    """
+    Fetches the headers and snippet of the messages, GMAIL_BATCH_SIZE per HTTP request.
+    Returns the messages in the order of `ids`, and the number that couldn't be fetched.
+    """
+    messages, failed = {}, []
+
+    def collect(request_id, response, exception):
+        if exception is not None:
+            failed.append(request_id)
+        else:
+            messages[request_id] = response
+
+    for start in range(0, len(ids), GMAIL_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=collect)
+        for message_id in ids[start:start + GMAIL_BATCH_SIZE]:
+            batch.add(
+                service.users().messages().get(
+                    userId='me', id=message_id, format='metadata', metadataHeaders=METADATA_HEADERS
+                ),
+                request_id=message_id
+            )
+        with span("gmail.batch"):
+            batch.execute()
+    return [messages[message_id] for message_id in ids if message_id in messages], len(failed)
+
+
+def parse_headers(message):
+    """
+    Returns the first value of each header of a message, by lowercase name, in one pass over them.
+    """
+    headers = {}
+    for header in message['payload'].get('headers', []):
+        headers.setdefault(header['name'].lower(), header['value'])
+    return headers
@@ -0,0 +1,248 @@
+import os
+import time
+import asyncio
+import sqlite3
+import threading
+from src.utils import get_google_service
+from src.tools.email.gmail import get_messages_metadata, list_message_ids, parse_headers
+
+# Days of mail imported on a cold start, older emails are read from the Gmail API
+MAILBOX_MIRROR_DAYS = int(os.getenv("MAILBOX_MIRROR_DAYS", 365))
+
+# Seconds between two syncs, and after which the mirror is considered stale without one
+MAILBOX_SYNC_INTERVAL = float(os.getenv("MAILBOX_SYNC_INTERVAL", 60))
+MAILBOX_MAX_STALENESS = float(os.getenv("MAILBOX_MAX_STALENESS", 300))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    seq INTEGER PRIMARY KEY,  -- Explicit, so VACUUM keeps it (the full-text rows point to it)
+    id TEXT NOT NULL UNIQUE,
+    internal_date INTEGER NOT NULL,  -- Milliseconds
+    sender TEXT,
+    subject TEXT,
+    date TEXT,
+    snippet TEXT,
+    labels TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_internal_date ON messages (internal_date);
+-- Rows share the seq of their message
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5 (sender, subject, snippet);
+CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+# Gmail searches leave these out unless asked
+EXCLUDED_LABELS = ("SPAM", "TRASH")
+
+_mirror = None
+
+
+class MailboxMirror:
+    """
+    Local copy of the headers and snippets of the mailbox's recent emails, in SQLite with a
+    full-text index, so ReadEmails answers date and sender searches without calling Gmail.
+    The mirror is filled once by `bulk_import` (the last `days` days of mail) and then kept
+    current by `sync`, which applies the changes listed by Gmail's history API since the last
+    stored historyId.
+
+    `search` only answers for the period the mirror covers, and only while it was synced in
+    the last `max_staleness` seconds; callers use the Gmail API otherwise.
+    """
+
+    def __init__(self, path, days=None, max_staleness=None, service_factory=None):
+        self.path = path
+        self.days = days or MAILBOX_MIRROR_DAYS
+        self.max_staleness = max_staleness or MAILBOX_MAX_STALENESS
+        self.service_factory = service_factory or (lambda: get_google_service('gmail', 'v1'))
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    def _state(self, key, default=None):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_state(self, conn, **values):
+        conn.executemany(
+            "INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", [(k, str(v)) for k, v in values.items()]
+        )
+
+    @property
+    def covered_since(self):
+        """
+        Unix time from which every email is in the mirror, or None before the first import.
+        """
+        value = self._state("covered_since")
+        return float(value) if value is not None else None
+
+    def is_fresh(self):
+        return time.time() - float(self._state("last_sync", 0)) <= self.max_staleness
+
+    def covers(self, after):
+        covered_since = self.covered_since
+        return covered_since is not None and after >= covered_since and self.is_fresh()
+
+    def _store(self, conn, messages):
+        rows = []
+        for message in messages:
+            headers = parse_headers(message)
+            rows.append((
+                message['id'],
+                int(message.get('internalDate', 0)),
+                headers.get('from', 'Unknown Sender'),
+                headers.get('subject', 'No Subject'),
+                headers.get('date', ''),
+                message.get('snippet', ''),
+                " ".join(message.get('labelIds', [])),
+            ))
+        self._delete(conn, [row[0] for row in rows])
+        conn.executemany(
+            "INSERT INTO messages (id, internal_date, sender, subject, date, snippet, labels) VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        conn.executemany(
+            "INSERT INTO messages_fts (rowid, sender, subject, snippet) SELECT seq, sender, subject, snippet FROM messages WHERE id = ?",
+            [(row[0],) for row in rows]
+        )
+
+    def _delete(self, conn, ids):
+        conn.executemany("DELETE FROM messages_fts WHERE rowid = (SELECT seq FROM messages WHERE id = ?)", [(i,) for i in ids])
+        conn.executemany("DELETE FROM messages WHERE id = ?", [(i,) for i in ids])
+
+    def bulk_import(self, max_messages=100000):
+        """
+        Imports the emails of the last `days` days and records the historyId to sync from.
+        Returns the number of emails imported.
+        """
+        service = self.service_factory()
+        # Read before listing, changes made during the import are replayed by the next sync
+        history_id = service.users().getProfile(userId='me').execute()['historyId']
+        since = time.time() - self.days * 86400
+        ids, truncated = list_message_ids(service, f"after:{int(since)}", max_messages)
+        imported, dates = 0, []
+        for start in range(0, len(ids), 500):
+            messages, _ = get_messages_metadata(service, ids[start:start + 500])
+            with self.lock, self.conn:
+                self._store(self.conn, messages)
+            imported += len(messages)
+            dates += [int(m.get('internalDate', 0)) for m in messages]
+        if truncated and dates:
+            # More emails than `max_messages` in the period, the older ones weren't imported
+            since = min(dates) / 1000
+        with self.lock, self.conn:
+            self._set_state(self.conn, history_id=history_id, covered_since=since, last_sync=time.time())
+        return imported
+
+    def sync(self):
+        """
+        Applies the mailbox changes since the last sync. Falls back to a new bulk import when
+        Gmail no longer has the history of the stored historyId (about a week old).
+        Returns the number of emails added, updated or deleted.
+        """
+        from googleapiclient.errors import HttpError
+
+        history_id = self._state("history_id")
+        if history_id is None:
+            return self.bulk_import()
+
+        service = self.service_factory()
+        changed, deleted, page_token = set(), set(), None
+        try:
+            while True:
+                results = service.users().history().list(
+                    userId='me', startHistoryId=history_id, pageToken=page_token,
+                    historyTypes=['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
+                ).execute()
+                for record in results.get('history', []):
+                    for change in record.get('messagesAdded', []) + record.get('labelsAdded', []) + record.get('labelsRemoved', []):
+                        changed.add(change['message']['id'])
+                    for change in record.get('messagesDeleted', []):
+                        deleted.add(change['message']['id'])
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
+        except HttpError as error:
+            if error.resp.status != 404:
+                raise
+            with self.lock, self.conn:
+                self.conn.execute("DELETE FROM messages")
+                self.conn.execute("DELETE FROM messages_fts")
+                self._set_state(self.conn, last_sync=0)  # Searched on the Gmail API until imported again
+            return self.bulk_import()
+
+        changed -= deleted
+        messages, _ = get_messages_metadata(service, sorted(changed)) if changed else ([], 0)
+        with self.lock, self.conn:
+            self._delete(self.conn, deleted)
+            self._store(self.conn, messages)
+            self._set_state(self.conn, history_id=results.get('historyId', history_id), last_sync=time.time())
+        return len(changed) + len(deleted)
+
+    def search(self, after, before, sender=None, keywords=None, limit=500):
+        """
+        Returns the emails received between the `after` and `before` Unix times, newest
+        first, from `sender` (matched in the From header) and containing `keywords` (in the
+        sender, subject or snippet only, the bodies aren't mirrored), as dicts with the sender,
+        subject, date and snippet.
+        """
+        query = "SELECT m.sender, m.subject, m.date, m.snippet FROM messages m"
+        conditions, params = ["m.internal_date > ?", "m.internal_date < ?"], [after * 1000, before * 1000]
+        words = keywords.split() if keywords else []
+        if words:
+            query += " JOIN messages_fts f ON f.rowid = m.seq"
+            conditions.append("messages_fts MATCH ?")
+            # Every word quoted, so the FTS5 query syntax in user input is matched as text
+            params.append(" ".join('"' + word.replace('"', '""') + '"' for word in words))
+        if sender:
+            conditions.append("m.sender LIKE ?")
+            params.append(f"%{sender}%")
+        for label in EXCLUDED_LABELS:
+            conditions.append("' ' || m.labels || ' ' NOT LIKE ?")
+            params.append(f"% {label} %")
+        # Gmail ids grow with time, they order the emails received in the same millisecond
+        query += " WHERE " + " AND ".join(conditions) + " ORDER BY m.internal_date DESC, m.id DESC LIMIT ?"
+        with self.lock:
+            rows = self.conn.execute(query, params + [limit]).fetchall()
+        return [{"from": row[0], "subject": row[1], "date": row[2], "snippet": row[3]} for row in rows]
+
+    def stats(self):
+        with self.lock:
+            messages = self.conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+        last_sync = float(self._state("last_sync", 0))
+        return {
+            "messages": messages,
+            "covered_since": self.covered_since,
+            "seconds_since_sync": time.time() - last_sync if last_sync else None,
+        }
+
+    async def run_forever(self, interval=None):
+        """
+        Imports the mailbox if needed, then syncs it every `interval` seconds, off the event
+        loop, until cancelled.
+        """
+        interval = interval or MAILBOX_SYNC_INTERVAL
+        while True:
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception as e:
+                print(f"Mailbox sync failed: {e}")
+            await asyncio.sleep(interval)
+
+
+def enable_mailbox_mirror(path="db/mailbox.sqlite", **kwargs):
+    """
+    Makes ReadEmails search the mirror at `path` when it covers the request. Returns the
+    MailboxMirror, whose `run_forever` keeps it in sync.
+    """
+    global _mirror
+    if _mirror is None:
+        _mirror = MailboxMirror(path, **kwargs)
+    return _mirror
+
+
+def get_mailbox_mirror():
+    """
+    Returns the MailboxMirror, or None if it isn't enabled.
+    """
+    return _mirror
+
@@ -1,56 +1,89 @@
-from datetime import datetime, timezone
+import os
+from datetime import datetime
 from typing import Optional
 from langsmith import traceable
 from langchain_core.tools import tool
+from src.tools.async_tools import add_async
+from src.tools.output_compaction import compact_output
 from pydantic import BaseModel, Field
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from email.utils import parsedate_to_datetime
-from src.utils import get_credentials
+from src.utils import get_google_service
+from src.tools.email.gmail import get_messages_metadata, list_message_ids, parse_headers
+from src.tools.email.mailbox_mirror import get_mailbox_mirror
+
+# Most emails read per call, following the result pages of the search
+READ_EMAILS_MAX_MESSAGES = int(os.getenv("READ_EMAILS_MAX_MESSAGES", 500))
 
 class ReadEmailsInput(BaseModel):
     from_date: str = Field(description="From date for reading emails")
     to_date: str = Field(description="To date for reading emails. Always after from_date.")
     email: Optional[str] = Field(description="Email of the contact to read emails from")
+    keywords: Optional[str] = Field(default=None, description="Words the emails must contain")
+
+def search_gmail(from_date, to_date, email=None, keywords=None):
+    """
+    Searches the mailbox with the Gmail API. Returns the emails, whether more emails matched,
+    and the number of emails that couldn't be read.
+    """
+    service = get_google_service('gmail', 'v1')
+
+    query = f'after:{from_date} before:{to_date}'
+    if email:
+        query += f' from:{email}'
+    if keywords:
+        query += f' {keywords}'
+
+    ids, truncated = list_message_ids(service, query, READ_EMAILS_MAX_MESSAGES)
+    messages, failed = get_messages_metadata(service, ids) if ids else ([], 0)
+
+    emails = []
+    for msg in messages:
+        headers = parse_headers(msg)
+        emails.append({
+            "from": headers.get('from', 'Unknown Sender'),
+            "subject": headers.get('subject', 'No Subject'),
+            "date": headers.get('date', ''),
+            "snippet": msg.get('snippet', ''),
+        })
+    return emails, truncated, failed
 
 @tool("ReadEmails", args_schema=ReadEmailsInput)
 @traceable(run_type="tool", name="ReadEmails")
-def read_emails(from_date: str, to_date: str, email: Optional[str] = None):
+def read_emails(from_date: str, to_date: str, email: Optional[str] = None, keywords: Optional[str] = None):
     "Use this to read emails from my inbox"
-    try:
-        creds = get_credentials()
-        service = build('gmail', 'v1', credentials=creds)
+    # Google client libraries are only imported on first use to keep startup fast
+    from googleapiclient.errors import HttpError
 
+    try:
         # Convert datetime objects to timestamps
         from_date = int(datetime.fromisoformat(from_date).timestamp())
         to_date = int(datetime.fromisoformat(to_date).timestamp())
 
-        query = f'after:{from_date} before:{to_date}'
-        if email:
-            query += f' from:{email}'
+        mirror = get_mailbox_mirror()
+        # Keyword searches go to Gmail, which also matches the email bodies the mirror doesn't have
+        if mirror is not None and not (keywords and keywords.split()) and mirror.covers(from_date):
+            # Recent enough and synced, answered from the local copy of the mailbox
+            emails = mirror.search(from_date, to_date, sender=email, limit=READ_EMAILS_MAX_MESSAGES + 1)
+            emails, truncated, failed = emails[:READ_EMAILS_MAX_MESSAGES], len(emails) > READ_EMAILS_MAX_MESSAGES, 0
+        else:
+            emails, truncated, failed = search_gmail(from_date, to_date, email, keywords)
 
-        results = service.users().messages().list(userId='me', q=query).execute()
-        messages = results.get('messages', [])
-
-        if not messages:
+        if not emails:
             return "No emails found in the specified time range."
 
-        email_list = []
-        for message in messages:
-            msg = service.users().messages().get(userId='me', id=message['id']).execute()
-
-            subject = next((header['value'] for header in msg['payload']['headers'] if header['name'] == 'Subject'), 'No Subject')
-            from_email = next((header['value'] for header in msg['payload']['headers'] if header['name'] == 'From'), 'Unknown Sender')
-            date = next((header['value'] for header in msg['payload']['headers'] if header['name'] == 'Date'), '')
-            date_obj = parsedate_to_datetime(date)
-            if date_obj.tzinfo is None:
-                date_obj = date_obj.replace(tzinfo=timezone.utc)
-
-
-            snippet = msg['snippet']
-            email_list.append(f"From: {from_email}\nSubject: {subject}\nDate: {date}\nSnippet: {snippet}\n")
-
+        email_list = [
+            f"From: {e['from']}\nSubject: {e['subject']}\nDate: {e['date']}\nSnippet: {e['snippet']}\n" for e in emails
+        ]
+        if failed:
+            email_list.append(f"{failed} emails couldn't be read.")
+        if truncated:
+            email_list.append(f"Only the first {len(emails)} emails are shown, narrow the dates or the sender to see the others.")
         return "\n".join(email_list)
 
     except HttpError as error:
-        return f"An error occurred: {error}"
\ No newline at end of file
+        return f"An error occurred: {error}"
+
+# googleapiclient is synchronous, `ainvoke` runs it on the blocking tools pool
+add_async(read_emails)
+
+# A wide date range can match hundreds of emails, keep the ones matching the request
+compact_output(read_emails)
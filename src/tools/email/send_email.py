@@ -1,10 +1,8 @@
 import os
-import smtplib
 from langsmith import traceable
 from langchain_core.tools import tool
+from src.tools.async_tools import add_async
 from pydantic import BaseModel, Field
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 
 class SendEmailInput(BaseModel):
     to: str = Field(description="Email of the recipient")
@@ -15,6 +13,10 @@ class SendEmailInput(BaseModel):
 @traceable(run_type="tool", name="SendEmail")
 def send_email(to: str, subject: str, body: str):
     "Use this to send an email to my contacts"
+    import smtplib
+    from email.mime.text import MIMEText
+    from email.mime.multipart import MIMEMultipart
+
     try:
         sender_email = os.getenv("GMAIL_MAIL")
         app_password = os.getenv("GMAIL_APP_PASSWORD")
@@ -32,4 +34,7 @@ def send_email(to: str, subject: str, body: str):
         server.quit()
         return "Email sent successfully."
     except Exception as e:
-        return f"Email was not sent successfully, error: {e}"
\ No newline at end of file
+        return f"Email was not sent successfully, error: {e}"
+
+# smtplib only blocks, `ainvoke` runs it on the blocking tools pool
+add_async(send_email)
@@ -3,7 +3,7 @@ from enum import Enum
 from langsmith import traceable
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
-from notion_client import Client
+from src.tools.async_tools import add_async
 
 class TaskStatus(Enum):
     NOT_STARTED = "Not started"
@@ -14,28 +14,42 @@ class AddTaskInTodoListInput(BaseModel):
     task: str = Field(description="Task to be added")
     date: str = Field(description="Date and time for the task (YYYY-MM-DD) (HH:MM)")
 
+def _new_task_page(task, date):
+    # Create new task
+    new_task = {
+        "Title": {"title": [{"text": {"content": task}}]},
+        "Status": {"status": {"name": TaskStatus.NOT_STARTED.value}},
+    }
+    if date:
+        new_task["Date"] = {"date": {"start": date}}
+    return {"parent": {"database_id": os.getenv("NOTION_DATABASE_ID")}, "properties": new_task}  # Your database ID
+
+def _task_added(task, date):
+    return f"Task '{task}' added successfully to Todo list for {date}."
+
 @tool("AddTaskInTodoList", args_schema=AddTaskInTodoListInput)
 @traceable(run_type="tool", name="AddTaskInTodoList")
 def add_task_in_todo_list(task: str, date: str):
     "Use this to add a new task to my todo list"
     try:
-        # Initialize the Notion client
+        # Initialize the Notion client (imported on first use to keep startup fast)
+        from notion_client import Client
         notion = Client(auth=os.getenv("NOTION_TOKEN"))
 
-        # Create new task
-        new_task = {
-            "Title": {"title": [{"text": {"content": task}}]},
-            "Status": {"status": {"name": TaskStatus.NOT_STARTED.value}},
-        }
-        if date:
-            new_task["Date"] = {"date": {"start": date}}
-
         # Add task to Notion
-        notion.pages.create(
-            parent={"database_id": os.getenv("NOTION_DATABASE_ID")}, # Your database ID
-            properties=new_task
-        )
+        notion.pages.create(**_new_task_page(task, date))
+        return _task_added(task, date)
+    except Exception as e:
+        return f"An error occurred: {str(e)}"
 
-        return f"Task '{task}' added successfully to Todo list for {date}."
+@traceable(run_type="tool", name="AddTaskInTodoList")
+async def aadd_task_in_todo_list(task: str, date: str):
+    try:
+        from notion_client import AsyncClient
+        async with AsyncClient(auth=os.getenv("NOTION_TOKEN")) as notion:
+            await notion.pages.create(**_new_task_page(task, date))
+        return _task_added(task, date)
     except Exception as e:
-        return f"An error occurred: {str(e)}"
\ No newline at end of file
+        return f"An error occurred: {str(e)}"
+
+add_async(add_task_in_todo_list, aadd_task_in_todo_list)
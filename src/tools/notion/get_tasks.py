@@ -3,62 +3,87 @@ from datetime import datetime
 from langsmith import traceable
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
-from notion_client import Client
+from src.tools.async_tools import add_async
 
 
 class GetMyTodoListInput(BaseModel):
     date: str = Field(description="Date for which to retrieve tasks (YYYY-MM-DD)")
 
+def _parse_date(date):
+    # Parse the target date string into a datetime object, None if it isn't one
+    try:
+        return datetime.strptime(date, "%Y-%m-%d")
+    except ValueError:
+        print(f"Error: Invalid date format. Please use YYYY-MM-DD format.")
+        return None
+
+def _todo_list_query(date):
+    # Set up the filter to get tasks due on the target date
+    return {
+        "database_id": os.getenv("NOTION_DATABASE_ID"),  # Your database ID
+        "filter": {
+            "property": "Date",
+            "date": {
+                "equals": date
+            }
+        }
+    }
+
+def _format_todo_list(results, target_datetime):
+    tasks = []
+
+    for page in results["results"]:
+        due_date = page["properties"]["Date"]["date"]["start"]
+
+        # Parse the due date from Notion
+        due_datetime = datetime.fromisoformat(due_date.replace("Z", "+00:00"))
+
+        # Check if the task is due on the target date
+        if due_datetime.date() == target_datetime.date():
+            task = {
+                "id": page["id"],
+                "title": page["properties"]["Title"]["title"][0]["text"]["content"],
+                "status": page["properties"]["Status"]["status"]["name"],
+                "due_date": due_date
+            }
+            tasks.append(task)
+
+    if tasks:
+        return f"Todo list for {target_datetime}:\n" + "\n".join([str(task) for task in tasks])
+    else:
+        return f"No tasks found in Todo list for {target_datetime}."
+
 @tool("GetMyTodoList", args_schema=GetMyTodoListInput)
 @traceable(run_type="tool", name="GetMyTodoList")
 def get_my_todo_list(date: str):
     "Use this to get all tasks from my todo list"
     try:
-        # Parse the target date string into a datetime object
-        try:
-            target_datetime = datetime.strptime(date, "%Y-%m-%d")
-        except ValueError:
-            print(f"Error: Invalid date format. Please use YYYY-MM-DD format.")
+        target_datetime = _parse_date(date)
+        if target_datetime is None:
             return []
 
-        # Set up the filter to get tasks due on the target date
-        filter_params = {
-            "filter": {
-                "property": "Date",
-                "date": {
-                    "equals": date
-                }
-            }
-        }
-        
-        # Initialize the Notion client
+        # Initialize the Notion client (imported on first use to keep startup fast)
+        from notion_client import Client
         notion = Client(auth=os.getenv("NOTION_TOKEN"))
-        results = notion.databases.query(
-            database_id=os.getenv("NOTION_DATABASE_ID"), # Your database ID
-            **filter_params
-        )
-        tasks = []
-
-        for page in results["results"]:
-            due_date = page["properties"]["Date"]["date"]["start"]
-
-            # Parse the due date from Notion
-            due_datetime = datetime.fromisoformat(due_date.replace("Z", "+00:00"))
-
-            # Check if the task is due on the target date
-            if due_datetime.date() == target_datetime.date():
-                task = {
-                    "id": page["id"],
-                    "title": page["properties"]["Title"]["title"][0]["text"]["content"],
-                    "status": page["properties"]["Status"]["status"]["name"],
-                    "due_date": due_date
-                }
-                tasks.append(task)
-
-        if tasks:
-            return f"Todo list for {target_datetime}:\n" + "\n".join([str(task) for task in tasks])
-        else:
-            return f"No tasks found in Todo list for {target_datetime}."
+        results = notion.databases.query(**_todo_list_query(date))
+        return _format_todo_list(results, target_datetime)
+
+    except Exception as e:
+        return f"An error occurred: {str(e)}"
+
+@traceable(run_type="tool", name="GetMyTodoList")
+async def aget_my_todo_list(date: str):
+    try:
+        target_datetime = _parse_date(date)
+        if target_datetime is None:
+            return []
+
+        from notion_client import AsyncClient
+        async with AsyncClient(auth=os.getenv("NOTION_TOKEN")) as notion:
+            results = await notion.databases.query(**_todo_list_query(date))
+        return _format_todo_list(results, target_datetime)
 
     except Exception as e:
-        return f"An error occurred: {str(e)}"
\ No newline at end of file
+        return f"An error occurred: {str(e)}"
+
+add_async(get_my_todo_list, aget_my_todo_list)
@@ -0,0 +1,235 @@
+import os
+import re
+import math
+import time
+import uuid
+import functools
+import threading
+from collections import Counter, OrderedDict
+from typing import Optional
+from pydantic import BaseModel, Field
+from langchain_core.tools import tool
+
+# Tool results over this many tokens are cut down to the passages most relevant to the agent's request
+TOOL_OUTPUT_MAX_TOKENS = int(os.getenv("TOOL_OUTPUT_MAX_TOKENS", 3000))
+
+# Size of the passages large results are split into
+PASSAGE_TOKENS = 200
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English text
+    return len(text) // 4 + 1
+
+
+def split_passages(output, passage_tokens=PASSAGE_TOKENS):
+    """
+    Splits a tool result into passages of about `passage_tokens` tokens: the items of a list,
+    or the paragraphs of a text (small ones merged, long ones cut at line then word boundaries).
+    """
+    max_chars = passage_tokens * 4
+    if isinstance(output, (list, tuple)):
+        parts = [str(item) for item in output]
+    else:
+        parts = [part.strip() for part in re.split(r"\n\s*\n", str(output)) if part.strip()]
+
+    pieces = []
+    for part in parts:
+        if len(part) <= max_chars:
+            pieces.append(part)
+            continue
+        current = ""
+        for line in part.split("\n"):
+            while len(line) > max_chars:
+                cut = line.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                if current:
+                    pieces.append(current)
+                    current = ""
+                pieces.append(line[:cut])
+                line = line[cut:].lstrip()
+            if current and len(current) + len(line) + 1 > max_chars:
+                pieces.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line
+        if current:
+            pieces.append(current)
+
+    if isinstance(output, (list, tuple)):
+        return pieces
+    # Merge short paragraphs (headings, one-liners) with the next ones so passages carry some context
+    passages = []
+    for piece in pieces:
+        if passages and len(passages[-1]) + len(piece) + 2 <= max_chars:
+            passages[-1] = f"{passages[-1]}\n\n{piece}"
+        else:
+            passages.append(piece)
+    return passages
+
+
+def _terms(text):
+    return re.findall(r"\w+", text.lower())
+
+
+class BM25Index:
+    """
+    Okapi BM25 ranking of passages against a query, built in memory for one tool result.
+    """
+
+    def __init__(self, passages, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(_terms(passage)) for passage in passages]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0
+        document_frequency = Counter(term for counts in self.term_counts for term in counts)
+        count = len(passages)
+        self.idf = {
+            term: math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def scores(self, query):
+        terms = set(_terms(query)) & self.idf.keys()
+        scores = []
+        for counts, length in zip(self.term_counts, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / (self.average_length or 1))
+            for term in terms:
+                frequency = counts.get(term, 0)
+                if frequency:
+                    score += self.idf[term] * frequency * (self.k1 + 1) / (frequency + norm)
+            scores.append(score)
+        return scores
+
+    def rank(self, query):
+        """
+        Returns the passage indexes, best first. Ties (e.g. no query) keep the document order.
+        """
+        scores = self.scores(query) if query else [0.0] * len(self.lengths)
+        return sorted(range(len(scores)), key=lambda index: (-scores[index], index))
+
+
+class OutputStore:
+    """
+    The passages of recently compacted tool results, kept for `ttl` seconds so agents can
+    fetch the parts they weren't shown.
+    """
+
+    def __init__(self, ttl=1800, max_entries=64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # handle -> (created, passages, index, query, shown passage indexes)
+        self._lock = threading.Lock()
+
+    def add(self, passages, index, query, shown):
+        handle = uuid.uuid4().hex[:8]
+        with self._lock:
+            self._entries[handle] = (time.monotonic(), passages, index, query, set(shown))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return handle
+
+    def get(self, handle):
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[handle]
+                return None
+            return entry
+
+
+_store = OutputStore()
+
+
+def _select(passages, order, max_tokens, skip=()):
+    # Best passages first until the budget is spent, the best one is always taken
+    selected, used = [], 0
+    for index in order:
+        if index in skip:
+            continue
+        tokens = estimate_tokens(passages[index])
+        if selected and used + tokens > max_tokens:
+            continue
+        selected.append(index)
+        used += tokens
+        if used >= max_tokens:
+            break
+    return sorted(selected)
+
+
+def _render(passages, selected, handle, shown_count):
+    body = "\n\n[...]\n\n".join(passages[index] for index in selected)
+    remaining = len(passages) - shown_count
+    if not remaining:
+        return body
+    return (
+        f"{body}\n\n[Showing the most relevant passages, {remaining} of {len(passages)} not shown. "
+        f'Use FetchMoreOutput with handle "{handle}" to read more, optionally with a query.]'
+    )
+
+
+def compact(output, query="", max_tokens=None):
+    """
+    Returns `output` unchanged if it fits in `max_tokens`, else its passages most relevant to
+    `query` (in their original order) with a handle to fetch the rest.
+    """
+    max_tokens = max_tokens or TOOL_OUTPUT_MAX_TOKENS
+    if estimate_tokens(str(output)) <= max_tokens:
+        return output
+
+    passages = split_passages(output)
+    index = BM25Index(passages)
+    selected = _select(passages, index.rank(query), max_tokens)
+    handle = _store.add(passages, index, query, selected)
+    return _render(passages, selected, handle, len(selected))
+
+
+def compact_output(tool_, max_tokens=None):
+    """
+    Makes `tool_` (sync and async implementations) compact its large results against the
+    request the agent is working on, read from the `agent_request` run metadata.
+    """
+    from langchain_core.runnables.config import var_child_runnable_config
+
+    def request():
+        config = var_child_runnable_config.get() or {}
+        return (config.get("metadata") or {}).get("agent_request", "")
+
+    func = tool_.func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return compact(func(*args, **kwargs), request(), max_tokens)
+
+    tool_.func = wrapper
+    if tool_.coroutine:
+        coroutine = tool_.coroutine
+
+        @functools.wraps(coroutine)
+        async def async_wrapper(*args, **kwargs):
+            return compact(await coroutine(*args, **kwargs), request(), max_tokens)
+
+        tool_.coroutine = async_wrapper
+    return tool_
+
+
+class FetchMoreOutputInput(BaseModel):
+    handle: str = Field(description="Handle given at the end of a shortened tool result")
+    query: Optional[str] = Field(None, description="What to look for in the rest of the result. Defaults to the original request.")
+
+
+@tool("FetchMoreOutput", args_schema=FetchMoreOutputInput)
+def fetch_more_output(handle: str, query: Optional[str] = None):
+    """
+    Use this tool to read more of a tool result that was shortened to its most relevant passages.
+    """
+    entry = _store.get(handle)
+    if entry is None:
+        return f"No result found for handle {handle}, it may have expired. Call the original tool again."
+    _, passages, index, original_query, shown = entry
+    selected = _select(passages, index.rank(query or original_query), TOOL_OUTPUT_MAX_TOKENS, skip=shown)
+    if not selected:
+        return "Every passage of this result has already been shown."
+    shown.update(selected)
+    return _render(passages, selected, handle, len(shown))
@@ -1,33 +1,34 @@
 import re
-import html2text
+import asyncio
 import requests
-from bs4 import BeautifulSoup
 from langsmith import traceable
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
+from src.tools.async_tools import add_async
+from src.tools.output_compaction import compact_output
 
 class ScrapeWebsiteInput(BaseModel):
     url: str = Field(description="The URL of the website to scrape.")
 
-@tool("ScrapeWebsite", args_schema=ScrapeWebsiteInput)
-@traceable(run_type="tool", name="ScrapeWebsite")
-def scrape_website_to_markdown(url: str) -> str:
-    """
-    Use this tool to scrape a website based on its URL.
-    """
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.77 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.5",
-        "Accept-Encoding": "gzip, deflate"
-    }
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.77 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.5",
+    "Accept-Encoding": "gzip, deflate"
+}
 
-    # Make the HTTP request
-    response = requests.get(url, headers=headers)
+def _page_markdown(response):
+    # requests and httpx responses alike
     if response.status_code != 200:
         raise Exception(f"Failed to fetch the URL. Status code: {response.status_code}")
+    return _html_to_markdown(response.text)
+
+def _html_to_markdown(html):
+    # HTML parsing libraries are only imported on first use to keep startup fast
+    import html2text
+    from bs4 import BeautifulSoup
 
     # Parse the HTML
-    soup = BeautifulSoup(response.text, "html.parser")
+    soup = BeautifulSoup(html, "html.parser")
     html_content = soup.prettify() 
 
     # Convert HTML to markdown
@@ -41,4 +42,29 @@ def scrape_website_to_markdown(url: str) -> str:
     markdown_content = re.sub(r"\n{3,}", "\n\n", markdown_content)
     markdown_content = markdown_content.strip()
 
-    return markdown_content
\ No newline at end of file
+    return markdown_content
+
+@tool("ScrapeWebsite", args_schema=ScrapeWebsiteInput)
+@traceable(run_type="tool", name="ScrapeWebsite")
+def scrape_website_to_markdown(url: str) -> str:
+    """
+    Use this tool to scrape a website based on its URL.
+    """
+    # Make the HTTP request
+    response = requests.get(url, headers=HEADERS)
+    return _page_markdown(response)
+
+@traceable(run_type="tool", name="ScrapeWebsite")
+async def ascrape_website_to_markdown(url: str) -> str:
+    import httpx
+
+    async with httpx.AsyncClient(headers=HEADERS, follow_redirects=True) as client:
+        response = await client.get(url)
+
+    # Parsing large pages takes a while, keep it off the event loop
+    return await asyncio.to_thread(_page_markdown, response)
+
+add_async(scrape_website_to_markdown, ascrape_website_to_markdown)
+
+# Whole pages easily reach hundreds of KB, only the passages relevant to the research request are returned
+compact_output(scrape_website_to_markdown)
@@ -2,19 +2,15 @@ import json
 import os
 import re
 import requests
-import html2text
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
 from langsmith import traceable
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
+from src.tools.async_tools import add_async
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate
 from src.utils import get_llm_by_provider
+from src.telemetry import span
 
 def invoke_llm(system_prompt, user_message, model="openai/gpt-4o-mini"):
     # Get the LLM instance by provider
@@ -69,32 +65,41 @@ def scrape_linkedin(linkedin_url):
     """
     Scrapes the LinkedIn profile page and returns the HTML content.
     """
-    # Set up the Chrome WebDriver with headless mode
-    service = Service(ChromeDriverManager().install())
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
-    
-    # Launch Chrome
-    driver = webdriver.Chrome(service=service, options=options)
-    
-    # Log in to LinkedIn
-    driver.get("https://www.linkedin.com/login")
-    time.sleep(5)
-    username = driver.find_element(By.ID, "username")
-    password = driver.find_element(By.ID, "password")
-    username.send_keys(os.getenv("LINKEDIN_USERNAME"))  # Replace with your email
-    password.send_keys(os.getenv("LINKEDIN_PASSWORD"))  # Replace with your password
-    password.send_keys(Keys.RETURN)
-    time.sleep(5)  # Wait for the login to complete
-
-    # Go to a person's profile
-    driver.get(linkedin_url)
-    driver.implicitly_wait(5)
-    
-    # Get the page source
-    html_content = driver.page_source
-    
-    driver.quit()
+    # Selenium and the driver manager are heavy, only import them when a profile is scraped
+    import html2text
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.common.keys import Keys
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    with span("selenium.scrape_linkedin"):
+        # Set up the Chrome WebDriver with headless mode
+        service = Service(ChromeDriverManager().install())
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless")
+
+        # Launch Chrome
+        driver = webdriver.Chrome(service=service, options=options)
+
+        # Log in to LinkedIn
+        driver.get("https://www.linkedin.com/login")
+        time.sleep(5)
+        username = driver.find_element(By.ID, "username")
+        password = driver.find_element(By.ID, "password")
+        username.send_keys(os.getenv("LINKEDIN_USERNAME"))  # Replace with your email
+        password.send_keys(os.getenv("LINKEDIN_PASSWORD"))  # Replace with your password
+        password.send_keys(Keys.RETURN)
+        time.sleep(5)  # Wait for the login to complete
+
+        # Go to a person's profile
+        driver.get(linkedin_url)
+        driver.implicitly_wait(5)
+
+        # Get the page source
+        html_content = driver.page_source
+
+        driver.quit()
     
     # Convert HTML to markdown
     h = html2text.HTML2Text()
@@ -148,4 +153,7 @@ def search_linkedin_tool(person_name: str = None, company_name: str = ""):
     if linkedin_url:
         return scrape_linkedin(linkedin_url)
     else:
-        return "LinkedIn profile not found."
\ No newline at end of file
+        return "LinkedIn profile not found."
+
+# Selenium drives a real browser, `ainvoke` runs the lookup on the blocking tools pool
+add_async(search_linkedin_tool)
@@ -1,12 +1,34 @@
 import os
 from langsmith import traceable
 from langchain_core.tools import tool
+from src.tools.async_tools import add_async
 from pydantic import BaseModel, Field
-from tavily import TavilyClient
 
 class SearchWebInput(BaseModel):
     query: str = Field(description="The search query string")
 
+def _search_params(query, search_type, max_results):
+    return {"query": query, "search_depth": search_type, "max_results": max_results}
+
+def _format_results(search_response):
+    results = search_response["results"]
+
+    if not results:
+        return "No results found."
+
+    formatted_output = ""
+    for result in results:
+        title = result.get('title', result.get('url', 'No Title'))
+        url = result.get('url', 'No URL')
+        content = result.get('content', 'No Content')
+
+        formatted_output += f"Title: {title}\n"
+        formatted_output += f"URL: {url}\n"
+        formatted_output += f"Content: {content}\n"
+        formatted_output += "-" * 20 + "\n"
+
+    return formatted_output
+
 @tool("SearchWeb", args_schema=SearchWebInput)
 @traceable(run_type="tool", name="SearchWeb")
 def search_web(query: str, search_type: str = "basic", max_results: int = 5):
@@ -14,25 +36,23 @@ def search_web(query: str, search_type: str = "basic", max_results: int = 5):
     Use this tool to perform a web search based on the given query.
     """
     try:
+        from tavily import TavilyClient
         client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
-        search_response = client.search(query=query, search_depth=search_type, max_results=max_results)
-        results = search_response["results"]
+        search_response = client.search(**_search_params(query, search_type, max_results))
+        return _format_results(search_response)
 
-        if not results:
-            return "No results found."
-
-        formatted_output = ""
-        for result in results:
-            title = result.get('title', result.get('url', 'No Title'))
-            url = result.get('url', 'No URL')
-            content = result.get('content', 'No Content')
-
-            formatted_output += f"Title: {title}\n"
-            formatted_output += f"URL: {url}\n"
-            formatted_output += f"Content: {content}\n"
-            formatted_output += "-" * 20 + "\n"
+    except Exception as e:
+        return f"An error occurred: {e}"
 
-        return formatted_output
+@traceable(run_type="tool", name="SearchWeb")
+async def asearch_web(query: str, search_type: str = "basic", max_results: int = 5):
+    try:
+        from tavily import AsyncTavilyClient
+        client = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+        search_response = await client.search(**_search_params(query, search_type, max_results))
+        return _format_results(search_response)
 
     except Exception as e:
-        return f"An error occurred: {e}"
\ No newline at end of file
+        return f"An error occurred: {e}"
+
+add_async(search_web, asearch_web)
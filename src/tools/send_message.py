@@ -1,30 +1,157 @@
-from typing import Optional, Type, Dict
-from langchain_core.callbacks import CallbackManagerForToolRun
+import os
+import time
+import asyncio
+from concurrent.futures import wait
+from typing import Optional, Type, Dict, List
+from langchain_core.callbacks import AsyncCallbackManagerForToolRun, CallbackManagerForToolRun
+from langchain_core.runnables.config import ContextThreadPoolExecutor
 from langsmith import traceable
 from pydantic import BaseModel
-from langchain.tools import BaseTool
+from langchain_core.tools import BaseTool
 from src.agents.base import Agent
+from src.agents.base.delegation_cache import DelegationCache
+from src.utils import get_current_date_time
 
 
 class SendMessage(BaseTool):
     name: str = "SendMessage"
-    description: str = "Use this to send a message to one of your sub-agents"
+    description: str = (
+        "Use this to send a message to one of your sub-agents, or to several sub-agents at once "
+        "with `messages` when their tasks don't depend on each other (they then work in parallel)"
+    )
     args_schema: Type[BaseModel]
-    agent_mapping: Dict[str, "Agent"] = None 
+    agent_mapping: Dict[str, "Agent"] = None
+    cache: Optional[DelegationCache] = None  # Recent answers, reused when a sub-agent is asked the same again
+    timeout: float = float(os.getenv("SEND_MESSAGE_TIMEOUT", 180))  # Seconds a delegation or a batch gets to answer
 
     def send_message(self, recipient: str, message: str) -> str:
         agent = self.agent_mapping.get(recipient)
+        if agent and not message:
+            return f"No message to send to {recipient}"
         if agent:
-            response = agent.invoke({"messages": [("human", message)]})
+            cached = self.cache.get(recipient, message) if self.cache else None
+            if cached is not None:
+                return cached
+            start = time.perf_counter()
+            response = agent.invoke({"messages": [("human", _with_date_time(message))]})
+            if self.cache:
+                self.cache.record(recipient, message, response["messages"], time.perf_counter() - start)
             return response["messages"][-1].content
         else:
             return f"Invalid recipient: {recipient}"
 
+    def send_messages(self, messages: List[dict]) -> List[str]:
+        """
+        Sends every (recipient, message) pair to its sub-agent concurrently and returns
+        their answers in the order of `messages`.
+        """
+        # The context is copied into the worker threads, so sub-agent runs stay nested in the current trace
+        executor = ContextThreadPoolExecutor(max_workers=len(messages))
+        try:
+            futures = [
+                executor.submit(self.send_message, item["recipient"], item["message"])
+                for item in messages
+            ]
+            # One deadline for the whole batch: sub-agents still running after `timeout` are reported as not answering
+            wait(futures, timeout=self.timeout)
+            answers = []
+            for item, future in zip(messages, futures):
+                if not future.done():
+                    answers.append(self._timed_out(item["recipient"]))
+                elif future.exception() is not None:
+                    answers.append(f"{item['recipient']} failed: {future.exception()}")
+                else:
+                    answers.append(future.result())
+            return answers
+        finally:
+            # Don't block on sub-agents that timed out, their answers are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def asend_message(self, recipient: str, message: str) -> str:
+        agent = self.agent_mapping.get(recipient)
+        if agent and not message:
+            return f"No message to send to {recipient}"
+        if agent:
+            cached = self.cache.get(recipient, message) if self.cache else None
+            if cached is not None:
+                return cached
+            start = time.perf_counter()
+            response = await agent.ainvoke({"messages": [("human", _with_date_time(message))]})
+            if self.cache:
+                self.cache.record(recipient, message, response["messages"], time.perf_counter() - start)
+            return response["messages"][-1].content
+        else:
+            return f"Invalid recipient: {recipient}"
+
+    async def asend_messages(self, messages: List[dict]) -> List[str]:
+        """
+        Async version of `send_messages`: the sub-agents run as concurrent tasks on the current event loop.
+        """
+        tasks = [asyncio.ensure_future(self.asend_message(item["recipient"], item["message"])) for item in messages]
+        # One deadline for the whole batch, the sub-agents still running then are cancelled
+        await asyncio.wait(tasks, timeout=self.timeout)
+        answers = []
+        for item, task in zip(messages, tasks):
+            if not task.done():
+                task.cancel()
+                answers.append(self._timed_out(item["recipient"]))
+            elif task.exception() is not None:
+                answers.append(f"{item['recipient']} failed: {task.exception()}")
+            else:
+                answers.append(task.result())
+        return answers
+
+    def _timed_out(self, recipient):
+        # The sub-agent may be past the point of no return, asking again could send the email twice
+        return (
+            f"{recipient} did not answer within {self.timeout:g} seconds. It may still complete what it "
+            f"was asked (e.g. send the email or create the event): check before asking again"
+        )
+
+    @staticmethod
+    def _to_batch(recipient, message, messages):
+        batch = [
+            item.model_dump() if isinstance(item, BaseModel) else item
+            for item in messages or []
+        ]
+        # A recipient without a message (or the other way round) gets an error answer instead of being skipped
+        if recipient or message:
+            batch.insert(0, {"recipient": recipient, "message": message})
+        return batch
+
+    @staticmethod
+    def _join(batch, answers):
+        if len(batch) == 1:
+            return answers[0]
+        return "\n\n".join(f"[{item['recipient']}]\n{answer}" for item, answer in zip(batch, answers))
+
     @traceable(run_type="tool", name="SendMessage")
     def _run(
         self,
-        recipient: str,
-        message: str,
+        recipient: Optional[str] = None,
+        message: Optional[str] = None,
+        messages: Optional[List[BaseModel]] = None,
         run_manager: Optional[CallbackManagerForToolRun] = None,
     ) -> str:
-        return self.send_message(recipient, message)
\ No newline at end of file
+        batch = self._to_batch(recipient, message, messages)
+        if not batch:
+            return "Provide a recipient and a message, or a list of messages"
+        return self._join(batch, self.send_messages(batch))
+
+    @traceable(run_type="tool", name="SendMessage")
+    async def _arun(
+        self,
+        recipient: Optional[str] = None,
+        message: Optional[str] = None,
+        messages: Optional[List[BaseModel]] = None,
+        run_manager: Optional[AsyncCallbackManagerForToolRun] = None,
+    ) -> str:
+        batch = self._to_batch(recipient, message, messages)
+        if not batch:
+            return "Provide a recipient and a message, or a list of messages"
+        return self._join(batch, await self.asend_messages(batch))
+
+
+def _with_date_time(message):
+    # The date is the only volatile part of a sub-agent's prompt, it goes last so the prefix stays cacheable
+    return f"{message}\nCurrent Date/time: {get_current_date_time()}"
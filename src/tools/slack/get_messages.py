@@ -3,8 +3,8 @@ import re
 from langsmith import traceable
 from pydantic import BaseModel
 from langchain_core.tools import tool
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
+from src.tools.async_tools import add_async
+from src.tools.output_compaction import compact_output
 
 class GetMessagesInput(BaseModel):
     """Input schema for get_messages tool."""
@@ -16,6 +16,10 @@ def get_slack_messages():
     """
     Use this tool to retrieve unread messages from Slack.
     """
+    # The Slack SDK is only imported on first use to keep startup fast
+    from slack_sdk import WebClient
+    from slack_sdk.errors import SlackApiError
+
     try:
         messages = []
         # Get unread DMs
@@ -79,4 +83,10 @@ def get_slack_messages():
 
     except SlackApiError as e:
         print(f"Error fetching messages: {e}")
-        return f"Error fetching messages: {e}"
\ No newline at end of file
+        return f"Error fetching messages: {e}"
+
+# The async Slack client needs aiohttp, so `ainvoke` runs the sync client on the blocking tools pool
+add_async(get_slack_messages)
+
+# Busy workspaces return many messages, they are ranked against the request when too many
+compact_output(get_slack_messages)
@@ -2,8 +2,7 @@ import os
 from langsmith import traceable
 from pydantic import BaseModel, Field
 from langchain_core.tools import tool
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
+from src.tools.async_tools import add_async
 
 class SendSlackMessageInput(BaseModel):
     channel: str = Field(..., description="The ID or name of the channel to send the message to.")
@@ -15,6 +14,10 @@ def send_slack_message(channel: str, message: str):
     """
     Use this tool to send a message to a specific Slack channel.
     """
+    # The Slack SDK is only imported on first use to keep startup fast
+    from slack_sdk import WebClient
+    from slack_sdk.errors import SlackApiError
+
     try:
         client = WebClient(token=os.getenv("SLACK_BOT_TOKEN"))
         response = client.chat_postMessage(channel=channel, text=message)
@@ -24,4 +27,7 @@ def send_slack_message(channel: str, message: str):
             return f"Error sending message: {response['error']}"
     except SlackApiError as e:
         print(f"Error sending message: {e}")
-        return f"Error sending message: {e}"
\ No newline at end of file
+        return f"Error sending message: {e}"
+
+# The async Slack client needs aiohttp, so `ainvoke` runs the sync client on the blocking tools pool
+add_async(send_slack_message)
@@ -1,8 +1,7 @@
 import os 
+import time
+import threading
 from datetime import datetime
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
 
 SCOPES = [
     "https://www.googleapis.com/auth/calendar.events",
@@ -13,43 +12,224 @@ SCOPES = [
 def get_current_date_time():
     return datetime.now().strftime("%Y-%m-%d %H:%M")
         
+GOOGLE_TOKEN_PATH = "token.json"
+
+_google_creds = None  # Credentials shared by every Google service of the process
+_google_creds_lock = threading.Lock()
+_google_discovery_docs = {}  # (api, version) -> discovery document
+_google_services = threading.local()  # (api, version) -> service, httplib2 connections aren't thread-safe
+_google_metrics = {"token_loads": 0, "refreshes": 0, "services_built": 0, "service_hits": 0}
+
+
 def get_credentials():
     """
-    Get and refresh Google Contacts API credentials
-    """
-    creds = None
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                'credentials.json', SCOPES)
-            creds = flow.run_local_server(port=0)
-        with open('token.json', 'w') as token:
-            token.write(creds.to_json())
+    Get and refresh Google Contacts API credentials, loaded from token.json once per process.
+    Only one thread refreshes an expired token, the others wait for it and reuse the result.
+    """
+    global _google_creds
+    creds = _google_creds
+    if creds is not None and creds.valid:
+        return creds
+
+    from google.oauth2.credentials import Credentials
+    from google.auth.transport.requests import Request
+    from google_auth_oauthlib.flow import InstalledAppFlow
+
+    with _google_creds_lock:
+        creds = _google_creds
+        if creds is None and os.path.exists(GOOGLE_TOKEN_PATH):
+            creds = Credentials.from_authorized_user_file(GOOGLE_TOKEN_PATH, SCOPES)
+            _google_metrics["token_loads"] += 1
+        if not creds or not creds.valid:
+            if creds and creds.expired and creds.refresh_token:
+                # Refreshed in place, the services built with these credentials pick up the new token
+                creds.refresh(Request())
+                _google_metrics["refreshes"] += 1
+            else:
+                flow = InstalledAppFlow.from_client_secrets_file(
+                    'credentials.json', SCOPES)
+                creds = flow.run_local_server(port=0)
+            with open(GOOGLE_TOKEN_PATH, 'w') as token:
+                token.write(creds.to_json())
+        _google_creds = creds
     return creds
 
+
+def get_google_service(api, version):
+    """
+    Returns the googleapiclient service of a Google API for the current thread, built once
+    per thread from the discovery document shipped with googleapiclient (read once per process).
+    """
+    creds = get_credentials()
+    key = (api, version)
+    services = getattr(_google_services, "services", None)
+    if services is None:
+        services = _google_services.services = {}
+    service = services.get(key)
+    if service is not None and service._http.credentials is creds:
+        with _google_creds_lock:
+            _google_metrics["service_hits"] += 1
+        return service
+
+    from googleapiclient.discovery import build_from_document
+    from googleapiclient.discovery_cache import get_static_doc
+
+    with _google_creds_lock:
+        if key not in _google_discovery_docs:
+            _google_discovery_docs[key] = get_static_doc(api, version)
+        document = _google_discovery_docs[key]
+        _google_metrics["services_built"] += 1
+    if document is None:
+        # Not shipped with googleapiclient, fetched from the discovery service instead
+        from googleapiclient.discovery import build
+        service = build(api, version, credentials=creds)
+    else:
+        service = build_from_document(document, credentials=creds)
+    services[key] = service
+    return service
+
+
+def get_google_metrics():
+    """
+    Returns how many times token.json was loaded, the token refreshed, and Google services
+    built or reused.
+    """
+    with _google_creds_lock:
+        return dict(_google_metrics)
+
 def extract_provider_and_model(model_string: str):
     return model_string.split("/", 1)
 
-def get_llm_by_provider(model_string, temperature=0.1):
-    llm_provider, model = extract_provider_and_model(model_string)
-    # Else find provider
+# Shared keep-alive HTTP settings, one connection pool per provider
+LLM_HTTP_LIMITS = {"max_connections": 20, "max_keepalive_connections": 10, "keepalive_expiry": 120}
+
+# Base URLs opened by `prewarm_llm_clients` to set up connections before the first turn
+LLM_PROVIDER_BASE_URLS = {
+    "openai": "https://api.openai.com/v1/models",
+    "groq": "https://api.groq.com/openai/v1/models",
+}
+
+_llm_clients = {}  # (provider, model, temperature) -> chat model
+_http_clients = {}  # provider -> httpx.Client
+_llm_clients_lock = threading.Lock()
+_llm_metrics = {"hits": 0, "misses": 0, "setup_seconds": 0.0, "connections": {}}
+
+
+def _record_connection_setup(provider):
+    """
+    Returns an httpcore trace callback adding up the TCP connect and TLS handshake
+    time of every new connection opened in the `provider` pool.
+    """
+    started = {}
+
+    def trace(event_name, info):
+        step, _, state = event_name.rpartition(".")
+        if step not in ("connection.connect_tcp", "connection.start_tls"):
+            return
+        if state == "started":
+            started[step] = time.perf_counter()
+        elif state == "complete" and step in started:
+            elapsed = time.perf_counter() - started.pop(step)
+            with _llm_clients_lock:
+                stats = _llm_metrics["connections"].setdefault(provider, {"opened": 0, "setup_seconds": 0.0})
+                stats["setup_seconds"] += elapsed
+                if step == "connection.connect_tcp":
+                    stats["opened"] += 1
+
+    return trace
+
+
+def _get_http_client(provider):
+    # Called with _llm_clients_lock held
+    if provider not in _http_clients:
+        import httpx
+
+        def add_trace(request):
+            request.extensions["trace"] = _record_connection_setup(provider)
+
+        _http_clients[provider] = httpx.Client(
+            limits=httpx.Limits(**LLM_HTTP_LIMITS),
+            timeout=httpx.Timeout(600, connect=10),
+            event_hooks={"request": [add_trace]}
+        )
+    return _http_clients[provider]
+
+
+def _create_llm(llm_provider, model, temperature):
     if llm_provider == "openai":
         from langchain_openai import ChatOpenAI
-        llm = ChatOpenAI(model=model, temperature=temperature)
+        # stream_usage reports the tokens of streamed answers too
+        return ChatOpenAI(model=model, temperature=temperature, http_client=_get_http_client(llm_provider), stream_usage=True)
     elif llm_provider == "anthropic":
         from langchain_anthropic import ChatAnthropic
-        llm = ChatAnthropic(model=model, temperature=temperature)  # Use the correct model name
+        # The Anthropic client keeps its own connection pool, cached with the model below
+        return ChatAnthropic(model=model, temperature=temperature)  # Use the correct model name
     elif llm_provider == "google":
         from langchain_google_genai import ChatGoogleGenerativeAI
-        llm = ChatGoogleGenerativeAI(model=model, temperature=temperature)  # Correct model name
+        return ChatGoogleGenerativeAI(model=model, temperature=temperature)  # Correct model name
     elif llm_provider == "groq":
         from langchain_groq import ChatGroq
-        llm = ChatGroq(model=model, temperature=temperature)
+        return ChatGroq(model=model, temperature=temperature, http_client=_get_http_client(llm_provider))
     # ... add elif blocks for other providers ...
-    else:
-        raise ValueError(f"Unsupported LLM provider: {llm_provider}")
-    return llm
\ No newline at end of file
+    raise ValueError(f"Unsupported LLM provider: {llm_provider}")
+
+
+def get_llm_by_provider(model_string, temperature=0.1):
+    """
+    Returns the chat model for `model_string`, built once per (provider, model, temperature)
+    and shared by every agent and thread of the process, along with its HTTP connections.
+    """
+    llm_provider, model = extract_provider_and_model(model_string)
+    key = (llm_provider, model, float(temperature))
+    llm = _llm_clients.get(key)
+    if llm is not None:
+        with _llm_clients_lock:
+            _llm_metrics["hits"] += 1
+        return llm
+
+    with _llm_clients_lock:
+        llm = _llm_clients.get(key)
+        if llm is not None:
+            _llm_metrics["hits"] += 1
+            return llm
+        start = time.perf_counter()
+        llm = _create_llm(llm_provider, model, temperature)
+        _llm_metrics["misses"] += 1
+        _llm_metrics["setup_seconds"] += time.perf_counter() - start
+        _llm_clients[key] = llm
+    return llm
+
+
+def prewarm_llm_clients(model_strings, temperature=0.1):
+    """
+    Builds the chat models of `model_strings` and opens a connection to their providers,
+    so the first turn after startup doesn't pay for the DNS lookup and TLS handshake.
+    """
+    for model_string in set(model_strings):
+        llm_provider, _ = extract_provider_and_model(model_string)
+        get_llm_by_provider(model_string, temperature)
+        url = LLM_PROVIDER_BASE_URLS.get(llm_provider)
+        if url is None or llm_provider not in _http_clients:
+            continue
+        try:
+            # Unauthenticated, the answer doesn't matter: the connection stays in the pool
+            _http_clients[llm_provider].get(url, timeout=10)
+        except Exception as e:
+            print(f"Failed to prewarm {llm_provider} connection: {e}")
+
+
+def get_llm_metrics():
+    """
+    Returns the client cache reuse counters, the time spent building clients and, per
+    provider, the number of connections opened and their connect + TLS setup time.
+    """
+    with _llm_clients_lock:
+        requests = _llm_metrics["hits"] + _llm_metrics["misses"]
+        return {
+            "clients": len(_llm_clients),
+            "hits": _llm_metrics["hits"],
+            "misses": _llm_metrics["misses"],
+            "hit_ratio": _llm_metrics["hits"] / requests if requests else 0.0,
+            "setup_seconds": _llm_metrics["setup_seconds"],
+            "connections": {provider: dict(stats) for provider, stats in _llm_metrics["connections"].items()},
+        }
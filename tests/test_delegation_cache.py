@@ -0,0 +1,60 @@
+import time
+from langchain_core.messages import AIMessage, ToolMessage
+from src.agents.base.delegation_cache import DelegationCache, normalize, similarity
+
+
+def answer(text, tool_calls=()):
+    return [AIMessage(content="", tool_calls=[{"name": name, "args": {}, "id": name} for name in tool_calls]),
+            AIMessage(content=text)]
+
+
+def test_rephrasings_normalize_to_the_same_words():
+    assert normalize("What's on my calendar today?") == normalize("show my meetings today")
+
+
+def test_different_numbers_never_match():
+    assert similarity(normalize("events on the 12th"), normalize("events on the 13th")) == 0.0
+
+
+def test_similar_question_is_served_from_cache():
+    cache = DelegationCache(ttl=60, threshold=0.8)
+    assert cache.get("calendar_agent", "What's on my calendar today?") is None
+    cache.record("calendar_agent", "What's on my calendar today?", answer("Nothing today"), latency=2.0)
+
+    assert cache.get("calendar_agent", "show my meetings today") == "Nothing today"
+    assert cache.get("email_agent", "show my meetings today") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["saved_seconds"]) == (1, 2, 2.0)
+
+
+def test_entries_expire_after_ttl():
+    cache = DelegationCache(ttl=0.05)
+    cache.record("calendar_agent", "events today", answer("Nothing today"), latency=0)
+    time.sleep(0.1)
+    assert cache.get("calendar_agent", "events today") is None
+
+
+def test_write_tool_invalidates_recipient():
+    cache = DelegationCache(ttl=60)
+    cache.record("calendar_agent", "events today", answer("Nothing today"), latency=0)
+    cache.record("email_agent", "unread emails", answer("No email"), latency=0)
+
+    cache.record("calendar_agent", "add a meeting at 3pm", answer("Added", ["AddEventToCalendar"]), latency=0)
+    assert cache.get("calendar_agent", "events today") is None
+    assert cache.get("calendar_agent", "add a meeting at 3pm") is None  # Writes are never cached
+    assert cache.get("email_agent", "unread emails") == "No email"
+
+
+def test_tool_results_count_as_writes():
+    cache = DelegationCache(ttl=60)
+    cache.record("calendar_agent", "events today", answer("Nothing today"), latency=0)
+    assert cache.record_writes("calendar_agent", [ToolMessage(content="ok", name="AddEventToCalendar", tool_call_id="1")])
+    assert cache.get("calendar_agent", "events today") is None
+
+
+def test_answer_generated_across_a_write_is_not_cached():
+    cache = DelegationCache(ttl=60)
+    cache.invalidate("calendar_agent")
+    # Took 10 s, so it started before the write that just happened
+    cache.record("calendar_agent", "events today", answer("Stale"), latency=10)
+    assert cache.get("calendar_agent", "events today") is None
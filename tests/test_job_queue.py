@@ -0,0 +1,89 @@
+import time
+import pytest
+from src.runtime.job_queue import DEAD, DONE, QUEUED, JobQueue
+
+
+@pytest.fixture
+def job_queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.sqlite"), visibility_timeout=60, max_attempts=2, retry_delay=60)
+
+
+def status(job_queue, job_id):
+    with job_queue.lock:
+        return job_queue.conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+
+
+def test_enqueue_deduplicates_provider_message_ids(job_queue):
+    assert job_queue.enqueue("telegram", 1, "chat", {"text": "hi"})
+    assert not job_queue.enqueue("telegram", 1, "chat", {"text": "hi"})
+    assert job_queue.enqueue("slack", 1, "chat", {"text": "hi"})
+    assert job_queue.backlog() == 2
+
+
+def test_claim_keeps_conversation_order(job_queue):
+    job_queue.enqueue("telegram", 1, "a", {"n": 1})
+    job_queue.enqueue("telegram", 2, "a", {"n": 2})
+    job_queue.enqueue("telegram", 3, "b", {"n": 3})
+
+    first = job_queue.claim("w1")
+    # The second message of "a" waits for the first one, "b" can run meanwhile
+    other = job_queue.claim("w2")
+    assert (first["payload"], other["payload"]) == ({"n": 1}, {"n": 3})
+    assert job_queue.claim("w3") is None
+
+    job_queue.ack(first["id"])
+    assert job_queue.claim("w3")["payload"] == {"n": 2}
+    assert status(job_queue, first["id"]) == DONE
+
+
+def test_claim_filters_channels(job_queue):
+    job_queue.enqueue("telegram", 1, "a", {})
+    assert job_queue.claim("w1", channels=["slack"]) is None
+    assert job_queue.claim("w1", channels=["telegram"])["channel"] == "telegram"
+
+
+def test_unacknowledged_job_is_claimed_again_after_visibility_timeout(job_queue):
+    job_queue.visibility_timeout = 0.05
+    job_queue.enqueue("telegram", 1, "a", {})
+    job = job_queue.claim("w1")
+    assert job_queue.claim("w2") is None
+
+    time.sleep(0.1)
+    again = job_queue.claim("w2")
+    assert (again["id"], again["attempts"]) == (job["id"], 2)
+
+
+def test_job_claimed_max_attempts_times_is_dead(job_queue):
+    job_queue.visibility_timeout = 0
+    job_queue.enqueue("telegram", 1, "a", {})
+    job_queue.claim("w1")
+    job_queue.claim("w1")
+    assert job_queue.claim("w1") is None
+    assert job_queue.stats() == {DEAD: 1}
+
+
+def test_failed_job_is_retried_after_backoff(job_queue):
+    job_queue.enqueue("telegram", 1, "a", {})
+    job = job_queue.claim("w1")
+    job_queue.fail(job["id"], "boom")
+    assert status(job_queue, job["id"]) == QUEUED
+    assert job_queue.claim("w1") is None  # Not visible before `retry_delay`
+
+
+def test_release_does_not_count_as_an_attempt(job_queue):
+    job_queue.enqueue("telegram", 1, "a", {})
+    job = job_queue.claim("w1")
+    job_queue.release(job["id"])
+    assert job_queue.claim("w2")["attempts"] == 1
+
+
+def test_purge_deletes_old_finished_jobs_only(job_queue):
+    job_queue.enqueue("telegram", 1, "a", {})
+    job_queue.enqueue("telegram", 2, "b", {})
+    job_queue.ack(job_queue.claim("w1")["id"])
+
+    assert job_queue.purge(older_than=60) == 0
+    assert job_queue.purge(older_than=0) == 1
+    assert job_queue.stats() == {QUEUED: 1}
+    # A purged message id can be queued again
+    assert job_queue.enqueue("telegram", 1, "a", {})
@@ -0,0 +1,114 @@
+import time
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+from src.agents.base import model_chain
+from src.agents.base.model_chain import STREAM_RESET, CircuitBreaker, _AttemptTracker
+
+
+@pytest.fixture(autouse=True)
+def circuit_breakers(monkeypatch):
+    # Every test starts with closed circuits
+    breakers = {}
+    monkeypatch.setattr(model_chain, "_circuit_breakers", breakers)
+    return breakers
+
+
+def tracker(*names):
+    return _AttemptTracker([None] * len(names), list(names))
+
+
+def chunk(text):
+    return AIMessageChunk(content=text)
+
+
+def test_circuit_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+
+def test_half_open_circuit_lets_one_request_through():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # Held back until the trial request ends
+
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_trial_request_keeps_circuit_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.1)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_open_circuit_is_skipped(circuit_breakers):
+    circuit_breakers["openai"] = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    circuit_breakers["openai"].record_failure()
+    assert tracker("openai/gpt-4o", "groq/llama").start() == 1
+
+
+def test_whole_chain_is_tried_when_every_circuit_is_open(circuit_breakers):
+    for provider in ("openai", "groq"):
+        circuit_breakers[provider] = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+        circuit_breakers[provider].record_failure()
+    assert tracker("openai/gpt-4o", "groq/llama").start() == 0
+
+
+def test_single_attempt_streams_right_away():
+    attempts = tracker("openai/gpt-4o", "groq/llama")
+    index = attempts.start()
+    assert attempts.hold(index, chunk("Hel")) == [chunk("Hel")]
+    assert attempts.hold(index, chunk("lo")) == [chunk("lo")]
+
+
+def test_hedged_tokens_are_held_until_the_winner_is_known():
+    attempts = tracker("openai/gpt-4o", "groq/llama")
+    primary = attempts.start()
+    hedge = attempts.start(hedge=True)
+    assert attempts.hold(hedge, chunk("Hi")) == []
+
+    assert attempts.handle("done", hedge, AIMessage(content="Hi")) is not None
+    assert attempts.flush(hedge) == [chunk("Hi")]
+    assert attempts.running == {primary}
+
+
+def test_slow_primary_losing_counts_as_breaker_failure(circuit_breakers):
+    attempts = tracker("openai/gpt-4o", "groq/llama")
+    attempts.start()
+    hedge = attempts.start(hedge=True)  # The primary missed its first token budget
+    attempts.handle("done", hedge, AIMessage(content="Hi"))
+    assert circuit_breakers["openai"].failures == 1
+    assert circuit_breakers["groq"].failures == 0
+
+
+def test_live_attempt_failing_resets_the_stream():
+    attempts = tracker("openai/gpt-4o", "groq/llama")
+    primary = attempts.start()
+    attempts.hold(primary, chunk("Half an ans"))
+    attempts.handle("error", primary, ValueError("connection reset"))
+    assert attempts.should_fail_over()
+
+    fallback = attempts.start()
+    reset, token = attempts.hold(fallback, chunk("Full answer"))
+    assert reset.content == "" and reset.response_metadata[STREAM_RESET]
+    assert token == chunk("Full answer")
+
+
+def test_last_error_is_raised_when_no_model_is_left():
+    attempts = tracker("openai/gpt-4o")
+    index = attempts.start()
+    error = ValueError("down")
+    attempts.handle("error", index, error)
+    with pytest.raises(ValueError):
+        attempts.start()